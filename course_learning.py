@@ -8,7 +8,10 @@ package_name = args.package_name
 demo_file_path = args.demo_file_path
 
 friday_agent = FridayAgent(FridayPlanner, FridayRetriever, FridayExecutor, ToolManager, config=args)
-self_learning = SelfLearning(friday_agent, SelfLearner, ToolManager, args, TextExtractor)
+# Lesson agents share the tool manager of the main agent, which serializes writes to the tool repository.
+tool_manager = friday_agent.executor.tool_manager
+create_lesson_agent = lambda: FridayAgent(FridayPlanner, FridayRetriever, FridayExecutor, lambda _: tool_manager, config=args)
+self_learning = SelfLearning(friday_agent, SelfLearner, ToolManager, args, TextExtractor, agent_factory=create_lesson_agent)
 
 # Only one stage of course study
 # self_learning.self_learning(software_name, package_name, demo_file_path)
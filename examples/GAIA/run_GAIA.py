@@ -1,92 +1,64 @@
-import json
-import requests
+import os
 from oscopilot import FridayAgent
 from oscopilot import FridayExecutor, FridayPlanner, FridayRetriever, ToolManager
 from oscopilot.utils import setup_config, GAIALoader, GAIA_postprocess
+from oscopilot.utils.benchmark import BenchmarkRunner, consolidate_results, shard_results_path
 
 
-args = setup_config()
-args.dataset_type = 'validation'
 model = 'gpt4-turbo'
 
-write_file_path = 'gaia_{}_{}_level{}_results.jsonl'.format(model, args.dataset_type, args.level)
-def get_numbers(path):
-    correct = 0
-    incomplete = 0
-    with open(path, 'r', encoding='utf-8') as file:
-        data = [json.loads(line) for line in file]
-        print(data)
-        for d in data:
-            if d["model_answer"] == d["groundtruth"]:
-                correct += 1
-            if d["model_answer"] == "" or d["model_answer"] == "incomplete":
-                incomplete += 1
-        if len(data) > 0:
-            return correct, incomplete, data[-1]["index"]
-        return correct, incomplete, -1 # -1 denotes no previous running
 
-agent = FridayAgent(FridayPlanner, FridayRetriever, FridayExecutor, ToolManager, config=args)
+def create_agent(args):
+    """
+    Builds the agent of one benchmark worker.
+    """
+    return FridayAgent(FridayPlanner, FridayRetriever, FridayExecutor, ToolManager, config=args)
 
-gaia = GAIALoader(args.level, args.dataset_cache)
 
-# args.gaia_task_id = "e1fc63a2-da7a-432f-be78-7c4a95598703"
-if args.gaia_task_id:
-    task = gaia.get_data_by_task_id(args.gaia_task_id, args.dataset_type)
-    query = gaia.task2query(task)
-    # agent.run(query)
-    # if agent.inner_monologue.result != '':
-    if True:
-        # print(agent.inner_monologue.result)
-        result = """17000
-        """
-        # result = GAIA_postprocess(task['Question'], agent.inner_monologue.result)
-        result = GAIA_postprocess(task['Question'], result)
-        print('The answer of GAIA Task {0} : {1}'.format(args.gaia_task_id, result))
-else:
-    task_lst = gaia.dataset[args.dataset_type]
-    correct, incomplete, last_run_index = get_numbers(write_file_path)
-    print(correct, incomplete, last_run_index)
-    with open(write_file_path, 'a', encoding='utf-8') as file:
-        count = 0
+def run_task(agent, task):
+    """
+    Runs one GAIA task and extracts the final answer from the agent's result.
+    """
+    agent.run(GAIALoader.task2query(task))
+    result = ''
+    if agent.inner_monologue.result != '':
+        result = GAIA_postprocess(task['Question'], agent.inner_monologue.result)
+    return {
+        "model_answer": result,
+        "groundtruth": task["Final answer"],
+        "correct": result == task["Final answer"],
+        "reasoning_trace": "",
+        "status": "complete" if result != '' else "incomplete",
+    }
 
-        for task in task_lst:
-            if count <= last_run_index:
-                print("\t\t\t skip current run:", count)
-                count += 1
-                continue
-            query = gaia.task2query(task)
-            result = ''
-            # agent.run(query)
-            try:
-                agent.run(query)
-                print("$$$$$$" * 30)
-                if agent.inner_monologue.result != '':
-                    result = GAIA_postprocess(task['Question'], agent.inner_monologue.result)
-            except requests.exceptions.ConnectionError as ConnectionError:
-                print(f"Connection error.: {ConnectionError}")
-                exit()
-            except Exception as e:
-                print("$$$$$$" * 30)
-                # Code to handle any other type of exception
-                print(f"An error occurred: {e}")
-                print("$$$$$$" * 30)
-                result = "incomplete"
-                incomplete += 1
-            output_dict = {
-                "index": count,
-                "task_id": task['task_id'],
-                "model_answer": result,
-                "groundtruth": task["Final answer"],
-                "reasoning_trace": ""
-            }
-            if result == task["Final answer"]:
-                correct += 1
-            json_str = json.dumps(output_dict)
-            file.write(json_str + '\n')
-            file.flush()
-            count += 1
-            # if count > 2:
-            #     break
-        print("accuracy:", correct / count)
-        print("incomplete:", incomplete / count)
-        print("correct incomplete total,", correct, incomplete, count)
+
+def main():
+    args = setup_config()
+    args.dataset_type = 'validation'
+    gaia = GAIALoader(args.level, args.dataset_cache, args.dataset_snapshot)
+    task_ids = args.gaia_task_id.split(',') if args.gaia_task_id else None
+
+    if task_ids and len(task_ids) == 1:
+        task = gaia.get_data_by_task_id(args.gaia_task_id, args.dataset_type)
+        agent = create_agent(args)
+        result = run_task(agent, task)
+        print('The answer of GAIA Task {0} : {1}'.format(args.gaia_task_id, result["model_answer"]))
+        return
+
+    results_path = args.results_path or 'gaia_{}_{}_level{}_results.jsonl'.format(model, args.dataset_type, args.level)
+    runner = BenchmarkRunner(results_path, workers=args.workers, num_shards=args.num_shards,
+                             shard_index=args.shard_index, retry_incomplete=args.retry_incomplete,
+                             worker_root=os.path.join(args.working_dir, 'gaia_workers'))
+    tasks = ((task['task_id'], task) for task in gaia.iter_tasks(args.dataset_type, task_ids=task_ids))
+    runner.run(tasks, run_task, create_agent, vars(args))
+
+    shard_paths = [shard_results_path(results_path, args.num_shards, i) for i in range(args.num_shards)]
+    summary = consolidate_results(shard_paths, os.path.splitext(results_path)[0] + '_summary.json')
+    print("accuracy:", summary["accuracy"])
+    print("incomplete:", summary["incomplete"] / summary["tasks"] if summary["tasks"] else 0)
+    print("correct incomplete total,", summary["correct"], summary["incomplete"], summary["tasks"])
+    print("tokens (prompt, completion):", summary["prompt_tokens"], summary["completion_tokens"])
+
+
+if __name__ == '__main__':
+    main()
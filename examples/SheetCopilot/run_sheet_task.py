@@ -1,17 +1,128 @@
+import os
+import re
+import shutil
+import openpyxl
 from oscopilot import FridayAgent
 from oscopilot import FridayExecutor, FridayPlanner, FridayRetriever, ToolManager
-from oscopilot.utils import setup_config, SheetTaskLoader
+from oscopilot.utils import setup_config, SheetTaskLoader, get_project_root_path
+from oscopilot.utils.config import Config
+from oscopilot.utils.benchmark import BenchmarkRunner, consolidate_results, shard_results_path
 
 
-args = setup_config()
-sheet_task_loader = SheetTaskLoader("examples/SheetCopilot/sheet_task.jsonl")
-agent = FridayAgent(FridayPlanner, FridayRetriever, FridayExecutor, ToolManager, config=args)
+sheet_task_path = "examples/SheetCopilot/sheet_task.jsonl"
+sheet_answer_dir = "examples/SheetCopilot/sheets_ans"
 
-if args.sheet_task_id:
-    task = sheet_task_loader.get_data_by_task_id(args.sheet_task_id)
-    agent.run(task)
-else:
-    task_lst = sheet_task_loader.load_sheet_task_dataset()
-    for task_id, task in enumerate(task_lst):
-        args.sheet_task_id = task_id
-        agent.run(task)
\ No newline at end of file
+
+def create_agent(args):
+    """
+    Builds the agent of one benchmark worker.
+    """
+    return FridayAgent(FridayPlanner, FridayRetriever, FridayExecutor, ToolManager, config=args)
+
+
+def cell_equal(value, expected):
+    """
+    Compares two cell values, allowing for float rounding.
+    """
+    if isinstance(value, (int, float)) and isinstance(expected, (int, float)):
+        return abs(value - expected) <= 1e-6 * max(1.0, abs(expected))
+    return value == expected
+
+
+def normalize_formula(value):
+    """
+    Returns a formula without whitespace and `$` markers in upper case, or the value as is if it is not a formula.
+    """
+    if isinstance(value, str) and value.startswith('='):
+        return re.sub(r'[\s$]', '', value).upper()
+    return value
+
+
+def compare_workbooks(path, answer_path):
+    """
+    Checks that a workbook has every sheet and every non-empty cell value of the answer workbook.
+
+    Formula cells are compared by the values Excel cached for them. When either side has no cached
+    value, as in a workbook saved by openpyxl, the formulas are compared after normalization instead.
+
+    Args:
+        path (str): The workbook produced by the agent.
+        answer_path (str): The ground truth workbook.
+
+    Returns:
+        tuple: Whether the workbooks match, and the first mismatch found.
+    """
+    workbook = openpyxl.load_workbook(path)
+    workbook_values = openpyxl.load_workbook(path, data_only=True)
+    answer = openpyxl.load_workbook(answer_path)
+    answer_values = openpyxl.load_workbook(answer_path, data_only=True)
+    for sheet in answer.worksheets:
+        if sheet.title not in workbook.sheetnames:
+            return False, "missing sheet {}".format(sheet.title)
+        result_sheet = workbook[sheet.title]
+        result_value_sheet = workbook_values[sheet.title]
+        answer_value_sheet = answer_values[sheet.title]
+        for row in sheet.iter_rows():
+            for cell in row:
+                if cell.value is None:
+                    continue
+                expected = answer_value_sheet[cell.coordinate].value
+                value = result_value_sheet[cell.coordinate].value
+                if expected is None or value is None:
+                    expected = normalize_formula(cell.value)
+                    value = normalize_formula(result_sheet[cell.coordinate].value)
+                if not cell_equal(value, expected):
+                    return False, "{}!{}: {!r} != {!r}".format(sheet.title, cell.coordinate, value, expected)
+    return True, ""
+
+
+def run_task(agent, payload):
+    """
+    Runs one sheet task on a private copy of its workbook and compares the result with the answer.
+    """
+    index, task_info = payload
+    scratch_dir = os.path.join(Config.get_parameter('working_dir'), 'sheet_tasks', str(index))
+    shutil.rmtree(scratch_dir, ignore_errors=True)
+    os.makedirs(scratch_dir)
+    workbook_path = os.path.join(scratch_dir, os.path.basename(task_info['file_path']))
+    shutil.copy(get_project_root_path() + task_info['file_path'], workbook_path)
+
+    agent.run(SheetTaskLoader(get_project_root_path() + sheet_task_path).task_info2query(task_info, workbook_path))
+
+    answer_path = os.path.join(get_project_root_path() + sheet_answer_dir,
+                               "{}_{}_gt1.xlsx".format(task_info['No.'], task_info['Sheet Name']))
+    if not os.path.exists(answer_path):
+        return {"sheet": task_info['Sheet Name'], "correct": False, "mismatch": "no answer workbook"}
+    correct, mismatch = compare_workbooks(workbook_path, answer_path)
+    return {"sheet": task_info['Sheet Name'], "correct": correct, "mismatch": mismatch}
+
+
+def main():
+    args = setup_config()
+    sheet_task_loader = SheetTaskLoader(get_project_root_path() + sheet_task_path)
+
+    if args.sheet_task_id is not None:
+        agent = create_agent(args)
+        task = sheet_task_loader.get_data_by_task_id(args.sheet_task_id)
+        agent.run(task)
+        return
+
+    results_path = args.results_path or os.path.join(args.logging_filedir, 'sheet_task_results.jsonl')
+    runner = BenchmarkRunner(results_path, workers=args.workers, num_shards=args.num_shards,
+                             shard_index=args.shard_index, retry_incomplete=args.retry_incomplete,
+                             worker_root=os.path.join(args.working_dir, 'sheet_workers'))
+    tasks = ((str(index), (index, task_info)) for index, task_info in sheet_task_loader.iter_tasks())
+    runner.run(tasks, run_task, create_agent, vars(args))
+
+    shard_paths = [shard_results_path(results_path, args.num_shards, i) for i in range(args.num_shards)]
+    summary = consolidate_results(shard_paths, os.path.splitext(results_path)[0] + '_summary.json')
+    for result in sorted(summary["results"], key=lambda r: int(r["task_id"])):
+        print("{:>3} {:<22} {:<10} {:>7.1f}s {}".format(
+            result["task_id"], result.get("sheet", ""), "correct" if result.get("correct") else result["status"],
+            result["wall_time"], result.get("mismatch") or result.get("error", "")))
+    print("accuracy: {:.2%} ({}/{}), incomplete: {}, total time: {:.1f}s".format(
+        summary["accuracy"], summary["correct"], summary["tasks"], summary["incomplete"], summary["wall_time"]))
+
+
+if __name__ == '__main__':
+    main()
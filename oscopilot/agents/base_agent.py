@@ -1,6 +1,6 @@
-import re
 import json
 from oscopilot.utils import get_os_version
+from oscopilot.utils.response_parser import extract_tag, parse_json
 
 
 class BaseAgent:
@@ -36,23 +36,15 @@ class BaseAgent:
         Returns:
             list[str]: A list of extracted substrings found between the begin and end markers.
         """
-        result = []
-        _begin = message.find(begin_str)
-        _end = message.find(end_str)
-        while not (_begin == -1 or _end == -1):
-            result.append(message[_begin + len(begin_str):_end])
-            message = message[_end + len(end_str):]
-            _begin = message.find(begin_str)
-            _end = message.find(end_str)
-        return result  
+        return extract_tag(message, begin_str, end_str)
 
     def extract_json_from_string(self, text):
         """
         Identifies and extracts JSON data embedded within a given string.
 
-        This method searches for JSON data within a string, specifically looking for
-        JSON blocks that are marked with ```json``` notation. It attempts to parse
-        and return the first JSON object found.
+        This method searches for JSON data within a string, preferring JSON blocks that
+        are marked with ```json``` notation, and parses the first one found. Minor formatting
+        drift such as trailing commas or a cut-off end is repaired (see `parse_json`).
 
         Args:
             text (str): The text containing the JSON data to be extracted.
@@ -61,21 +53,9 @@ class BaseAgent:
             dict: The parsed JSON data as a dictionary if successful.
             str: An error message indicating a parsing error or that no JSON data was found.
         """
-        # Improved regular expression to find JSON data within a string
-        json_regex = r'```json\s*\n\{[\s\S]*?\n\}\s*```'
-        
-        # Search for JSON data in the text
-        matches = re.findall(json_regex, text)
-
-        # Extract and parse the JSON data if found
-        if matches:
-            # Removing the ```json and ``` from the match to parse it as JSON
-            json_data = matches[0].replace('```json', '').replace('```', '').strip()
-            try:
-                # Parse the JSON data
-                parsed_json = json.loads(json_data)
-                return parsed_json
-            except json.JSONDecodeError as e:
-                return f"Error parsing JSON data: {e}"
-        else:
+        try:
+            return parse_json(text)
+        except json.JSONDecodeError as e:
+            return f"Error parsing JSON data: {e}"
+        except ValueError:
             return "No JSON data found in the string."
\ No newline at end of file
@@ -53,6 +53,8 @@ class FridayAgent(BaseAgent):
         """
         self.planner.reset_plan()
         self.reset_inner_monologue()
+        # The return values of the previous task are no longer needed.
+        self.executor.environment.clear_results()
         sub_tasks_list = self.planning(task)
         print("The task list obtained after planning is: {}".format(sub_tasks_list))
 
@@ -88,6 +90,7 @@ class FridayAgent(BaseAgent):
         isReplan = False
         score = 0
         state, node_type, description, code, result, relevant_code = execution_state.get_all_state()
+        return_ref = state.return_value if state is not None else None
         if node_type in ['Python', 'Shell', 'AppleScript']:
             judgement = self.judging(tool_name, state, code, description)
             score = judgement.score
@@ -111,16 +114,17 @@ class FridayAgent(BaseAgent):
                     isTaskCompleted = False
                 score = repairing_result.score
                 result = repairing_result.result
+                return_ref = repairing_result.return_value
             else:
                 isTaskCompleted = True
             if node_type == 'Python' and isTaskCompleted and score >= self.score:
-                self.executor.store_tool(tool_name, code)
+                self.executor.store_tool(tool_name, code, score)
                 print("{} has been stored in the tool repository.".format(tool_name))
         else: 
             isTaskCompleted = True
         if isTaskCompleted:
             self.inner_monologue.result = result
-            self.planner.update_tool(tool_name, result, relevant_code, True, node_type)
+            self.planner.update_tool(tool_name, result, relevant_code, True, node_type, return_ref)
         return isTaskCompleted, isReplan
 
     def planning(self, task):
@@ -169,7 +173,7 @@ class FridayAgent(BaseAgent):
         result = ''
         relevant_code = {}
         node_type = tool_node.node_type
-        pre_tasks_info = self.planner.get_pre_tasks_info(tool_name)
+        pre_tasks_info = self.planner.get_pre_tasks_info(tool_name, self.executor.environment.live_kernel_id())
         if node_type == 'Python':
             # retrieve existing tool
             retrieve_name = self.retriever.retrieve_tool_name(description, 3)
@@ -195,8 +199,10 @@ class FridayAgent(BaseAgent):
                 print("api call failed:", str(e))
                 return
             # Execute python tool class code
-            state = self.executor.execute_tool(code, invoke, node_type)
-            result = state.result
+            # Snapshot the working dir, so repairs start from the same files as this attempt
+            self.executor.environment.checkpoint()
+            state = self.executor.execute_tool(code, invoke, node_type, tool_name)
+            result = state.return_text()
             logging.info(state)
             output = {
                 "result": state.result,
@@ -276,7 +282,7 @@ class FridayAgent(BaseAgent):
         """
         tool_node = self.planner.tool_node[tool_name]
         next_action = tool_node.next_action
-        pre_tasks_info = self.planner.get_pre_tasks_info(tool_name)
+        pre_tasks_info = self.planner.get_pre_tasks_info(tool_name, self.executor.environment.live_kernel_id())
         trial_times = 0
         score = 0
         while (trial_times < self.executor.max_iter and status == 'Amend'):
@@ -291,8 +297,10 @@ class FridayAgent(BaseAgent):
             critique = ''
             code = new_code
             # Run the current code and check for errors
-            state = self.executor.execute_tool(code, invoke, tool_node.node_type)
-            result = state.result
+            # Undo the changes of the failed attempt
+            self.executor.environment.rollback()
+            state = self.executor.execute_tool(code, invoke, tool_node.node_type, tool_name)
+            result = state.return_text()
             logging.info(state) 
             if state.error == None:
             # Set up the generation format error handling mechanism
@@ -312,7 +320,7 @@ class FridayAgent(BaseAgent):
                     raise NotImplementedError
             else: # The code still needs to be corrected
                 status = 'Amend'
-        return RepairingResult(status, code, critique, score, result)
+        return RepairingResult(status, code, critique, score, result, state.return_value)
 
     def reset_inner_monologue(self):
         self.inner_monologue = InnerMonologue()
\ No newline at end of file
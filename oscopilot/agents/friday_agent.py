@@ -5,6 +5,8 @@ import logging
 import sys
 from oscopilot.prompts.friday_pt import prompt
 from oscopilot.utils import TaskStatusCode, InnerMonologue, ExecutionState, JudgementResult, RepairingResult
+from oscopilot.utils.tracing import tracer, traced
+from oscopilot.utils.usage import usage_ledger, BudgetExceededError
 
 
 class FridayAgent(BaseAgent):
@@ -37,6 +39,8 @@ class FridayAgent(BaseAgent):
         self.score = self.config.score
         self.task_status = TaskStatusCode.START
         self.inner_monologue = InnerMonologue()
+        # Subtasks executed by calling a stored tool, mapped to that tool's name
+        self.reused_tools = {}
         try:
             check_os_version(self.system_version)
         except ValueError as e:
@@ -51,25 +55,34 @@ class FridayAgent(BaseAgent):
 
         No explicit return value, but the method controls the flow of task execution and may exit the process in case of irreparable failures.
         """
-        self.planner.reset_plan()
-        self.reset_inner_monologue()
-        sub_tasks_list = self.planning(task)
-        print("The task list obtained after planning is: {}".format(sub_tasks_list))
-
-        while self.planner.sub_task_list:
-            try:
-                sub_task = self.planner.sub_task_list.pop(0)
-                execution_state = self.executing(sub_task, task)
-                isTaskCompleted, isReplan = self.self_refining(sub_task, execution_state)
-                if isReplan: continue
-                if isTaskCompleted:
-                    print("The execution of the current sub task has been successfully completed.")
-                else:
-                    print("{} not completed in repair round {}".format(sub_task, self.config.max_repair_iterations))
+        with tracer.span("task", task=task), usage_ledger.tags(task=task, subtask=''):
+            self.planner.reset_plan()
+            self.reset_inner_monologue()
+            self.reused_tools = {}
+            # The return values of the previous task are no longer needed.
+            self.executor.environment.clear_results()
+            sub_tasks_list = self.planning(task)
+            print("The task list obtained after planning is: {}".format(sub_tasks_list))
+
+            while self.planner.sub_task_list:
+                try:
+                    usage_ledger.check_budget()
+                    sub_task = self.planner.sub_task_list.pop(0)
+                    with tracer.span("sub_task", sub_task=sub_task), usage_ledger.tags(subtask=sub_task):
+                        execution_state = self.executing(sub_task, task)
+                        isTaskCompleted, isReplan = self.self_refining(sub_task, execution_state)
+                    if isReplan: continue
+                    if isTaskCompleted:
+                        print("The execution of the current sub task has been successfully completed.")
+                    else:
+                        print("{} not completed in repair round {}".format(sub_task, self.config.max_repair_iterations))
+                        break
+                except BudgetExceededError as e:
+                    print("Task aborted. {}".format(str(e)))
+                    break
+                except Exception as e:
+                    print("Current task execution failed. Error: {}".format(str(e)))
                     break
-            except Exception as e:
-                print("Current task execution failed. Error: {}".format(str(e)))
-                break
 
     def self_refining(self, tool_name, execution_state: ExecutionState):
         """
@@ -91,6 +104,7 @@ class FridayAgent(BaseAgent):
         isReplan = False
         score = 0
         state, node_type, description, code, result, relevant_code = execution_state.get_all_state()
+        return_ref = state.return_value if state is not None else None
         if node_type in ['Python', 'Shell', 'AppleScript']:
             judgement = self.judging(tool_name, state, code, description)
             score = judgement.score
@@ -114,18 +128,23 @@ class FridayAgent(BaseAgent):
                     isTaskCompleted = False
                 score = repairing_result.score
                 result = repairing_result.result
+                return_ref = repairing_result.return_value
             else:
                 isTaskCompleted = True
-            if node_type == 'Python' and isTaskCompleted and score >= self.score:
-                self.executor.store_tool(tool_name, code)
+            # A stored tool that was reused unchanged is already in the repository
+            reused_unchanged = tool_name in self.reused_tools and \
+                code == self.executor.tool_manager.get_tool_code(self.reused_tools[tool_name])
+            if node_type == 'Python' and isTaskCompleted and score >= self.score and not reused_unchanged:
+                self.executor.store_tool(tool_name, code, score)
                 print("{} has been stored in the tool repository.".format(tool_name))
         else: 
             isTaskCompleted = True
         if isTaskCompleted:
             self.inner_monologue.result = result
-            self.planner.update_tool(tool_name, result, relevant_code, True, node_type)
+            self.planner.update_tool(tool_name, result, relevant_code, True, node_type, return_ref)
         return isTaskCompleted, isReplan
 
+    @traced("planning")
     def planning(self, task):
         """
         Decomposes a given high-level task into a list of sub-tasks by retrieving relevant tool names and descriptions, facilitating structured execution planning.
@@ -150,6 +169,7 @@ class FridayAgent(BaseAgent):
             return     
         return self.planner.sub_task_list
     
+    @traced("executing")
     def executing(self, tool_name, original_task):
         """
         Executes a given sub-task as part of the task execution process, handling different types of tasks including code execution, API calls, and question-answering.
@@ -172,11 +192,14 @@ class FridayAgent(BaseAgent):
         result = ''
         relevant_code = {}
         node_type = tool_node.node_type
-        pre_tasks_info = self.planner.get_pre_tasks_info(tool_name)
+        pre_tasks_info = self.planner.get_pre_tasks_info(tool_name, self.executor.environment.live_kernel_id())
+        reuse_name = None
         if node_type == 'Python':
-            # retrieve existing tool
-            retrieve_name = self.retriever.retrieve_tool_name(description, 3)
-            relevant_code = self.retriever.retrieve_tool_code_pair(retrieve_name)
+            # call a stored tool that fits the subtask directly, otherwise retrieve related tools for generation
+            reuse_name = self.executor.find_reusable_tool(description)
+            if reuse_name is None:
+                retrieve_name = self.retriever.retrieve_tool_name(description, 3)
+                relevant_code = self.retriever.retrieve_tool_code_pair(retrieve_name)
         # task execute step
         if node_type == 'QA':
             if self.planner.tool_num == 1:
@@ -192,14 +215,22 @@ class FridayAgent(BaseAgent):
                 if node_type == 'API':
                     api_path = self.executor.extract_API_Path(description)
                     code = self.executor.api_tool(description, api_path, pre_tasks_info)
+                    exec_code = code
+                elif reuse_name is not None:
+                    exec_code, invoke, code = self.executor.reuse_tool(reuse_name, description, pre_tasks_info)
+                    relevant_code = {reuse_name: code}
+                    self.reused_tools[tool_name] = reuse_name
                 else:
                     code, invoke = self.executor.generate_tool(tool_name, description, node_type, pre_tasks_info, relevant_code)
+                    exec_code = code
             except Exception as e:
                 print("api call failed:", str(e))
                 return
             # Execute python tool class code
-            state = self.executor.execute_tool(code, invoke, node_type)
-            result = state.result
+            # Snapshot the working dir, so repairs start from the same files as this attempt
+            self.executor.environment.checkpoint()
+            state = self.executor.execute_tool(exec_code, invoke, node_type, tool_name)
+            result = state.return_text()
             logging.info(state)
             output = {
                 "result": state.result,
@@ -209,6 +240,7 @@ class FridayAgent(BaseAgent):
 
         return ExecutionState(state, node_type, description, code, result, relevant_code)
     
+    @traced("judging")
     def judging(self, tool_name, state, code, description):
         """
         Evaluates the execution of a tool based on its execution state and the provided code and description, determining whether the tool's execution was successful or requires amendment.
@@ -237,6 +269,7 @@ class FridayAgent(BaseAgent):
             return
         return JudgementResult(status, critique, score)
     
+    @traced("replanning")
     def replanning(self, tool_name, reasoning):
         """
         Initiates the replanning process for a task based on new insights or failures encountered during execution, aiming to adjust the plan to better achieve the task goals.
@@ -260,6 +293,7 @@ class FridayAgent(BaseAgent):
             return
         return self.planner.sub_task_list
 
+    @traced("repairing")
     def repairing(self, tool_name, code, description, state, critique, status):
         """
         Attempts to repair the execution of a tool by amending its code based on the critique received and the current execution state, iterating until the code executes successfully or reaches the maximum iteration limit.
@@ -279,7 +313,7 @@ class FridayAgent(BaseAgent):
         """
         tool_node = self.planner.tool_node[tool_name]
         next_action = tool_node.next_action
-        pre_tasks_info = self.planner.get_pre_tasks_info(tool_name)
+        pre_tasks_info = self.planner.get_pre_tasks_info(tool_name, self.executor.environment.live_kernel_id())
         trial_times = 0
         score = 0
         while (trial_times < self.executor.max_iter and status == 'Amend'):
@@ -294,8 +328,10 @@ class FridayAgent(BaseAgent):
             critique = ''
             code = new_code
             # Run the current code and check for errors
-            state = self.executor.execute_tool(code, invoke, tool_node.node_type)
-            result = state.result
+            # Undo the changes of the failed attempt
+            self.executor.environment.rollback()
+            state = self.executor.execute_tool(code, invoke, tool_node.node_type, tool_name)
+            result = state.return_text()
             logging.info(state) 
             if state.error == None:
             # Set up the generation format error handling mechanism
@@ -315,7 +351,7 @@ class FridayAgent(BaseAgent):
                     raise NotImplementedError
             else: # The code still needs to be corrected
                 status = 'Amend'
-        return RepairingResult(status, code, critique, score, result)
+        return RepairingResult(status, code, critique, score, result, state.return_value)
 
     def reset_inner_monologue(self):
         self.inner_monologue = InnerMonologue()
\ No newline at end of file
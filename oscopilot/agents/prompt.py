@@ -267,7 +267,7 @@ prompt = {
         You need to complete the code using the ToolRequestUtil tool to call the specified API and print the return value
         of the api. 
         ToolRequestUtil is a utility class, and the parameters of its 'request' method are described as follows:
-        def request(self, api_path, method, params=None, content_type=None):
+        def request(self, api_path, method, params=None, files=None, content_type=None):
             """
             :param api_path: the path of the API
             :param method: get/post
@@ -276,6 +276,11 @@ prompt = {
             :param content_type: the content_type of api, e.g., application/json, multipart/form-data, can be None
             :return: the response from the API
             """
+        def gather(self, requests_list):
+            """
+            :param requests_list: a list of dicts, each holding the keyword arguments of one 'request' call. Use it when several independent API calls are needed, they are sent concurrently.
+            :return: the list of responses, in the same order as requests_list
+            """
         Please begin your code completion:
         ''',
         '_USER_TOOL_USAGE_PROMPT': '''
@@ -1,8 +1,12 @@
 import os
+import queue
+import shutil
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from oscopilot.prompts.friday_pt import prompt
 import json
-from oscopilot.utils import self_learning_print_logging, get_project_root_path, read_json, save_json
+from oscopilot.utils import self_learning_print_logging, get_project_root_path
+from oscopilot.utils.course_log import CourseLog
 
 
 class SelfLearning: 
@@ -16,10 +20,12 @@ class SelfLearning:
         learner (object): A learner object that is responsible for designing the course.
         tool_manager (object): Manages the tools required for course creation and learning.
         text_extractor (object, optional): An optional component responsible for extracting text from files.
-        course (dict): A dictionary to store course details.
+        course_log (CourseLog): The log of the lessons designed and learned so far.
+        agent_factory (callable, optional): Creates the additional agents that run lessons concurrently.
+        lesson_workers (int): The number of lessons run at the same time.
     """
 
-    def __init__(self, agent, learner, tool_manager, config, text_extractor=None):
+    def __init__(self, agent, learner, tool_manager, config, text_extractor=None, agent_factory=None):
         """
         Initializes the SelfLearning class with necessary components like agent, learner, tool manager, and configuration.
 
@@ -29,12 +35,20 @@ class SelfLearning:
             tool_manager (object): Manages and orchestrates the use of external tools necessary for course operations.
             config (dict): Configuration parameters that guide the self-learning process.
             text_extractor (callable, optional): A function or callable that extracts text from provided file paths.
+            agent_factory (callable, optional): A zero-argument callable returning a new agent. Lessons only
+                run concurrently (`--lesson_workers` > 1) if it is given; the agents it creates should share
+                the tool manager of `agent`, whose writes are serialized.
         """
         super().__init__()
         self.config = config
         self.agent = agent   
         self.learner = learner(prompt['self_learning_prompt'], tool_manager)      
-        self.course = {}
+        self.course_log = None
+        self.agent_factory = agent_factory
+        self.lesson_workers = max(1, getattr(config, 'lesson_workers', 1) or 1) if agent_factory else 1
+        self.demo_file_path = None
+        self._agent_pool = None
+        self._base_working_dir = None
         if text_extractor:
             self.text_extractor = text_extractor(agent)
 
@@ -48,26 +62,21 @@ class SelfLearning:
             demo_file_path (str): Path to a demo file used for extracting text content.
 
         Returns:
-            tuple: A tuple containing the prior course path and the file content extracted from the demo file.
+            str: The file content extracted from the demo file.
         """
         self_learning_print_logging(self.config)
-        # Create or read the course file
+        # Open the course log, importing the course file of earlier versions if there is one
         courses_dir = get_project_root_path() + 'courses'
-        if not os.path.exists(courses_dir):
-            os.makedirs(courses_dir)
-        prior_course_path = os.path.join(courses_dir, software_name + '_' + package_name + '.json')
-        if os.path.exists(prior_course_path):
-            self.course = read_json(prior_course_path)
-        else:
-            initial_course = {}
-            save_json(prior_course_path, initial_course)
+        if self.course_log is None:
+            self.course_log = CourseLog(os.path.join(courses_dir, software_name + '_' + package_name + '.jsonl'))
         # Extract file content if demo file path is provided
         file_content = None
         if demo_file_path:
             if not os.path.isabs(demo_file_path):
                 demo_file_path = get_project_root_path() + demo_file_path 
+            self.demo_file_path = demo_file_path
             file_content = self.text_extract(demo_file_path)
-        return prior_course_path, file_content
+        return file_content
 
     def self_learning(self, software_name, package_name, demo_file_path):
         """
@@ -81,15 +90,10 @@ class SelfLearning:
         Returns:
             None.
         """
-        prior_course_path, file_content = self._initialize_learning(software_name, package_name, demo_file_path)
-        if len(self.course) > 50:
-            prior_course = json.dumps(dict(list(self.course.items())[-50:]))
-        else:
-            prior_course = json.dumps(self.course, indent=4)
-        logging.info(f"The latest lessons that have been completed so far are as follows:\n {prior_course}")
-        new_course = self.learner.design_course(software_name, package_name, demo_file_path, file_content, prior_course)
+        file_content = self._initialize_learning(software_name, package_name, demo_file_path)
+        new_course = self._design_next_course(software_name, package_name, demo_file_path, file_content)
+        self.course_log.record_course(new_course)
         self.learn_course(new_course) 
-        save_json(prior_course_path, new_course)  
 
     def continuous_learning(self, software_name, package_name, demo_file_path=None):
         """
@@ -103,19 +107,28 @@ class SelfLearning:
         Returns:
             None: This method does not return anything but updates internal states and possibly external resources.
         """
-        prior_course_path, file_content = self._initialize_learning(software_name, package_name, demo_file_path)
-
-        # Continuously design and apply new courses        
-        while True:
-            if len(self.course) > 50:
-                prior_course = json.dumps(dict(list(self.course.items())[-50:]), indent=4)
-            else:
-                prior_course = json.dumps(self.course, indent=4)
-            logging.info(f"The latest lessons that have been completed so far are as follows:\n {prior_course}")
-            new_course = self.learner.design_course(software_name, package_name, demo_file_path, file_content, prior_course)
-            self.course.update(new_course)
-            self.learn_course(new_course)   
-            save_json(prior_course_path, new_course)      
+        file_content = self._initialize_learning(software_name, package_name, demo_file_path)
+        # Finish the lessons an interrupted session designed but did not learn
+        if self.course_log.pending:
+            self.learn_course(dict(self.course_log.pending))
+
+        # Continuously design and apply new courses. The next course only depends on the courses
+        # designed so far, so it is designed while the lessons of the current course run.
+        with ThreadPoolExecutor(max_workers=1) as designer:
+            next_course = designer.submit(self._design_next_course, software_name, package_name, demo_file_path, file_content)
+            while True:
+                new_course = next_course.result()
+                self.course_log.record_course(new_course)
+                next_course = designer.submit(self._design_next_course, software_name, package_name, demo_file_path, file_content)
+                self.learn_course(new_course)   
+
+    def _design_next_course(self, software_name, package_name, demo_file_path, file_content):
+        """
+        Designs a course that follows the latest 50 lessons designed so far.
+        """
+        prior_course = json.dumps(self.course_log.prior_course(), indent=4)
+        logging.info(f"The latest lessons that have been completed so far are as follows:\n {prior_course}")
+        return self.learner.design_course(software_name, package_name, demo_file_path, file_content, prior_course)
 
     def text_extract(self, demo_file_path):
         """
@@ -150,19 +163,85 @@ class SelfLearning:
         """
         Triggers the learning of the designed course using the configured agent.
 
+        With `--lesson_workers` > 1 and an agent factory, the lessons run concurrently, each on
+        an agent of the pool with its own working directory and its own copy of the demo file.
+
         Args:
             course (dict): The course dictionary containing lesson details to be learned.
         Returns:
             None.
         """
-        logging.info(f'There are {len(self.course)} lessons in the course.')
-        for name, lesson in course.items():
-            logging.info(f"The current lesson is: {name}")
-            logging.info(f"The current lesson content is: {lesson}")
-            self.agent.run(lesson)
-
-
-
-
+        logging.info(f'There are {len(course)} lessons in the course.')
+        if self.lesson_workers == 1 or len(course) <= 1:
+            for name, lesson in course.items():
+                self._learn_lesson(self.agent, name, lesson)
+            return
+        agents = self._get_agent_pool()
+        primary_working_dir = self.agent.executor.environment.working_dir
+        self._set_working_dir(self.agent, self._worker_dir(0))
+        try:
+            with ThreadPoolExecutor(max_workers=self.lesson_workers) as executor:
+                def run(item):
+                    agent = agents.get()
+                    try:
+                        self._learn_lesson(agent, *item, copy_demo_file=True)
+                    finally:
+                        agents.put(agent)
+                for future in [executor.submit(run, item) for item in course.items()]:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logging.error(f"Lesson failed: {e}")
+        finally:
+            self._set_working_dir(self.agent, primary_working_dir)
+
+    def _learn_lesson(self, agent, name, lesson, copy_demo_file=False):
+        """
+        Runs one lesson on an agent. With `copy_demo_file`, the agent is pointed at its own copy of
+        the demo file, so concurrent lessons neither edit the original nor copy it half-written.
+        """
+        logging.info(f"The current lesson is: {name}")
+        logging.info(f"The current lesson content is: {lesson}")
+        if copy_demo_file and self.demo_file_path and self.demo_file_path in lesson:
+            working_dir = agent.executor.environment.working_dir
+            demo_copy = os.path.join(working_dir, os.path.basename(self.demo_file_path))
+            shutil.copy(self.demo_file_path, demo_copy)
+            lesson = lesson.replace(self.demo_file_path, demo_copy)
+        agent.run(lesson)
+        if self.course_log is not None:
+            self.course_log.mark_completed(name)
+
+    def _get_agent_pool(self):
+        """
+        Returns the queue of lesson agents, creating the additional agents on first use.
 
+        Every additional agent works in its own `lesson_worker_<index>` directory next to the
+        working directory, not inside it, so that the agents do not see or roll back each
+        other's files. The primary agent uses `lesson_worker_0` while the lessons run.
+        """
+        if self._agent_pool is None:
+            self._base_working_dir = self.agent.executor.environment.working_dir
+            self._agent_pool = queue.Queue()
+            self._agent_pool.put(self.agent)
+            for index in range(1, self.lesson_workers):
+                agent = self.agent_factory()
+                self._set_working_dir(agent, self._worker_dir(index))
+                self._agent_pool.put(agent)
+        return self._agent_pool
+
+    def _worker_dir(self, index):
+        """
+        Returns the working directory of the lesson agent with the given index, creating it.
+        """
+        base = os.path.normpath(self._base_working_dir)
+        working_dir = os.path.join(os.path.dirname(base), f'{os.path.basename(base)}_lesson_worker_{index}')
+        os.makedirs(working_dir, exist_ok=True)
+        return working_dir
 
+    @staticmethod
+    def _set_working_dir(agent, working_dir):
+        """
+        Points the environments of all the modules of an agent at a working directory.
+        """
+        for module in (agent.planner, agent.retriever, agent.executor):
+            module.environment.working_dir = working_dir
@@ -2,6 +2,7 @@ import os
 from oscopilot.utils.config import Config
 from typing import Optional, Union, List
 from oscopilot.utils.schema import EnvState
+from oscopilot.environments.dir_snapshot import get_dir_snapshot
 
 
 class BaseEnv:
@@ -58,38 +59,17 @@ class BaseEnv:
         Lists the contents of the working directory in a detailed format.
 
         Returns a string representation similar to the output of the 'ls' command in Linux,
-        including file/directory names, sizes, and types.
+        including file/directory names, sizes, and types. The listing comes from the directory
+        snapshot shared by all environments, so repeated calls only pick up what changed.
+        Large directories are summarized according to the `dir_listing_limit` setting.
 
         Returns:
             str: Detailed listings of the working directory's contents, or an error message if the directory does not exist.
         """
-        directory = self.working_dir
-        # Check if the directory exists
-        if not os.path.exists(directory):
-            return f"Directory '{directory}' does not exist."
-
-        # List files and directories
-        files_and_dirs = os.listdir(directory)
-
-        # Create a list to store the details
-        details = []
-
-        for name in files_and_dirs:
-            # Get the full path
-            full_path = os.path.join(directory, name)
-
-            # Get file or directory size
-            size = os.path.getsize(full_path)
-
-            # Check if it's a file or directory
-            if os.path.isdir(full_path):
-                doc_type = 'Directory'
-            else:
-                doc_type = 'File'
-
-            details.append(f"{name}\t {size} bytes\t {doc_type}")
-
-        return "\n".join(details)
+        mode = Config.get_parameter('dir_listing_mode') or 'summary'
+        limit = Config.get_parameter('dir_listing_limit') or 200
+        # Planning needs the whole picture, so a diff is only used for per-step listings.
+        return get_dir_snapshot(self.working_dir).listing('full' if mode == 'full' else 'summary', limit)
         
     def step(self, _command) -> EnvState:
         """
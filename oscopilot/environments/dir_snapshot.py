@@ -0,0 +1,223 @@
+import os
+import stat
+import threading
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+
+LISTING_MODES = ('full', 'summary', 'diff')
+
+
+class DirectorySnapshot:
+    """
+    A cached, incrementally refreshed listing of the top level of a directory.
+
+    The listing is built with `os.scandir` and kept between calls. On Linux with `inotify_simple`
+    installed, change events tell the snapshot exactly which entries to re-stat; otherwise the
+    directory's mtime is compared to decide whether a rescan is needed, and only the files are
+    re-stat'ed to pick up content changes. When the watched directory itself is deleted or
+    replaced, the watch is added again and the directory rescanned.
+
+    The snapshot can be rendered as a full listing, a bounded summary, or a diff since the
+    previous call of the same consumer, which keeps prompts short on large working directories.
+
+    Attributes:
+        path (str): The directory being listed.
+    """
+    def __init__(self, path, use_watcher=True):
+        self.path = path
+        self._entries = {}
+        self._dir_mtime = None
+        self._scanned = False
+        self._baselines = {}
+        self._lock = threading.Lock()
+        self._inotify = None
+        if use_watcher and INotify is not None:
+            try:
+                self._inotify = INotify()
+            except OSError:
+                self._inotify = None
+            else:
+                self._watch()
+
+    def _watch(self):
+        """
+        Watches the directory for changes, falling back to mtime checks if it cannot be watched.
+        """
+        try:
+            self._inotify.add_watch(self.path, flags.CREATE | flags.DELETE | flags.MODIFY | flags.CLOSE_WRITE |
+                                    flags.MOVED_FROM | flags.MOVED_TO | flags.ATTRIB |
+                                    flags.DELETE_SELF | flags.MOVE_SELF)
+        except OSError:
+            self._inotify.close()
+            self._inotify = None
+
+    def _stat_entry(self, name):
+        """
+        Returns the (is_dir, size, mtime_ns) tuple of an entry, or None if it no longer exists.
+        """
+        try:
+            st = os.stat(os.path.join(self.path, name))
+        except OSError:
+            return None
+        return stat.S_ISDIR(st.st_mode), st.st_size, st.st_mtime_ns
+
+    def _scan(self):
+        """
+        Rebuilds all entries with a single `os.scandir` pass.
+        """
+        entries = {}
+        with os.scandir(self.path) as it:
+            for entry in it:
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                entries[entry.name] = (stat.S_ISDIR(st.st_mode), st.st_size, st.st_mtime_ns)
+        self._entries = entries
+        self._dir_mtime = os.stat(self.path).st_mtime_ns
+        self._scanned = True
+
+    def _update(self, names):
+        """
+        Re-stats the given entries, dropping the ones that were removed.
+        """
+        for name in names:
+            info = self._stat_entry(name)
+            if info is None:
+                self._entries.pop(name, None)
+            else:
+                self._entries[name] = info
+
+    def refresh(self):
+        """
+        Brings the snapshot up to date with the directory.
+
+        Returns:
+            dict: A copy of the entries, mapping each name to an (is_dir, size, mtime_ns) tuple.
+        """
+        with self._lock:
+            if not os.path.isdir(self.path):
+                self._entries = {}
+                self._scanned = False
+                return {}
+            if self._inotify is not None:
+                events = self._inotify.read(timeout=0)
+                if any(event.mask & (flags.IGNORED | flags.DELETE_SELF | flags.MOVE_SELF) for event in events):
+                    # The directory was deleted or replaced, which removes its watch.
+                    self._watch()
+                    self._scanned = False
+                elif any(event.mask & flags.Q_OVERFLOW for event in events):
+                    self._scanned = False
+                elif self._scanned:
+                    self._update({event.name for event in events if event.name})
+            if not self._scanned:
+                self._scan()
+            elif self._inotify is None:
+                if os.stat(self.path).st_mtime_ns != self._dir_mtime:
+                    self._scan()
+                else:
+                    # No entry was added or removed, only file contents may have changed.
+                    self._update([name for name, info in self._entries.items() if not info[0]])
+            return dict(self._entries)
+
+    def listing(self, mode='summary', limit=200, consumer=None):
+        """
+        Renders the current contents of the directory.
+
+        Args:
+            mode (str, optional): 'full' lists every entry, 'summary' lists at most `limit`
+                entries (most recently modified first) after a short overview, and 'diff' lists
+                the entries added, removed or modified since the previous call of `consumer`.
+                A diff without a previous call falls back to a summary.
+            limit (int, optional): The maximum number of entries rendered in 'summary' and 'diff' mode.
+            consumer (hashable, optional): Identifies the caller whose previous listing a diff is based on.
+
+        Returns:
+            str: The rendered listing.
+        """
+        if not os.path.exists(self.path):
+            return f"Directory '{self.path}' does not exist."
+        entries = self.refresh()
+        if mode == 'diff':
+            with self._lock:
+                baseline = self._baselines.get(consumer)
+                self._baselines[consumer] = entries
+            if baseline is not None:
+                return format_diff(baseline, entries, limit)
+            mode = 'summary'
+        if mode == 'summary' and len(entries) > limit:
+            return format_summary(entries, limit)
+        return format_full(entries)
+
+
+def format_entry(name, info):
+    """
+    Formats one entry like `BaseEnv.list_working_dir` always did: name, size and type.
+    """
+    is_dir, size, _ = info
+    return f"{name}\t {size} bytes\t {'Directory' if is_dir else 'File'}"
+
+
+def format_full(entries):
+    """
+    Formats every entry, sorted by name.
+    """
+    return "\n".join(format_entry(name, entries[name]) for name in sorted(entries))
+
+
+def format_summary(entries, limit):
+    """
+    Formats an overview line followed by the `limit` most recently modified entries.
+    """
+    n_dirs = sum(1 for info in entries.values() if info[0])
+    n_files = len(entries) - n_dirs
+    total_size = sum(info[1] for info in entries.values() if not info[0])
+    recent = sorted(entries, key=lambda name: entries[name][2], reverse=True)[:limit]
+    lines = [f"{n_files} files and {n_dirs} directories, {total_size} bytes in files. "
+             f"The {len(recent)} most recently modified entries are:"]
+    lines.extend(format_entry(name, entries[name]) for name in recent)
+    lines.append(f"... {len(entries) - len(recent)} more entries not shown")
+    return "\n".join(lines)
+
+
+def format_diff(old, new, limit):
+    """
+    Formats the entries added, removed or modified between two snapshots, at most `limit` lines.
+    """
+    lines = []
+    for name in sorted(new.keys() - old.keys()):
+        lines.append("Added: " + format_entry(name, new[name]))
+    for name in sorted(old.keys() - new.keys()):
+        lines.append("Removed: " + name)
+    for name in sorted(new.keys() & old.keys()):
+        if new[name] != old[name] and not new[name][0]:
+            lines.append("Modified: " + format_entry(name, new[name]))
+    if not lines:
+        return "No changes in the working directory since the previous step."
+    if len(lines) > limit:
+        lines = lines[:limit] + [f"... {len(lines) - limit} more changes not shown"]
+    return "\n".join(lines)
+
+
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+def get_dir_snapshot(path):
+    """
+    Returns the snapshot shared by all environments of a directory, creating it on first use.
+
+    Args:
+        path (str): The directory path.
+
+    Returns:
+        DirectorySnapshot: The shared snapshot.
+    """
+    path = os.path.abspath(path)
+    with _snapshots_lock:
+        if path not in _snapshots:
+            _snapshots[path] = DirectorySnapshot(path)
+        return _snapshots[path]
@@ -1,11 +1,17 @@
 # This code is based on Open Interpreter. Original source: https://github.com/OpenInterpreter/open-interpreter
 
+import os
 from oscopilot.environments import BaseEnv
 from oscopilot.environments import AppleScript
 from oscopilot.environments import PythonJupyterEnv
 from oscopilot.environments import Shell
 from oscopilot.utils.schema import EnvState
-import subprocess
+from oscopilot.utils.config import Config
+from oscopilot.environments.dir_snapshot import get_dir_snapshot
+from oscopilot.environments.kernel_pool import get_kernel_pool
+from oscopilot.environments.output_capture import OutputCapture
+from oscopilot.environments.workdir_checkpoint import WorkdirCheckpoint
+from oscopilot.utils.tracing import tracer
 
 # Should this be renamed to OS or System?
 
@@ -32,6 +38,7 @@ class Env(BaseEnv):
             AppleScript,
         ]
         self._active_languages = {}
+        self._checkpoint = None
 
     def get_language(self, language):
         """
@@ -66,17 +73,43 @@ class Env(BaseEnv):
         """        
         # 不用流式的话很简单，就是调一下lang的step就行了
         state = EnvState(command=code)
-        lang = self.get_language(language)()  # 输入planner的节点类型即可
-        for output_line_dic in lang.step(code):
-            if output_line_dic['format'] == 'active_line' or output_line_dic['content'] in ['', '\n']:
-                continue
-            content = output_line_dic['content']
-            if 'Traceback' in content:
-                state.error = (state.error or '') + content
-            else:
-                state.result += content
-        if lang.name == 'Python':
-            lang.terminate()
+        limit = Config.get_parameter('output_limit')
+        spill_dir = Config.get_parameter('output_log_dir')
+        captures = {name: OutputCapture(20000 if limit is None else limit, spill_dir)
+                    for name in ('stdout', 'stderr', 'error')}
+        with tracer.span("env.step", language=language) as span:
+            lang = self._get_kernel(language)
+            for output_line_dic in lang.step(code):
+                if output_line_dic['type'] == 'result':
+                    # Tagged with the kernel holding the value, see `live_kernel_id`.
+                    state.return_value = dict(output_line_dic['content'], kernel=getattr(lang, 'kernel_id', None))
+                    continue
+                if output_line_dic['format'] == 'active_line' or output_line_dic['content'] in ['', '\n']:
+                    continue
+                content = output_line_dic['content']
+                stream = output_line_dic.get('stream')
+                if output_line_dic.get('violation'):
+                    state.violation = output_line_dic['violation']
+                if stream is None:
+                    # Outputs of environments that do not tell the streams apart.
+                    stream = 'error' if 'Traceback' in content else 'stdout'
+                captures.get(stream, captures['stdout']).append(content)
+            if lang.name == 'Python' and not self.keeps_kernel_warm():
+                lang.terminate()
+            for capture in captures.values():
+                capture.close()
+            state.result = captures['stdout'].getvalue()
+            state.stderr = captures['stderr'].getvalue()
+            if captures['error'].total:
+                state.error = captures['error'].getvalue()
+            elif 'Traceback' in state.stderr:
+                # A traceback printed by the code itself, or by a script run from the shell.
+                state.error = state.stderr
+            state.output_paths = [c.spill_path for c in captures.values() if c.spill_path]
+            span.set_attribute("has_error", state.error is not None)
+            if state.violation:
+                span.set_attribute("violation", state.violation)
+            span.set_attribute("output_chars", captures['stdout'].total)
         # for output_line_dic in lang.step(code):
         #     if output_line_dic['format'] == 'active_line':
         #         continue
@@ -86,8 +119,14 @@ class Env(BaseEnv):
         #             state.error = (state.error or '') + content
         #         else:
         #             state.result += content
+        if self._checkpoint is not None:
+            state.changes = self._checkpoint.format_diff(Config.get_parameter('dir_listing_limit') or 200)
         state.pwd = self.working_dir
-        state.ls = subprocess.run(['ls'], cwd=self.working_dir, capture_output=True, text=True).stdout
+        state.ls = get_dir_snapshot(self.working_dir).listing(
+            Config.get_parameter('dir_listing_mode') or 'summary',
+            Config.get_parameter('dir_listing_limit') or 200,
+            consumer=id(self)
+        )
         return state
         
         # if (
@@ -124,6 +163,107 @@ class Env(BaseEnv):
             # If stream == True, replace this with _streaming_run.
             return self._streaming_run(language, code, display=display)
 
+    def checkpoint(self):
+        """
+        Snapshots the working directory with `--workdir_checkpoints`, so that `rollback` can undo
+        what the following steps change. The steps then report their changes since the snapshot
+        in `EnvState.changes`.
+
+        Returns:
+            bool: Whether a snapshot was taken.
+        """
+        if not Config.get_parameter('workdir_checkpoints'):
+            return False
+        if self._checkpoint is None or self._checkpoint.path != os.path.abspath(self.working_dir):
+            if self._checkpoint is not None:
+                self._checkpoint.close()
+            max_mb = Config.get_parameter('checkpoint_max_mb')
+            self._checkpoint = WorkdirCheckpoint(self.working_dir, Config.get_parameter('checkpoint_dir'),
+                                                 (100 if max_mb is None else max_mb) * 1024 * 1024)
+        with tracer.span("workdir.checkpoint"):
+            self._checkpoint.take()
+        return True
+
+    def rollback(self):
+        """
+        Puts the working directory back as it was at the last `checkpoint`, if any.
+        """
+        if self._checkpoint is None:
+            return
+        with tracer.span("workdir.rollback"):
+            unrestored = self._checkpoint.rollback()
+        if unrestored:
+            print(f"Files too large to snapshot were not restored: {unrestored}")
+
+    @staticmethod
+    def keeps_kernel_warm():
+        """
+        Returns whether the Python kernel is kept between steps, which `--object_handoff` needs too.
+        """
+        return bool(Config.get_parameter('warm_kernel') or Config.get_parameter('object_handoff'))
+
+    def live_kernel_id(self):
+        """
+        Returns the id of the warm Python kernel if it is still running. Values bound in an
+        earlier kernel, which has since timed out, exited or been replaced, are gone.
+
+        Returns:
+            int: The `kernel_id` of the running warm kernel, or None.
+        """
+        lang = self._active_languages.get(PythonJupyterEnv.name)
+        if lang is not None and lang.km.is_alive():
+            return lang.kernel_id
+        return None
+
+    def clear_results(self):
+        """
+        Drops the return values kept by the warm Python kernel and the variables bound to them,
+        so the values of one task do not stay in memory for the rest of the run.
+        """
+        lang = self._active_languages.get(PythonJupyterEnv.name)
+        if lang is not None and lang.runtime_installed and lang.km.is_alive():
+            lang._run_quietly('_oscopilot_clear()')
+
+    def _get_kernel(self, language):
+        """
+        Returns the environment that runs a step of the given language.
+
+        With `--warm_kernel`, the Python kernel is started once and kept in `_active_languages`
+        across steps (and restarted if it died), so modules imported by earlier steps, such as
+        reused tools, stay loaded. Otherwise every step gets a fresh environment. With
+        `--kernel_pool_size`, new Python kernels are taken from the kernel pool, which has
+        already started them and imported the tool library. Kernels and shells run in the
+        working directory of this environment, so relative paths resolve there.
+
+        Args:
+            language (str): The name or alias of the language.
+
+        Returns:
+            BaseEnv: The language environment.
+        """
+        lang_class = self.get_language(language)  # 输入planner的节点类型即可
+        warm = lang_class is PythonJupyterEnv and self.keeps_kernel_warm()
+        if warm:
+            lang = self._active_languages.get(lang_class.name)
+            if lang is not None and lang.km.is_alive():
+                if lang.cwd != self.working_dir:
+                    lang.chdir(self.working_dir)
+                return lang
+        pool = get_kernel_pool() if lang_class is PythonJupyterEnv else None
+        if pool is not None:
+            lang = pool.acquire()
+            lang.chdir(self.working_dir)
+        else:
+            with tracer.span("kernel.start", language=language):
+                if lang_class is PythonJupyterEnv:
+                    lang = lang_class(cwd=self.working_dir)
+                else:
+                    lang = lang_class()
+                    lang.cwd = self.working_dir
+        if warm:
+            self._active_languages[lang_class.name] = lang
+        return lang
+
     def _streaming_run(self, language, code, display=False):
         """
         Executes code in the specified language and streams the output.
@@ -0,0 +1,150 @@
+import os
+import atexit
+import queue
+import threading
+import logging
+from oscopilot.utils.config import Config
+from oscopilot.utils.tracing import tracer
+
+
+def tool_import_code(generated_tool_repo_dir):
+    """
+    Returns the code that makes the tool library importable in a kernel as the `tool_code` package.
+
+    Args:
+        generated_tool_repo_dir (str): The generated tool repository.
+
+    Returns:
+        str: The import code.
+    """
+    repo_dir = os.path.abspath(generated_tool_repo_dir)
+    return (
+        "import sys\n"
+        f"if {repo_dir!r} not in sys.path:\n"
+        f"    sys.path.insert(0, {repo_dir!r})\n"
+        "import tool_code"
+    )
+
+
+def _drain(kernel, code):
+    """
+    Runs code in a kernel and waits until it finished.
+    """
+    for _ in kernel.step(code):
+        pass
+
+
+class KernelPool:
+    """
+    Keeps Python kernels started ahead of time, with the tool library already imported.
+
+    Starting an IPython kernel takes around a second, and importing the stored tools on top of
+    that grows with the library. The pool starts `size` kernels in a background thread and runs
+    `preload_code` in each, so a step takes a ready kernel instead of waiting for one; every
+    kernel taken is replaced in the background.
+
+    Attributes:
+        size (int): The number of idle kernels kept ready.
+        preload_code (str): The code run in every new kernel before it is handed out.
+    """
+    def __init__(self, size, preload_code=None):
+        self.size = size
+        self.preload_code = preload_code
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._starting = 0
+        self._closed = False
+        self._fill()
+
+    def _start_kernel(self):
+        """
+        Starts one kernel and runs the preload code in it.
+        """
+        from oscopilot.environments.py_jupyter_env import PythonJupyterEnv
+        with tracer.span("kernel.start", language="Python", pooled=True):
+            kernel = PythonJupyterEnv()
+            if self.preload_code:
+                _drain(kernel, self.preload_code)
+        return kernel
+
+    def _fill(self):
+        """
+        Starts kernels in the background until `size` are idle or starting.
+        """
+        with self._lock:
+            missing = self.size - self._idle.qsize() - self._starting
+            self._starting += max(0, missing)
+        for _ in range(max(0, missing)):
+            threading.Thread(target=self._start_in_background, daemon=True).start()
+
+    def _start_in_background(self):
+        try:
+            kernel = self._start_kernel()
+        except Exception as e:
+            logging.error(f"Failed to start a pooled kernel: {e}")
+            kernel = None
+        with self._lock:
+            self._starting -= 1
+        if kernel is None:
+            return
+        if self._closed:
+            kernel.terminate()
+        else:
+            self._idle.put(kernel)
+
+    def acquire(self):
+        """
+        Takes a ready kernel, or starts one if none is idle.
+
+        Returns:
+            PythonJupyterEnv: A kernel with the preload code already run.
+        """
+        try:
+            kernel = self._idle.get_nowait()
+            if not kernel.km.is_alive():
+                kernel = self._start_kernel()
+        except queue.Empty:
+            kernel = self._start_kernel()
+        self._fill()
+        return kernel
+
+    def shutdown(self):
+        """
+        Terminates the idle kernels; kernels still starting are terminated when ready.
+        """
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().terminate()
+            except queue.Empty:
+                break
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_kernel_pool():
+    """
+    Returns the process-wide kernel pool, or None if `--kernel_pool_size` is 0.
+
+    The kernels of the pool preload the `tool_code` package of `--generated_tool_repo_path`.
+    The idle kernels are shut down when the process exits.
+
+    Returns:
+        KernelPool: The shared pool.
+    """
+    global _pool
+    size = Config.get_parameter('kernel_pool_size') or 0
+    if size <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            preload_code = None
+            repo_dir = Config.get_parameter('generated_tool_repo_path')
+            if repo_dir and os.path.exists(os.path.join(repo_dir, 'tool_code', '__init__.py')):
+                preload_code = tool_import_code(repo_dir) + "\ntool_code.preload()"
+            _pool = KernelPool(size, preload_code)
+            # Idle kernels would otherwise outlive the agent.
+            atexit.register(_pool.shutdown)
+        return _pool
@@ -0,0 +1,168 @@
+"""
+Code run inside the IPython kernel of PythonJupyterEnv, kept here as source strings.
+"""
+
+# The modes of active line reporting, selected by `--active_line_mode`:
+# - 'off': the code runs unchanged and no active lines are reported.
+# - 'top': a marker print is inserted before every top-level statement only, so loop bodies
+#   run at full speed and the number of markers is bounded by the length of the code.
+# - 'trace': the code runs unchanged, and a line hook installed once per kernel reports the
+#   line being executed, at most once per `ACTIVE_LINE_INTERVAL` seconds.
+# - 'statement': a marker print is inserted before every statement, including inside loops.
+ACTIVE_LINE_MODES = ['off', 'top', 'trace', 'statement']
+
+ACTIVE_LINE_INTERVAL = 0.1
+
+# Installs the line hook of the 'trace' mode. It uses sys.monitoring where available (Python 3.12+)
+# and sys.settrace otherwise; either way only frames running in the user namespace, i.e. the
+# submitted code and the functions it defines, are reported.
+ACTIVE_LINE_HOOK_CODE = '''
+def _oscopilot_install_active_line_hook(interval):
+    import sys
+    import time
+    from IPython import get_ipython
+    user_ns = get_ipython().user_ns
+    state = {{"line": None, "time": 0.0}}
+
+    def report(line):
+        if line == state["line"]:
+            return
+        now = time.monotonic()
+        if now - state["time"] >= interval:
+            state["line"] = line
+            state["time"] = now
+            print("##active_line%d##" % line)
+
+    monitoring = getattr(sys, "monitoring", None)
+    if monitoring is not None:
+        tool_id = next((i for i in range(6) if monitoring.get_tool(i) is None), None)
+        if tool_id is not None:
+            def on_line(code, line):
+                if sys._getframe(1).f_globals is not user_ns:
+                    # Library code never runs in the user namespace, stop reporting this line.
+                    return monitoring.DISABLE
+                report(line)
+
+            monitoring.use_tool_id(tool_id, "oscopilot_active_line")
+            monitoring.register_callback(tool_id, monitoring.events.LINE, on_line)
+            monitoring.set_events(tool_id, monitoring.events.LINE)
+            return
+
+    def local_trace(frame, event, arg):
+        if event == "line":
+            report(frame.f_lineno)
+        return local_trace
+
+    def global_trace(frame, event, arg):
+        if frame.f_globals is user_ns:
+            return local_trace
+        return None
+
+    sys.settrace(global_trace)
+
+
+_oscopilot_install_active_line_hook({interval})
+del _oscopilot_install_active_line_hook
+'''
+
+
+def active_line_hook_code(interval=ACTIVE_LINE_INTERVAL):
+    """
+    Returns the code installing the active line hook of the 'trace' mode in a kernel.
+
+    Args:
+        interval (float, optional): The minimum seconds between two reported lines.
+
+    Returns:
+        str: The hook code.
+    """
+    return ACTIVE_LINE_HOOK_CODE.format(interval=interval)
+
+
+# The return value of a tool is published as display data of this type instead of being printed,
+# so it does not mix with the output of the tool.
+RESULT_MIME_TYPE = 'application/vnd.oscopilot.result+json'
+
+# Defines `_oscopilot_return(value, handle, limit, bind)` in the kernel. It keeps the value itself
+# in `_oscopilot_results[handle]`, so later code in the same kernel can use the live object, and
+# publishes a compact description of it: its type, a one-line summary (type plus shape, length or
+# keys), its text (as `print` would show it, bounded by `limit` characters) and, for JSON values,
+# the value itself. With `bind`, the value is also assigned to the variable `<handle>_result`.
+# `_oscopilot_clear()` drops the kept values and the variables bound to them.
+RESULT_HELPER_CODE = '''
+def _oscopilot_define_return(mime_type):
+    import re
+    import json
+    import reprlib
+    from IPython.display import publish_display_data
+
+    results = globals().setdefault("_oscopilot_results", {{}})
+    bound = set()
+    short_repr = reprlib.Repr()
+    short_repr.maxlist = short_repr.maxtuple = short_repr.maxset = short_repr.maxdict = 100
+    short_repr.maxstring = short_repr.maxother = 1000
+
+    def to_text(value, limit):
+        if isinstance(value, (list, tuple, set, frozenset, dict)) and len(value) > 100:
+            text = short_repr.repr(value)
+        else:
+            text = str(value)
+        if limit and len(text) > limit:
+            half = limit // 2
+            text = text[:half] + "\\n... [%d characters omitted] ...\\n" % (len(text) - 2 * half) + text[-half:]
+        return text
+
+    def summarize(value):
+        shape = getattr(value, "shape", None)
+        if isinstance(shape, tuple):
+            summary = "%s of shape %s" % (type(value).__name__, shape)
+            columns = getattr(value, "columns", None)
+            if columns is not None:
+                summary += " with columns " + short_repr.repr(list(columns))
+            return summary
+        if isinstance(value, dict):
+            return "dict of %d items with keys %s" % (len(value), short_repr.repr(list(value)))
+        if isinstance(value, (list, tuple, set, frozenset, str, bytes)):
+            return "%s of length %d" % (type(value).__name__, len(value))
+        return type(value).__name__
+
+    def _oscopilot_return(value, handle="result", limit=20000, bind=False):
+        results[handle] = value
+        payload = {{"handle": handle, "type": type(value).__name__, "summary": summarize(value),
+                    "text": to_text(value, limit)}}
+        if bind:
+            variable = re.sub(r"\\W", "_", handle) + "_result"
+            globals()[variable] = value
+            bound.add(variable)
+            payload["variable"] = variable
+        if value is None or isinstance(value, (bool, int, float, str, list, dict)):
+            try:
+                encoded = json.dumps(value)
+                if not limit or len(encoded) <= limit:
+                    payload["json"] = value
+            except (TypeError, ValueError):
+                pass
+        publish_display_data({{mime_type: payload}})
+
+    def _oscopilot_clear():
+        results.clear()
+        for variable in bound:
+            globals().pop(variable, None)
+        bound.clear()
+
+    return _oscopilot_return, _oscopilot_clear
+
+
+_oscopilot_return, _oscopilot_clear = _oscopilot_define_return({mime_type!r})
+del _oscopilot_define_return
+'''
+
+
+def result_helper_code():
+    """
+    Returns the code defining the `_oscopilot_return` and `_oscopilot_clear` helpers in a kernel.
+
+    Returns:
+        str: The helper code.
+    """
+    return RESULT_HELPER_CODE.format(mime_type=RESULT_MIME_TYPE)
@@ -0,0 +1,195 @@
+import os
+import sys
+import signal
+import shutil
+import logging
+from oscopilot.utils.config import Config
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+# Sets the memory limit of the process and replaces it with the command that follows.
+# Run with `python -c`, so the kernel starts without importing oscopilot.
+LIMITS_LAUNCHER = '''
+import os
+import sys
+import resource
+memory_mb = int(sys.argv[1])
+memory_limit = resource.RLIMIT_DATA if sys.platform.startswith("linux") else resource.RLIMIT_AS
+resource.setrlimit(memory_limit, (memory_mb * 1024 * 1024,) * 2)
+os.execvp(sys.argv[2], sys.argv[2:])
+'''
+
+
+def _limit(name):
+    return Config.get_parameter(name) or 0
+
+
+def step_timeout():
+    """
+    Returns the wall-clock seconds a step may run, or None for no limit.
+    """
+    return _limit('step_timeout') or None
+
+
+def step_cpu_limit():
+    """
+    Returns the CPU seconds a step may use, or None for no limit.
+    """
+    return _limit('step_cpu_limit') or None
+
+
+def limited_command(cmd):
+    """
+    Wraps the command starting a kernel or shell so it runs under the configured limits.
+
+    `--step_memory_limit` is applied with setrlimit on POSIX systems. With `--step_cgroup`, the
+    process also runs in a transient systemd scope whose cgroup caps memory and, with
+    `--step_cpu_quota`, the CPU share. `--step_cpu_limit` is not set here: a kernel kept warm
+    would add up the CPU time of all its steps, so it is measured per step with `cpu_time`.
+
+    Args:
+        cmd (list): The command.
+
+    Returns:
+        list: The command, wrapped if any limit is set.
+    """
+    memory_mb = _limit('step_memory_limit')
+    if memory_mb:
+        if os.name == 'posix':
+            cmd = [sys.executable, '-c', LIMITS_LAUNCHER, str(memory_mb)] + list(cmd)
+        else:
+            logging.warning("Memory limits of steps are only supported on POSIX systems.")
+    if Config.get_parameter('step_cgroup'):
+        if shutil.which('systemd-run'):
+            scope = ['systemd-run', '--user', '--scope', '--quiet']
+            if memory_mb:
+                scope += ['-p', f'MemoryMax={memory_mb}M']
+            if _limit('step_cpu_quota'):
+                scope += ['-p', f"CPUQuota={_limit('step_cpu_quota')}%"]
+            cmd = scope + list(cmd)
+        else:
+            logging.warning("systemd-run was not found, steps run without cgroup limits.")
+    return cmd
+
+
+def _proc_stat(pid):
+    """
+    Returns the fields of /proc/<pid>/stat after the command name.
+    """
+    with open(f'/proc/{pid}/stat') as f:
+        return f.read().rsplit(')', 1)[1].split()
+
+
+def cpu_time(pid):
+    """
+    Returns the CPU seconds used so far by a process and the processes of its group, i.e. the
+    children it started, with psutil or, without it, from /proc.
+
+    Args:
+        pid (int): The process, which leads its own process group.
+
+    Returns:
+        float: The user and system CPU seconds, or None if they cannot be measured.
+    """
+    if pid is None:
+        return None
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            total = 0.0
+            for p in [process] + process.children(recursive=True):
+                try:
+                    times = p.cpu_times()
+                    total += times.user + times.system
+                except psutil.Error:
+                    pass
+            return total
+        except psutil.Error:
+            return None
+    if not os.path.isdir('/proc'):
+        return None
+    ticks = 0
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            fields = _proc_stat(entry)
+            # pgrp is the 5th field of the stat line, utime and stime the 14th and 15th.
+            if int(fields[2]) == pid:
+                ticks += int(fields[11]) + int(fields[12])
+        except (OSError, ValueError, IndexError):
+            continue
+    return ticks / os.sysconf('SC_CLK_TCK')
+
+
+class CpuMeter:
+    """
+    Measures the CPU time a process group uses during one step, against `--step_cpu_limit`.
+
+    Attributes:
+        limit (int): The CPU seconds the step may use, or None for no limit.
+    """
+    def __init__(self, pid):
+        self.limit = step_cpu_limit()
+        self.pid = pid
+        self.start = cpu_time(pid) if self.limit else None
+        if self.limit and self.start is None:
+            logging.warning("The CPU time of steps cannot be measured here, --step_cpu_limit is not enforced.")
+
+    def exceeded(self):
+        """
+        Returns whether the step has used more CPU time than allowed.
+        """
+        if self.start is None:
+            return False
+        used = cpu_time(self.pid)
+        return used is not None and used - self.start > self.limit
+
+
+def kill_process_group(pid):
+    """
+    Kills a process and the processes of its group, so that children it started, such as a
+    program run from the shell, do not outlive it.
+
+    Args:
+        pid (int): The process, started in a new session so that it leads its own group.
+    """
+    if pid is None:
+        return
+    try:
+        if hasattr(os, 'killpg'):
+            pgid = os.getpgid(pid)
+            # Never signal our own group, should the process not have its own.
+            if pgid != os.getpgid(0):
+                os.killpg(pgid, signal.SIGKILL)
+                return
+        os.kill(pid, signal.SIGKILL if hasattr(signal, 'SIGKILL') else signal.SIGTERM)
+    except OSError:
+        pass
+
+
+def timeout_message(seconds):
+    """
+    Returns the error reported for a step stopped after running too long.
+    """
+    return (f"StepTimeout: the code ran longer than {seconds} seconds and was stopped. "
+            f"Its process was killed and will be restarted for the next step.")
+
+
+def cpu_message(seconds):
+    """
+    Returns the error reported for a step stopped after using too much CPU time.
+    """
+    return (f"StepCpuLimit: the code used more than {seconds} seconds of CPU time and was stopped. "
+            f"Its process was killed and will be restarted for the next step.")
+
+
+def exited_message():
+    """
+    Returns the error reported for a step whose process exited while running it.
+    """
+    return ("ProcessExited: the process running the code exited, e.g. because it exceeded its "
+            "memory limit. It will be restarted for the next step.")
@@ -0,0 +1,120 @@
+import os
+import uuid
+from collections import deque
+
+
+class OutputCapture:
+    """
+    Collects the output of a step, keeping at most `limit` characters in memory.
+
+    Chunks are appended to a list and joined once at the end. While the output fits in `limit`,
+    it is kept whole. Once it grows past that, the first `limit / 2` characters and the last
+    `limit / 2` characters are kept, with a note of how much was left out, and the full stream is
+    written to a log file in `spill_dir` so nothing is lost.
+
+    Attributes:
+        limit (int): The max characters kept in memory, 0 for no limit.
+        spill_dir (str): The directory the full output is written to once it exceeds the limit.
+        spill_path (str): The log file holding the full output, or None if it fit in memory.
+        total (int): The number of characters captured.
+    """
+    def __init__(self, limit=20000, spill_dir=None):
+        self.limit = limit
+        self.spill_dir = spill_dir
+        self.spill_path = None
+        self.total = 0
+        self._head = []
+        self._head_size = 0
+        self._tail = deque()
+        self._tail_size = 0
+        self._spill = None
+        self._overflowed = False
+
+    def append(self, chunk):
+        """
+        Adds a chunk of output.
+
+        Args:
+            chunk (str): The output chunk.
+        """
+        if not chunk:
+            return
+        self.total += len(chunk)
+        if self._spill is not None:
+            self._spill.write(chunk)
+        if not self.limit or self.total <= self.limit:
+            self._head.append(chunk)
+            self._head_size += len(chunk)
+            return
+        half = self.limit // 2
+        if not self._overflowed:
+            # The chunk crossing the limit joins the head before it is split, so its start is kept
+            # even when a single chunk holds the whole output.
+            self._overflowed = True
+            self._start_spill(chunk)
+            self._head.append(chunk)
+            self._split_head()
+        else:
+            if len(chunk) > half:
+                chunk = chunk[-half:] if half else ''
+            self._tail.append(chunk)
+            self._tail_size += len(chunk)
+        while self._tail and self._tail_size - len(self._tail[0]) >= half:
+            self._tail_size -= len(self._tail.popleft())
+
+    def _start_spill(self, chunk):
+        """
+        Opens the log file and writes the output captured so far, followed by `chunk`.
+        """
+        if not self.spill_dir:
+            return
+        os.makedirs(self.spill_dir, exist_ok=True)
+        self.spill_path = os.path.join(self.spill_dir, f"{uuid.uuid4().hex}.log")
+        self._spill = open(self.spill_path, 'w', encoding='utf-8')
+        self._spill.writelines(self._head)
+        self._spill.write(chunk)
+
+    def _split_head(self):
+        """
+        Keeps the first half of the limit as the head once the output overflowed, and moves
+        the rest of it to the tail.
+        """
+        text = ''.join(self._head)
+        half = self.limit // 2
+        self._head = [text[:half]]
+        self._head_size = len(self._head[0])
+        rest = text[half:]
+        self._tail.append(rest[-half:] if half else '')
+        self._tail_size = len(self._tail[0])
+
+    def close(self):
+        """
+        Closes the log file, if any.
+        """
+        if self._spill is not None:
+            self._spill.close()
+
+    @property
+    def truncated(self):
+        """
+        bool: Whether part of the output was left out of `getvalue()`.
+        """
+        return self.total > self._head_size + self._tail_size
+
+    def getvalue(self):
+        """
+        Returns the captured output, with the middle replaced by a note if it was truncated.
+
+        Returns:
+            str: The output.
+        """
+        head = ''.join(self._head)
+        if not self.truncated:
+            return head + ''.join(self._tail)
+        tail = ''.join(self._tail)[-(self.limit // 2):] if self.limit > 1 else ''
+        skipped = self.total - len(head) - len(tail)
+        note = f"\n... [{skipped} characters omitted"
+        if self.spill_path:
+            note += f", full output in {self.spill_path}"
+        note += "] ...\n"
+        return head + note + tail
@@ -2,6 +2,7 @@
 
 import ast
 import os
+import itertools
 import sys
 import queue
 import re
@@ -12,8 +13,15 @@ import logging
 
 from jupyter_client import KernelManager
 from oscopilot.environments.base_env import BaseEnv
+from oscopilot.environments.kernel_runtime import active_line_hook_code, result_helper_code, RESULT_MIME_TYPE
+from oscopilot.utils.config import Config
+from oscopilot.environments.limits import (limited_command, step_timeout, timeout_message, exited_message,
+                                           cpu_message, CpuMeter, kill_process_group)
 
 
+# Numbers the kernels of the process, so a value bound in one kernel is not looked up in another.
+_kernel_ids = itertools.count(1)
+
 # turn off colors in "terminal"
 # os.environ["ANSI_COLORS_DISABLED"] = "1"
 
@@ -31,11 +39,14 @@ class PythonJupyterEnv(BaseEnv):
     name = "Python"
     aliases = ["py", "API"]
 
-    def __init__(self):
+    def __init__(self, cwd=None):
         """
         Initializes the Python Jupyter environment.
 
         This method sets up the IPython kernel manager and client, starts the kernel, and configures logging.
+
+        Args:
+            cwd (str, optional): The directory the kernel starts in. Defaults to the current directory.
         """        
         super().__init__()
         ipkernel_logger = logging.getLogger('IPKernelApp')
@@ -52,8 +63,10 @@ class PythonJupyterEnv(BaseEnv):
         python_executable = sys.executable
         
         # Ensure only one KernelManager instance is configured and started
-        self.km = KernelManager(kernel_name='python3', kernel_cmd=[python_executable, '-m', 'ipykernel_launcher', '-f', '{connection_file}'])
-        self.km.start_kernel(env=os.environ.copy())
+        kernel_cmd = limited_command([python_executable, '-m', 'ipykernel_launcher', '-f', '{connection_file}'])
+        self.km = KernelManager(kernel_name='python3', kernel_cmd=kernel_cmd)
+        self.km.start_kernel(env=os.environ.copy(), cwd=cwd or os.getcwd())
+        self.cwd = cwd
         # self.km.start_kernel()
         self.kc = self.km.client()
         self.kc.start_channels()
@@ -89,6 +102,8 @@ class PythonJupyterEnv(BaseEnv):
         '''
         self.listener_thread = None
         self.finish_flag = False
+        self.runtime_installed = False
+        self.kernel_id = next(_kernel_ids)
 
         # DISABLED because sometimes this bypasses sending it up to us for some reason!
         # Give it our same matplotlib backend
@@ -118,7 +133,8 @@ class PythonJupyterEnv(BaseEnv):
         Terminates the IPython kernel and stops its channels.
         """
         self.kc.stop_channels()
-        self.km.shutdown_kernel()
+        if self.km.has_kernel:
+            self.km.shutdown_kernel()
 
     def step(self, code):
         """
@@ -149,6 +165,8 @@ class PythonJupyterEnv(BaseEnv):
 
         self.finish_flag = False
         try:
+            if not self.runtime_installed:
+                self.install_runtime()
             try:
                 preprocessed_code = self.preprocess_code(code)
             except:
@@ -164,6 +182,30 @@ class PythonJupyterEnv(BaseEnv):
             content = traceback.format_exc()
             yield {"type": "console", "format": "output", "content": content}
 
+    def install_runtime(self):
+        """
+        Defines the helpers of `kernel_runtime` in the kernel, once per kernel: the result helper
+        and, in the 'trace' active line mode, the line hook.
+        """
+        runtime_code = result_helper_code()
+        if self.active_line_mode() == 'trace':
+            runtime_code += active_line_hook_code()
+        self._run_quietly(runtime_code)
+        self.runtime_installed = True
+        self.finish_flag = False
+
+    def _run_quietly(self, code):
+        """
+        Runs code in the kernel without instrumenting it, discarding its output.
+
+        Args:
+            code (str): The Python code to run.
+        """
+        message_queue = queue.Queue()
+        self._execute_code(code, message_queue)
+        for _ in self._capture_output(message_queue):
+            pass
+
     def _execute_code(self, code, message_queue):
         """
         Executes Python code using the IPython kernel and captures the output messages.
@@ -210,7 +252,7 @@ class PythonJupyterEnv(BaseEnv):
                             }
                         )
                     message_queue.put(
-                        {"type": "console", "format": "output", "content": line}
+                        {"type": "console", "format": "output", "content": line, "stream": content["name"]}
                     )
                 elif msg["msg_type"] == "error":
                     content = "\n".join(content["traceback"])
@@ -222,11 +264,20 @@ class PythonJupyterEnv(BaseEnv):
                             "type": "console",
                             "format": "output",
                             "content": content,
+                            "stream": "error",
                         }
                     )
                 elif msg["msg_type"] in ["display_data", "execute_result"]:
                     data = content["data"]
-                    if "image/png" in data:
+                    if RESULT_MIME_TYPE in data:
+                        message_queue.put(
+                            {
+                                "type": "result",
+                                "format": "json",
+                                "content": data[RESULT_MIME_TYPE],
+                            }
+                        )
+                    elif "image/png" in data:
                         message_queue.put(
                             {
                                 "type": "image",
@@ -303,6 +354,10 @@ class PythonJupyterEnv(BaseEnv):
         Yields:
             dict: Output messages.
         """        
+        timeout = step_timeout()
+        deadline = time.monotonic() + timeout if timeout else None
+        # The CPU time of this step only, as a warm kernel runs many steps.
+        cpu_meter = CpuMeter(self.kernel_pid())
         while True:
             if self.listener_thread:
                 try:
@@ -311,18 +366,83 @@ class PythonJupyterEnv(BaseEnv):
                 except queue.Empty:
                     if self.finish_flag:
                         break
+                    if not self.km.is_alive():
+                        yield from self._kill_kernel('exited', exited_message())
+                        break
+                if deadline and time.monotonic() > deadline and not self.finish_flag:
+                    yield from self._kill_kernel('timeout', timeout_message(timeout))
+                    break
+                if not self.finish_flag and cpu_meter.exceeded():
+                    yield from self._kill_kernel('cpu', cpu_message(cpu_meter.limit))
+                    break
             time.sleep(0.1)
 
+    def _kill_kernel(self, violation, message):
+        """
+        Stops a step that broke its limits: the kernel and the processes it started are killed,
+        so the environment starts a new one for the next step, and the violation is reported as
+        an error output.
+
+        Args:
+            violation (str): 'timeout', 'cpu' or 'exited'.
+            message (str): The error shown to the judge and repair prompts.
+
+        Yields:
+            dict: The error output.
+        """
+        # Setting the flag ends the listener, which interrupts the kernel on its way out.
+        self.finish_flag = True
+        if self.listener_thread:
+            self.listener_thread.join(timeout=1)
+        self.kc.stop_channels()
+        # The kernel leads its own process group, which holds the subprocesses the code started.
+        kill_process_group(self.kernel_pid())
+        if self.km.has_kernel:
+            self.km.shutdown_kernel(now=True)
+        self.runtime_installed = False
+        yield {"type": "console", "format": "output", "content": message,
+               "stream": "error", "violation": violation}
+
+    def chdir(self, path):
+        """
+        Changes the current directory of the kernel, e.g. of a pooled kernel handed to an agent
+        with its own working directory.
+
+        Args:
+            path (str): The new current directory.
+        """
+        self._run_quietly(f"import os as _os\n_os.chdir({path!r})\ndel _os")
+        self.cwd = path
+
+    def kernel_pid(self):
+        """
+        Returns the process id of the kernel, or None if it is not running.
+        """
+        provisioner = getattr(self.km, 'provisioner', None)
+        process = getattr(provisioner, 'process', None) if provisioner is not None else getattr(self.km, 'kernel', None)
+        return getattr(process, 'pid', None)
+
     def stop(self):
         """
         Stops the execution of code by setting the finish flag.
         """        
         self.finish_flag = True
 
+    @staticmethod
+    def active_line_mode():
+        """
+        Returns how active lines are reported, one of `kernel_runtime.ACTIVE_LINE_MODES`.
+        """
+        return Config.get_parameter('active_line_mode') or 'statement'
+
     def preprocess_code(self, code):
         """
         Preprocesses the Python code before execution.
 
+        Depending on the active line mode, marker prints are inserted before the top-level
+        statements ('top') or before every statement ('statement'). In the 'off' and 'trace'
+        modes the code is left as is.
+
         Args:
             code (str): The Python code to preprocess.
 
@@ -330,24 +450,61 @@ class PythonJupyterEnv(BaseEnv):
             str: The preprocessed code.
         """
         code = code.strip()
+        mode = self.active_line_mode()
 
         # Add print commands that tell us what the active line is
         # but don't do this if any line starts with ! or %
-        if not any(line.strip().startswith(("!", "%")) for line in code.split("\n")):
-            code = add_active_line_prints(code)
+        if mode in ('top', 'statement') and not any(line.strip().startswith(("!", "%")) for line in code.split("\n")):
+            if mode == 'top':
+                code = add_top_level_line_prints(code)
+            else:
+                code = add_active_line_prints(code)
 
         # Wrap in a try except (DISABLED)
         # code = wrap_in_try_except(code)
 
         # Remove any whitespace lines, as this will break indented blocks
         # (are we sure about this? test this)
-        code_lines = code.split("\n")
-        code_lines = [c for c in code_lines if c.strip() != ""]
-        code = "\n".join(code_lines)
+        # Not in 'top' mode, which keeps the original source, blank lines in strings included.
+        if mode != 'top':
+            code_lines = code.split("\n")
+            code_lines = [c for c in code_lines if c.strip() != ""]
+            code = "\n".join(code_lines)
 
         return code
     
 
+def add_top_level_line_prints(code):
+    """
+    Adds print statements indicating line numbers before the top-level statements of a Python string.
+
+    The markers are inserted into the source text, so the code is parsed once and keeps its
+    formatting and comments. A statement sharing its first line with the previous statement
+    (after a semicolon or a multi-line string) gets no marker of its own.
+
+    Args:
+        code (str): The Python code.
+
+    Returns:
+        str: The code with added print statements.
+    """
+    tree = ast.parse(code)
+    code_lines = code.split("\n")
+    markers = {}
+    previous_end = 0
+    for node in tree.body:
+        start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+        if start > previous_end:
+            markers[start] = f'print("##active_line{node.lineno}##")'
+        previous_end = node.end_lineno
+    new_lines = []
+    for i, line in enumerate(code_lines, start=1):
+        if i in markers:
+            new_lines.append(markers[i])
+        new_lines.append(line)
+    return "\n".join(new_lines)
+
+
 def add_active_line_prints(code):
     """
     Adds print statements indicating line numbers to a Python string.
@@ -358,22 +515,8 @@ def add_active_line_prints(code):
     Returns:
         str: The code with added print statements.
     """
-    # Replace newlines and comments with pass statements, so the line numbers are accurate (ast will remove them otherwise)
-    code_lines = code.split("\n")
-    in_multiline_string = False
-    for i in range(len(code_lines)):
-        line = code_lines[i]
-        if '"""' in line or "'''" in line:
-            in_multiline_string = not in_multiline_string
-        if not in_multiline_string and (line.strip().startswith("#") or line == ""):
-            whitespace = len(line) - len(line.lstrip(" "))
-            code_lines[i] = " " * whitespace + "pass"
-    processed_code = "\n".join(code_lines)
-    try:
-        tree = ast.parse(processed_code)
-    except:
-        # If you can't parse the processed version, try the unprocessed version before giving up
-        tree = ast.parse(code)
+    # The AST keeps the original line numbers, so the code is parsed as is.
+    tree = ast.parse(code)
     transformer = AddLinePrints()
     new_tree = transformer.visit(tree)
     return ast.unparse(new_tree)
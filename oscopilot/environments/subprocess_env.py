@@ -6,6 +6,8 @@ import threading
 import time
 import traceback
 from oscopilot.environments.base_env import BaseEnv
+from oscopilot.environments.limits import (limited_command, step_timeout, timeout_message, exited_message,
+                                           cpu_message, CpuMeter, kill_process_group)
 
 class SubprocessEnv(BaseEnv):
     """
@@ -27,8 +29,10 @@ class SubprocessEnv(BaseEnv):
             verbose (bool): Whether to print verbose output.
             output_queue (queue.Queue): A queue for storing output messages.
             done (threading.Event): An event to signal completion of execution.
+            cwd (str or None): The directory the subprocess starts in, the current directory if None.
         """        
         self.start_cmd = []
+        self.cwd = None
         self.process = None
         self.verbose = False
         self.output_queue = queue.Queue()
@@ -103,7 +107,7 @@ class SubprocessEnv(BaseEnv):
         my_env = os.environ.copy()
         my_env["PYTHONIOENCODING"] = "utf-8"
         self.process = subprocess.Popen(
-            self.start_cmd,
+            limited_command(self.start_cmd),
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
@@ -111,8 +115,11 @@ class SubprocessEnv(BaseEnv):
             bufsize=0,
             universal_newlines=True,
             env=my_env,
+            cwd=self.cwd,
             encoding="utf-8",
             errors="replace",
+            # A group of its own, so that a step stopped for its limits kills the programs it started too.
+            start_new_session=True,
         )
         threading.Thread(
             target=self.handle_stream_output,
@@ -183,15 +190,27 @@ class SubprocessEnv(BaseEnv):
                     }
                     return
 
+        timeout = step_timeout()
+        deadline = time.monotonic() + timeout if timeout else None
+        cpu_meter = CpuMeter(self.process.pid)
         while True:
             if not self.output_queue.empty():
                 yield self.output_queue.get()
             else:
                 time.sleep(0.1)
+            if deadline and time.monotonic() > deadline and not self.done.is_set():
+                yield self._kill_process('timeout', timeout_message(timeout))
+                break
+            if not self.done.is_set() and cpu_meter.exceeded():
+                yield self._kill_process('cpu', cpu_message(cpu_meter.limit))
+                break
             try:
                 output = self.output_queue.get(timeout=0.3)  # Waits for 0.3 seconds
                 yield output
             except queue.Empty:
+                if not self.done.is_set() and self.process.poll() is not None:
+                    yield self._kill_process('exited', exited_message())
+                    break
                 if self.done.is_set():
                     # Try to yank 3 more times from it... maybe there's something in there...
                     # (I don't know if this actually helps. Maybe we just need to yank 1 more time)
@@ -201,6 +220,24 @@ class SubprocessEnv(BaseEnv):
                         time.sleep(0.2)
                     break
 
+    def _kill_process(self, violation, message):
+        """
+        Stops a step that broke its limits: the process and the programs it started are killed,
+        so the next step starts a new one, and the violation is returned as an error output.
+
+        Args:
+            violation (str): 'timeout', 'cpu' or 'exited'.
+            message (str): The error shown to the judge and repair prompts.
+
+        Returns:
+            dict: The error output.
+        """
+        kill_process_group(self.process.pid)
+        self.terminate()
+        self.process = None
+        return {"type": "console", "format": "output", "content": message,
+                "stream": "error", "violation": violation}
+
     def handle_stream_output(self, stream, is_error_stream):
         """
         Handles the streaming output from the subprocess.
@@ -254,7 +291,8 @@ class SubprocessEnv(BaseEnv):
                     self.done.set()
                 else:
                     self.output_queue.put(
-                        {"type": "console", "format": "output", "content": line}
+                        {"type": "console", "format": "output", "content": line,
+                         "stream": "stderr" if is_error_stream else "stdout"}
                     )
         except ValueError as e:
             if "operation on closed file" in str(e):
@@ -0,0 +1,196 @@
+import os
+import shutil
+import logging
+import tempfile
+import itertools
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+# The Linux ioctl that makes a file share the extents of another (a reflink), on btrfs, XFS and similar.
+FICLONE = 0x40049409
+
+
+def clone_file(src, dst, reflink=True):
+    """
+    Copies a file with its timestamps, as a copy-on-write reflink when the filesystem supports it.
+
+    Args:
+        src (str): The source file.
+        dst (str): The destination file.
+        reflink (bool, optional): Whether to try a reflink first. Defaults to True.
+
+    Returns:
+        bool: Whether the copy is a reflink.
+    """
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    if reflink and fcntl is not None:
+        try:
+            with open(src, 'rb') as s, open(dst, 'wb') as d:
+                fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+            shutil.copystat(src, dst)
+            return True
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+    return False
+
+
+class WorkdirCheckpoint:
+    """
+    Snapshots of a working directory, so the files can be put back after a failed step.
+
+    A snapshot records the size and mtime of every file and keeps a copy of it in `store_dir`, a
+    private directory created for this instance, so instances sharing a parent directory never
+    touch each other's copies.
+    Copies are reflinks where the filesystem supports them, so they cost no space until either
+    side changes, and plain copies otherwise. A file unchanged since the previous snapshot keeps
+    its copy, so a snapshot only copies what changed. Files over `max_file_size` are recorded but
+    not copied, and cannot be restored.
+
+    Attributes:
+        path (str): The working directory.
+        store_dir (str): The private directory holding the copies, outside the working directory.
+        max_file_size (int): The size in bytes above which files are not copied.
+    """
+    def __init__(self, path, store_dir=None, max_file_size=100 * 1024 * 1024):
+        """
+        Args:
+            path (str): The working directory.
+            store_dir (str, optional): The directory the private store is created in, the system
+                temporary directory by default. It is never deleted itself.
+            max_file_size (int, optional): The size in bytes above which files are not copied.
+
+        Raises:
+            ValueError: If the store would be inside the working directory.
+        """
+        self.path = os.path.abspath(path)
+        parent = os.path.realpath(store_dir or tempfile.gettempdir())
+        if os.path.commonpath([parent, os.path.realpath(self.path)]) == os.path.realpath(self.path):
+            raise ValueError(f"The checkpoint directory {parent} must be outside the working directory {self.path}")
+        os.makedirs(parent, exist_ok=True)
+        self.store_dir = tempfile.mkdtemp(prefix='oscopilot_checkpoint_', dir=parent)
+        self.max_file_size = max_file_size
+        self._files = None
+        self._dirs = None
+        self._reflink = True
+        self._generation = itertools.count()
+
+    def _scan(self):
+        """
+        Returns the files of the working directory by relative path, as (size, mtime_ns), and its directories.
+        """
+        files = {}
+        dirs = set()
+        for root, dir_names, file_names in os.walk(self.path):
+            rel_root = os.path.relpath(root, self.path)
+            for name in dir_names:
+                dirs.add(os.path.normpath(os.path.join(rel_root, name)))
+            for name in file_names:
+                full_path = os.path.join(root, name)
+                if os.path.islink(full_path):
+                    continue
+                try:
+                    st = os.stat(full_path)
+                except OSError:
+                    continue
+                files[os.path.normpath(os.path.join(rel_root, name))] = (st.st_size, st.st_mtime_ns)
+        return files, dirs
+
+    def _copy(self, src, dst):
+        self._reflink = clone_file(src, dst, self._reflink)
+
+    def take(self):
+        """
+        Snapshots the working directory, replacing the previous snapshot.
+        """
+        files, dirs = self._scan()
+        old_files = self._files or {}
+        generation_dir = os.path.join(self.store_dir, str(next(self._generation)))
+        snapshot = {}
+        for rel, info in files.items():
+            old = old_files.get(rel)
+            if old is not None and old[:2] == info and old[2] is not None:
+                snapshot[rel] = old
+                continue
+            stored = None
+            if info[0] <= self.max_file_size:
+                stored = os.path.join(generation_dir, rel)
+                try:
+                    self._copy(os.path.join(self.path, rel), stored)
+                except OSError as e:
+                    logging.warning(f"Could not snapshot {rel}: {e}")
+                    stored = None
+            snapshot[rel] = info + (stored,)
+        kept = {entry[2] for entry in snapshot.values()}
+        for entry in old_files.values():
+            if entry[2] is not None and entry[2] not in kept and os.path.exists(entry[2]):
+                os.remove(entry[2])
+        self._files = snapshot
+        self._dirs = dirs
+
+    def diff(self):
+        """
+        Returns the files added, removed and modified since the snapshot.
+
+        Returns:
+            dict: The sorted relative paths under 'added', 'removed' and 'modified'.
+        """
+        files, _ = self._scan()
+        old_files = self._files or {}
+        return {
+            "added": sorted(files.keys() - old_files.keys()),
+            "removed": sorted(old_files.keys() - files.keys()),
+            "modified": sorted(rel for rel in files.keys() & old_files.keys() if files[rel] != old_files[rel][:2]),
+        }
+
+    def format_diff(self, limit=50):
+        """
+        Renders the changes since the snapshot for a prompt, at most `limit` lines.
+        """
+        changes = self.diff()
+        lines = [f"{kind.capitalize()}: {rel}" for kind in ('added', 'removed', 'modified') for rel in changes[kind]]
+        if not lines:
+            return "No files were changed."
+        if len(lines) > limit:
+            lines = lines[:limit] + [f"... {len(lines) - limit} more changes not shown"]
+        return "\n".join(lines)
+
+    def rollback(self):
+        """
+        Puts the working directory back as it was at the snapshot: added files and directories
+        are removed, and removed or modified files are restored from their copies.
+
+        Returns:
+            list: The relative paths of the changed files that could not be restored.
+        """
+        if self._files is None:
+            return []
+        changes = self.diff()
+        for rel in changes["added"]:
+            os.remove(os.path.join(self.path, rel))
+        _, dirs = self._scan()
+        for rel in sorted(dirs - self._dirs, key=len):
+            shutil.rmtree(os.path.join(self.path, rel), ignore_errors=True)
+        for rel in self._dirs - dirs:
+            os.makedirs(os.path.join(self.path, rel), exist_ok=True)
+        unrestored = []
+        for rel in changes["removed"] + changes["modified"]:
+            stored = self._files[rel][2]
+            if stored is None:
+                unrestored.append(rel)
+                continue
+            target = os.path.join(self.path, rel)
+            if os.path.exists(target):
+                os.remove(target)
+            self._copy(stored, target)
+        return unrestored
+
+    def close(self):
+        """
+        Deletes the copies.
+        """
+        shutil.rmtree(self.store_dir, ignore_errors=True)
+        self._files = None
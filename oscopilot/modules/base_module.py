@@ -6,6 +6,9 @@ from oscopilot.utils.llms import OpenAI, OLLAMA
 # from oscopilot.environments.py_jupyter_env import PythonJupyterEnv
 from oscopilot.environments import Env
 from oscopilot.utils import get_os_version
+from oscopilot.utils.response_parser import extract_tag, parse_json
+from oscopilot.utils.utils import send_chat_prompts, send_structured_prompts
+from oscopilot.utils.config import Config
 from dotenv import load_dotenv
 
 load_dotenv(dotenv_path='.env', override=True)
@@ -37,23 +40,15 @@ class BaseModule:
         Returns:
             list[str]: A list of extracted substrings found between the begin and end markers.
         """
-        result = []
-        _begin = message.find(begin_str)
-        _end = message.find(end_str)
-        while not (_begin == -1 or _end == -1):
-            result.append(message[_begin + len(begin_str):_end].lstrip("\n"))
-            message = message[_end + len(end_str):]
-            _begin = message.find(begin_str)
-            _end = message.find(end_str)
-        return result  
+        return [info.lstrip("\n") for info in extract_tag(message, begin_str, end_str)]
 
     def extract_json_from_string(self, text):
         """
         Identifies and extracts JSON data embedded within a given string.
 
-        This method searches for JSON data within a string, specifically looking for
-        JSON blocks that are marked with ```json``` notation. It attempts to parse
-        and return the first JSON object found.
+        This method searches for JSON data within a string, preferring JSON blocks that
+        are marked with ```json``` notation, and parses the first one found. Minor formatting
+        drift such as trailing commas or a cut-off end is repaired (see `parse_json`).
 
         Args:
             text (str): The text containing the JSON data to be extracted.
@@ -62,24 +57,35 @@ class BaseModule:
             dict: The parsed JSON data as a dictionary if successful.
             str: An error message indicating a parsing error or that no JSON data was found.
         """
-        # Improved regular expression to find JSON data within a string
-        json_regex = r'```json\s*\n\{[\s\S]*?\n\}\s*```'
-        
-        # Search for JSON data in the text
-        matches = re.findall(json_regex, text)
-
-        # Extract and parse the JSON data if found
-        if matches:
-            # Removing the ```json and ``` from the match to parse it as JSON
-            json_data = matches[0].replace('```json', '').replace('```', '').strip()
-            try:
-                # Parse the JSON data
-                parsed_json = json.loads(json_data)
-                return parsed_json
-            except json.JSONDecodeError as e:
-                return f"Error parsing JSON data: {e}"
-        else:
+        try:
+            return parse_json(text)
+        except json.JSONDecodeError as e:
+            return f"Error parsing JSON data: {e}"
+        except ValueError:
             return "No JSON data found in the string."
+
+    def request_json(self, sys_prompt, user_prompt, schema, prefix=""):
+        """
+        Asks the LLM for a JSON payload, such as a task graph or a judgement.
+
+        With `--structured_output`, the model is constrained to the payload's schema through function
+        calling (or `format: json` with Ollama) and the payload is validated on receipt. Otherwise the
+        JSON is extracted from the free-form response.
+
+        Args:
+            sys_prompt (str): The system prompt.
+            user_prompt (str): The user prompt.
+            schema (str): The name of the payload's schema in `structured_output.SCHEMAS`.
+            prefix (str, optional): A label of the calling phase, used in logs and traces.
+
+        Returns:
+            dict: The payload if successful.
+            str: An error message indicating a parsing error or that no JSON data was found, in free-form mode.
+        """
+        if Config.get_parameter('structured_output'):
+            return send_structured_prompts(sys_prompt, user_prompt, self.llm, schema, prefix=prefix)
+        response = send_chat_prompts(sys_prompt, user_prompt, self.llm, prefix=prefix)
+        return self.extract_json_from_string(response)
         
 
     def extract_list_from_string(self, text):
@@ -1,10 +1,15 @@
 from oscopilot.modules.base_module import BaseModule
-from oscopilot.tool_repository.manager.tool_manager import get_open_api_doc_path
+from oscopilot.tool_repository.manager.tool_manager import get_open_api_doc_path, is_better_tool
+from oscopilot.tool_repository.manager.openapi_index import get_openapi_index
+from oscopilot.environments.kernel_pool import tool_import_code
 import re
 import json
 import subprocess
 from pathlib import Path
-from oscopilot.utils.utils import send_chat_prompts, api_exception_mechanism
+from oscopilot.utils.utils import send_chat_prompts, send_structured_prompts, api_exception_mechanism
+from oscopilot.utils.usage import usage_tag
+from oscopilot.utils.config import Config
+from oscopilot.utils import response_parser
 
 
 
@@ -25,10 +30,9 @@ class FridayExecutor(BaseModule):
         self.tool_manager = tool_manager
         self.max_iter = max_iter
         self.open_api_doc_path = get_open_api_doc_path()
-        self.open_api_doc = {}
-        with open(self.open_api_doc_path) as f:
-            self.open_api_doc = json.load(f) 
+        self.open_api_index = get_openapi_index(self.open_api_doc_path)
     
+    @usage_tag('executor.generate')
     @api_exception_mechanism(max_retries=3)
     def generate_tool(self, task_name, task_description, tool_type, pre_tasks_info, relevant_code):
         """
@@ -81,12 +85,71 @@ class FridayExecutor(BaseModule):
             invoke = ''
         return code, invoke
 
-    def execute_tool(self, code, invoke, node_type):
+    def find_reusable_tool(self, task_description):
+        """
+        Finds a stored tool whose description matches a subtask closely enough to be called as is.
+
+        Args:
+            task_description (str): The description of the subtask.
+
+        Returns:
+            str: The name of the stored tool, or None if no tool matches above `--reuse_threshold`.
+        """
+        threshold = Config.get_parameter('reuse_threshold')
+        if not threshold:
+            return None
+        tool_name, similarity = self.tool_manager.find_duplicate(task_description, threshold)
+        if tool_name is not None:
+            print(f"Reusing stored tool {tool_name} (similarity {similarity:.3f}).")
+        return tool_name
+
+    @usage_tag('executor.invoke')
+    @api_exception_mechanism(max_retries=3)
+    def reuse_tool(self, tool_name, task_description, pre_tasks_info):
+        """
+        Prepares the call of a stored tool, asking the LLM only for the invocation.
+
+        The tool is imported from the repository's `tool_code` directory instead of being sent
+        to the kernel as source, so a warm kernel imports it once and later calls reuse the
+        loaded module.
+
+        Args:
+            tool_name (str): The name of the stored tool.
+            task_description (str): The description of the subtask.
+            pre_tasks_info (dict): Information about the prerequisite tasks.
+
+        Returns:
+            tuple: A tuple containing three elements:
+                - import_code (str): The code importing the tool into the kernel.
+                - invoke (str): The call of the tool.
+                - code (str): The source code of the tool, for judging and repairing.
+        """
+        code = self.tool_manager.get_tool_code(tool_name)
+        sys_prompt = self.prompt['_SYSTEM_TOOL_INVOKE_PROMPT']
+        user_prompt = self.prompt['_USER_TOOL_INVOKE_PROMPT'].format(
+            system_version=self.system_version,
+            task_description=task_description,
+            working_dir=self.environment.working_dir,
+            pre_tasks_info=pre_tasks_info,
+            tool_name=tool_name,
+            tool_code=code
+        )
+        invoke_msg = send_chat_prompts(sys_prompt, user_prompt, self.llm)
+        invoke = self.extract_information(invoke_msg, begin_str='<invoke>', end_str='</invoke>')[0]
+        import_code = (
+            tool_import_code(self.tool_manager.generated_tool_repo_dir) + "\n"
+            f"{tool_name} = tool_code.load({tool_name!r})"
+        )
+        return import_code, invoke, code
+
+    def execute_tool(self, code, invoke, node_type, handle='result'):
         """
         Executes a given tool code and returns the execution state.
 
-        This method handles the execution of tool code based on its node_type. For code tools, it appends
-        additional instructions to print the execution result within designated markers. It then passes
+        This method handles the execution of tool code based on its node_type. For Python tools, it appends
+        a call of the kernel's result helper, which keeps the return value in the kernel under `handle`
+        and publishes it apart from the printed output, as `state.return_value`. With `--object_handoff`
+        the value is also bound to the variable `<handle>_result` for the subtasks that follow. It then passes
         the modified code for execution in the environments. The method captures and prints the execution
         state, including any results or errors, and returns this state.
 
@@ -94,6 +157,8 @@ class FridayExecutor(BaseModule):
             code (str): The Python code to be executed as part of the tool.
             invoke (str): The specific command or function call that triggers the tool within the code.
             node_type (str): The type of the tool, determining how the tool is executed. Currently supports 'Code' type.
+            handle (str, optional): The key of the return value in the kernel's `_oscopilot_results`,
+                usually the name of the subtask. Defaults to 'result'.
 
         Returns:
             state: The state object returned by the environments after executing the tool. This object contains
@@ -105,7 +170,9 @@ class FridayExecutor(BaseModule):
         """
         # print result info
         if node_type == 'Python':
-            info = "\n" + '''print("<return>")''' + "\n" + "print(result)" +  "\n" + '''print("</return>")'''
+            limit = Config.get_parameter('output_limit')
+            bind = bool(Config.get_parameter('object_handoff'))
+            info = f"\n_oscopilot_return(result, {handle!r}, {20000 if limit is None else limit}, {bind})"
             code = code + '\nresult=' + invoke + info
         # state = EnvState(command=code)
         print("************************<code>**************************")
@@ -128,6 +195,7 @@ class FridayExecutor(BaseModule):
         print("************************</state>*************************") 
         return state
 
+    @usage_tag('executor.judge')
     @api_exception_mechanism(max_retries=3)
     def judge_tool(self, code, task_description, state, next_action):
         """
@@ -155,15 +223,14 @@ class FridayExecutor(BaseModule):
         user_prompt = self.prompt['_USER_TASK_JUDGE_PROMPT'].format(
             current_code=code,
             task=task_description,
-            code_output=state.result[:999] if len(state.result) > 1000 else state.result,
+            code_output=state.output()[:999],
             current_working_dir=state.pwd,
             working_dir=self.environment.working_dir,
-            files_and_folders=state.ls,
+            files_and_folders=state.ls if state.changes is None else f"{state.ls}\n\nChanges made by the current code:\n{state.changes}",
             next_action=next_action,
             code_error=state.error,
         )
-        response = send_chat_prompts(sys_prompt, user_prompt, self.llm)
-        judge_json = self.extract_json_from_string(response) 
+        judge_json = self.request_json(sys_prompt, user_prompt, 'judgement')
         print("************************<judge_json>**************************")
         print(judge_json)
         print("************************</judge_json>*************************")
@@ -176,6 +243,7 @@ class FridayExecutor(BaseModule):
             raise ValueError("Missing key in judge module output: {}".format(e))
         return reasoning, status, score
 
+    @usage_tag('executor.repair')
     @api_exception_mechanism(max_retries=3)
     def repair_tool(self, current_code, task_description, tool_type, state, critique, pre_tasks_info):
         """
@@ -205,7 +273,7 @@ class FridayExecutor(BaseModule):
                 original_code = current_code,
                 task = task_description,
                 error = state.error,
-                code_output = state.result,
+                code_output = state.output(),
                 current_working_dir = state.pwd,
                 working_dir= self.environment.working_dir,
                 files_and_folders = state.ls,
@@ -218,18 +286,22 @@ class FridayExecutor(BaseModule):
                 original_code = current_code,
                 task = task_description,
                 error = state.error,
-                code_output = state.result,
+                code_output = state.output(),
                 current_working_dir = state.pwd,
                 working_dir= self.environment.working_dir,
                 files_and_folders = state.ls,
                 critique = critique,
                 pre_tasks_info = pre_tasks_info
             )
+        if Config.get_parameter('structured_output'):
+            repair_json = send_structured_prompts(sys_prompt, user_prompt, self.llm, 'repair')
+            return repair_json['code'], repair_json['invoke']
         amend_msg = send_chat_prompts(sys_prompt, user_prompt, self.llm)
         new_code = self.extract_python_code(amend_msg)
         invoke = self.extract_information(amend_msg, begin_str='<invoke>', end_str='</invoke>')[0]
         return new_code, invoke
 
+    @usage_tag('executor.analysis')
     @api_exception_mechanism(max_retries=3)
     def analysis_tool(self, code, task_description, state):
         """
@@ -260,8 +332,7 @@ class FridayExecutor(BaseModule):
             files_and_folders= state.ls
         )
 
-        response = send_chat_prompts(sys_prompt, user_prompt, self.llm)
-        analysis_json = self.extract_json_from_string(response)   
+        analysis_json = self.request_json(sys_prompt, user_prompt, 'error_analysis')
         print("************************<analysis_json>**************************")
         print(analysis_json)
         print("************************</analysis_json>*************************")   
@@ -270,7 +341,7 @@ class FridayExecutor(BaseModule):
         error_type = analysis_json['type']
         return reasoning, error_type
         
-    def store_tool(self, tool, code):
+    def store_tool(self, tool, code, score=None):
         """
         Stores the provided tool and its code in the tool library.
 
@@ -278,9 +349,13 @@ class FridayExecutor(BaseModule):
         code, arguments description, and other relevant information. It involves saving these details into JSON files and
         updating the tool library database. If the tool already exists, it outputs a notification indicating so.
 
+        A new tool whose description is nearly the same as a stored tool's (`--dedupe_threshold`) only
+        replaces that tool if it got a better judge score; otherwise it is not stored.
+
         Args:
             tool (str): The name of the tool to be stored.
             code (str): The executable code associated with the tool.
+            score (int, optional): The judge score of the tool.
 
         Side Effects:
             - Adds a new tool to the tool library if it doesn't already exist.
@@ -294,8 +369,22 @@ class FridayExecutor(BaseModule):
             tool_description = self.extract_tool_description(code)
             # Save tool name, code, and description to JSON
             tool_info = self.save_tool_info_to_json(tool, code, tool_description)
-            # Save code and descriptions to databases and JSON files
-            self.tool_manager.add_new_tool(tool_info)
+            tool_info["score"] = score
+            threshold = Config.get_parameter('dedupe_threshold')
+            # Embed the description once, for both the duplicate search and the insert.
+            embedding = self.tool_manager.embed_description(tool_description)
+            with self.tool_manager.write_lock:
+                if threshold:
+                    duplicate, similarity = self.tool_manager.find_duplicate(tool_description, threshold, embedding)
+                    if duplicate is not None:
+                        duplicate_score = self.tool_manager.generated_tools[duplicate].get("score")
+                        if not is_better_tool(score, duplicate_score):
+                            print(f"tool {tool} duplicates {duplicate} (similarity {similarity:.3f}), keeping {duplicate}!")
+                            return
+                        print(f"tool {tool} duplicates {duplicate} (similarity {similarity:.3f}) with a better score, replacing it!")
+                        self.tool_manager.delete_tool(duplicate)
+                # Save code and descriptions to databases and JSON files
+                self.tool_manager.add_new_tool(tool_info, embedding)
             # # Parameter description save path
             # args_description_file_path = self.tool_manager.generated_tool_repo_dir + '/args_description/' + tool + '.txt'      
             # # save args_description
@@ -303,6 +392,7 @@ class FridayExecutor(BaseModule):
         else:
             print("tool already exists!")
 
+    @usage_tag('executor.api')
     @api_exception_mechanism(max_retries=3)
     def api_tool(self, description, api_path, context="No context provided."):
         """
@@ -330,6 +420,7 @@ class FridayExecutor(BaseModule):
         code = self.extract_python_code(response)
         return code 
     
+    @usage_tag('executor.qa')
     def question_and_answer_tool(self, context, question, current_question=None):
         sys_prompt = self.prompt['_SYSTEM_QA_PROMPT']
         user_prompt = self.prompt['_USER_QA_PROMPT'].format(
@@ -340,13 +431,8 @@ class FridayExecutor(BaseModule):
         return send_chat_prompts(sys_prompt, user_prompt, self.llm)  
 
     def extract_code(self, response, code_type):
-        code = ""
-        code_type_str = '```'+code_type.lower()
-        if code_type_str in response:
-            code = response.split(code_type_str)[1].split('```')[0]
-        elif '```' in code:
-            code = response.split('```')[1].split('```')[0]
-        else:
+        code = response_parser.extract_code(response, code_type)
+        if code is None:
             raise NotImplementedError
         return code.strip()
 
@@ -354,7 +440,8 @@ class FridayExecutor(BaseModule):
         """
         Extracts Python code snippets from a response string that includes code block markers.
 
-        This method parses a response string to extract Python code enclosed within '```python' and '```' markers.
+        This method parses a response string to extract Python code enclosed within '```python' and '```' markers,
+        falling back to the first code block of any language.
         It's designed to retrieve executable Python code snippets from formatted responses, such as those returned
         by a language learning model after processing a code generation or analysis prompts.
 
@@ -364,12 +451,7 @@ class FridayExecutor(BaseModule):
         Returns:
             str: The extracted Python code snippet, or an empty string if no code block is found.
         """
-        python_code = ""
-        if '```python' in response:
-            python_code = response.split('```python')[1].split('```')[0]
-        elif '```' in python_code:
-            python_code = response.split('```')[1].split('```')[0]
-        return python_code    
+        return response_parser.extract_code(response, 'python') or ""
 
     def extract_class_name_and_args_description(self, class_code):
         """
@@ -530,10 +612,10 @@ class FridayExecutor(BaseModule):
         """
         Generates a reduced OpenAPI documentation for a specific API path from the full OpenAPI documentation.
 
-        This method isolates and extracts the documentation for a specific tool API path, including its
-        schemas and operations (GET, POST), from the entire OpenAPI documentation stored in the instance.
-        It constructs a new, smaller OpenAPI document that only includes details relevant to the specified API path.
-        If the API path does not exist in the full documentation, it returns an error message.
+        The reduced document is precomputed by the shared OpenAPI index, which parses the specification
+        once and rebuilds it only when the file changes. It includes the path item and every schema the
+        request references, following nested references, so the document is self-contained with respect
+        to the schemas needed to understand the API's usage.
 
         Args:
             tool_api_path (str): The specific API path for which the OpenAPI documentation should be generated.
@@ -541,50 +623,6 @@ class FridayExecutor(BaseModule):
         Returns:
             dict: A dictionary representing the OpenAPI documentation for the specific API path. If the path is not
                 found, returns a dictionary with an error message.
-        
-        The method performs several checks:
-        - Verifies the existence of the tool API path in the full OpenAPI documentation.
-        - Extracts relevant parts of the OpenAPI schema related to the path.
-        - Includes any referenced schemas necessary for understanding the API's structure and data types.
-
-        It handles both JSON and multipart/form-data content types in API request bodies, searching for schema references
-        to include in the returned documentation. This enables the resulting API document to be self-contained with respect
-        to the schemas needed to understand the API's usage.
         """
-        # init current api's doc
-        curr_api_doc = {}
-        curr_api_doc["openapi"] = self.open_api_doc["openapi"]
-        curr_api_doc["info"] = self.open_api_doc["info"]
-        curr_api_doc["paths"] = {}
-        curr_api_doc["components"] = {"schemas":{}}
-        api_path_doc = {}
-        #extract path and schema
-        if tool_api_path not in self.open_api_doc["paths"]:
-            curr_api_doc = {"error": "The api is not existed"}
-            return curr_api_doc
-        api_path_doc = self.open_api_doc["paths"][tool_api_path]
-        curr_api_doc["paths"][tool_api_path] = api_path_doc
-        find_ptr = {}
-        if "get" in api_path_doc:
-            findptr  = api_path_doc["get"]
-        elif "post" in api_path_doc:
-            findptr = api_path_doc["post"]
-        api_params_schema_ref = ""
-        # json格式
-        if (("requestBody" in findptr) and 
-        ("content" in findptr["requestBody"]) and 
-        ("application/json" in findptr["requestBody"]["content"]) and 
-        ("schema" in findptr["requestBody"]["content"]["application/json"]) and 
-        ("$ref" in findptr["requestBody"]["content"]["application/json"]["schema"])):
-            api_params_schema_ref = findptr["requestBody"]["content"]["application/json"]["schema"]["$ref"]
-        elif (("requestBody" in findptr) and 
-        ("content" in findptr["requestBody"]) and 
-        ("multipart/form-data" in findptr["requestBody"]["content"]) and 
-        ("schema" in findptr["requestBody"]["content"]["multipart/form-data"]) and 
-        ("allOf" in findptr["requestBody"]["content"]["multipart/form-data"]["schema"]) and 
-        ("$ref" in findptr["requestBody"]["content"]["multipart/form-data"]["schema"]["allOf"][0])):
-            api_params_schema_ref = findptr["requestBody"]["content"]["multipart/form-data"]["schema"]["allOf"][0]["$ref"]
-        if api_params_schema_ref != None and api_params_schema_ref != "":
-            curr_api_doc["components"]["schemas"][api_params_schema_ref.split('/')[-1]] = self.open_api_doc["components"]["schemas"][api_params_schema_ref.split('/')[-1]]
-        return curr_api_doc
+        return self.open_api_index.get_doc(tool_api_path)
 
@@ -1,5 +1,6 @@
 from oscopilot.modules.base_module import BaseModule
 from oscopilot.utils.utils import send_chat_prompts
+from oscopilot.utils.usage import usage_tag
 
 
 class SelfLearner(BaseModule):
@@ -25,6 +26,7 @@ class SelfLearner(BaseModule):
         self.tool_manager = tool_manager
         self.course = {}
         
+    @usage_tag('learner.course')
     def design_course(self, software_name, package_name, demo_file_path, file_content=None, prior_course=None):
         """
         Designs a course based on specified software and content parameters and stores it in the course attribute.
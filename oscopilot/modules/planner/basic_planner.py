@@ -96,7 +96,7 @@ class BasicPlanner(BaseModule):
         # update topological sort
         self.topological_sort()
 
-    def update_tool(self, tool, return_val='', relevant_code=None, status=False, node_type='Code'):
+    def update_tool(self, tool, return_val='', relevant_code=None, status=False, node_type='Code', return_ref=None):
         """
         Updates the specified tool's node information within the tool graph.
 
@@ -110,19 +110,21 @@ class BasicPlanner(BaseModule):
             relevant_code (str, optional): Any relevant code associated with the tool. Default is None.
             status (bool, optional): The execution status of the tool. Default is False.
             node_type (str, optional): The node_type of the tool (e.g., 'Code'). Default is 'Code'.
+            return_ref (dict, optional): The return value as published by the Python kernel. Default is None.
 
         Side Effects:
             Updates the information of the specified tool node within the tool graph.
         """
         if return_val:
-            if node_type=='Code':
-                return_val = self.extract_information(return_val, "<return>", "</return>")
-                print("************************<return>**************************")
-                logging.info(return_val)
-                print(return_val)
-                print("************************</return>*************************")  
+            # The return value arrives apart from the printed output, see FridayExecutor.execute_tool.
+            print("************************<return>**************************")
+            logging.info(return_val)
+            print(return_val)
+            print("************************</return>*************************")  
             if return_val != 'None':
                 self.tool_node[tool]._return_val = return_val
+        if return_ref:
+            self.tool_node[tool]._return_ref = return_ref
         if relevant_code:
             self.tool_node[tool]._relevant_code = relevant_code
         self.tool_node[tool]._status = status
@@ -210,7 +212,7 @@ class BasicPlanner(BaseModule):
         last_new_task = list(new_task_json.keys())[-1]
         self.tool_graph[current_task].append(last_new_task)
         
-    def get_pre_tasks_info(self, current_task):
+    def get_pre_tasks_info(self, current_task, live_kernel=None):
         """
         Retrieves information about the prerequisite tasks for a given current task.
 
@@ -220,18 +222,16 @@ class BasicPlanner(BaseModule):
 
         Args:
             current_task (str): The name of the task for which prerequisite information is requested.
+            live_kernel (int, optional): The id of the running Python kernel, whose variables can be handed on.
 
         Returns:
             A JSON string representing a dictionary, where each key is a prerequisite task's
-            name, and the value is a dictionary with the task's description and return value.
+            name, and the value is a dictionary with the task's description and return value,
+            plus the kernel variable holding the return value with `--object_handoff`.
         """
         pre_tasks_info = {}
         for task in self.tool_graph[current_task]:
-            task_info = {
-                "description" : self.tool_node[task].description,
-                "return_val" : self.tool_node[task].return_val
-            }
-            pre_tasks_info[task] = task_info
+            pre_tasks_info[task] = self.tool_node[task].prompt_info(live_kernel)
         pre_tasks_info = json.dumps(pre_tasks_info)
         return pre_tasks_info
 
@@ -6,6 +6,7 @@ from oscopilot.utils.utils import send_chat_prompts, api_exception_mechanism
 import json
 import sys
 import logging
+from oscopilot.utils.usage import usage_tag
 
 
 class FridayPlanner(BaseModule):
@@ -31,6 +32,7 @@ class FridayPlanner(BaseModule):
         self.tool_graph = defaultdict(list)
         self.sub_task_list = []
 
+    @usage_tag('planner.decompose')
     @api_exception_mechanism(max_retries=3)
     def decompose_task(self, task, tool_description_pair):
         """
@@ -62,17 +64,16 @@ class FridayPlanner(BaseModule):
             working_dir = self.environment.working_dir,
             files_and_folders = files_and_folders
         )
-        response = send_chat_prompts(sys_prompt, user_prompt, self.llm, prefix="Overall")
-        decompose_json = self.extract_json_from_string(response)
+        decompose_json = self.request_json(sys_prompt, user_prompt, 'task_graph', prefix="Overall")
         # Building tool graph and topological ordering of tools
         if decompose_json != 'No JSON data found in the string.':
             self.create_tool_graph(decompose_json)
             self.topological_sort()
         else:
-            print(response)
             print('No JSON data found in the string.')
             sys.exit()
 
+    @usage_tag('planner.replan')
     def replan_task(self, reasoning, current_task, relevant_tool_description_pair):
         """
         Replans the current task by integrating new tools into the original tool graph.
@@ -115,7 +116,7 @@ class FridayPlanner(BaseModule):
         # update topological sort
         self.topological_sort()
 
-    def update_tool(self, tool, return_val='', relevant_code=None, status=False, node_type='Code'):
+    def update_tool(self, tool, return_val='', relevant_code=None, status=False, node_type='Code', return_ref=None):
         """
         Updates the specified tool's node information within the tool graph.
 
@@ -129,19 +130,21 @@ class FridayPlanner(BaseModule):
             relevant_code (str, optional): Any relevant code associated with the tool. Default is None.
             status (bool, optional): The execution status of the tool. Default is False.
             node_type (str, optional): The node_type of the tool (e.g., 'Code'). Default is 'Code'.
+            return_ref (dict, optional): The return value as published by the Python kernel. Default is None.
 
         Side Effects:
             Updates the information of the specified tool node within the tool graph.
         """
         if return_val:
-            if node_type=='Code':
-                return_val = self.extract_information(return_val, "<return>", "</return>")
-                print("************************<return>**************************")
-                logging.info(return_val)
-                print(return_val)
-                print("************************</return>*************************")  
+            # The return value arrives apart from the printed output, see FridayExecutor.execute_tool.
+            print("************************<return>**************************")
+            logging.info(return_val)
+            print(return_val)
+            print("************************</return>*************************")  
             if return_val != 'None':
                 self.tool_node[tool]._return_val = return_val
+        if return_ref:
+            self.tool_node[tool]._return_ref = return_ref
         if relevant_code:
             self.tool_node[tool]._relevant_code = relevant_code
         self.tool_node[tool]._status = status
@@ -280,7 +283,7 @@ class FridayPlanner(BaseModule):
         else:
             return "Cycle detected in the graph, topological sort not possible."
         
-    def get_pre_tasks_info(self, current_task):
+    def get_pre_tasks_info(self, current_task, live_kernel=None):
         """
         Retrieves information about the prerequisite tasks for a given current task.
 
@@ -290,18 +293,16 @@ class FridayPlanner(BaseModule):
 
         Args:
             current_task (str): The name of the task for which prerequisite information is requested.
+            live_kernel (int, optional): The id of the running Python kernel, whose variables can be handed on.
 
         Returns:
             A JSON string representing a dictionary, where each key is a prerequisite task's
-            name, and the value is a dictionary with the task's description and return value.
+            name, and the value is a dictionary with the task's description and return value,
+            plus the kernel variable holding the return value with `--object_handoff`.
         """
         pre_tasks_info = {}
         for task in self.tool_graph[current_task]:
-            task_info = {
-                "description" : self.tool_node[task].description,
-                "return_val" : self.tool_node[task].return_val
-            }
-            pre_tasks_info[task] = task_info
+            pre_tasks_info[task] = self.tool_node[task].prompt_info(live_kernel)
         pre_tasks_info = json.dumps(pre_tasks_info)
         return pre_tasks_info
 
@@ -1,6 +1,7 @@
 from oscopilot.modules.base_module import BaseModule
 from oscopilot.utils.utils import send_chat_prompts
 import json
+from oscopilot.utils.usage import usage_tag
 
 
 class FridayRetriever(BaseModule):
@@ -47,6 +48,7 @@ class FridayRetriever(BaseModule):
         retrieve_tool_name = self.tool_manager.retrieve_tool_name(task, k)
         return retrieve_tool_name
 
+    @usage_tag('retriever.filter')
     def tool_code_filter(self, tool_code_pair, task):
         """
         Filters and retrieves the code for an tool relevant to the specified task.
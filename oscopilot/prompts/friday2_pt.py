@@ -93,7 +93,7 @@ prompt = {
         Relevant Code: {relevant_code}
         Detailed description of user information:
         1. 'Working Directory' represents the working directory. It may not necessarily be the same as the current working directory. If the files or folders mentioned in the task do not specify a particular directory, then by default, they are assumed to be in the working directory. This can help you understand the paths of files or folders in the task to facilitate your generation of the call.
-        2. 'Information of Prerequisite Tasks' provides relevant information about the prerequisite tasks for the current task, encapsulated in a dictionary format. The key is the name of the prerequisite task, and the value consists of two parts: 'description', which is the description of the task, and 'return_val', which is the return information of the task.
+        2. 'Information of Prerequisite Tasks' provides relevant information about the prerequisite tasks for the current task, encapsulated in a dictionary format. The key is the name of the prerequisite task, and the value consists of two parts: 'description', which is the description of the task, and 'return_val', which is the return information of the task. If a prerequisite task also has a 'variable', its return value is already held by that variable in the Python session, so use the variable directly instead of loading or parsing the data again.
         3. 'Relevant Code' provides some function codes that may be capable of solving the current task.
         ''',
 
@@ -189,7 +189,7 @@ prompt = {
         3. 'Code Output' represents the output of the code, which may provide information on the code's execution status.
         4. 'Working Directory' represents the root directory of the working directory, and 'Current Working Directory' represents the directory where the current task is located.    
         5. 'Critique On The Code' refers to code modification suggestions given by other code experts and may be empty.
-        6. 'Information of Prerequisite Tasks' from User's information provides relevant information about the prerequisite tasks for the current task, encapsulated in a dictionary format. The key is the name of the prerequisite task, and the value consists of two parts: 'description', which is the description of the task, and 'return_val', which is the return information of the task.
+        6. 'Information of Prerequisite Tasks' from User's information provides relevant information about the prerequisite tasks for the current task, encapsulated in a dictionary format. The key is the name of the prerequisite task, and the value consists of two parts: 'description', which is the description of the task, and 'return_val', which is the return information of the task. If a prerequisite task also has a 'variable', its return value is already held by that variable in the Python session, so use the variable directly instead of loading or parsing the data again.
         ''',
 
 
@@ -259,7 +259,7 @@ prompt = {
         You need to complete the code using the ToolRequestUtil tool to call the specified API and print the return value
         of the api. 
         ToolRequestUtil is a utility class, and the parameters of its 'request' method are described as follows:
-        def request(self, api_path, method, params=None, content_type=None):
+        def request(self, api_path, method, params=None, files=None, content_type=None):
             """
             :param api_path: the path of the API
             :param method: get/post
@@ -268,6 +268,11 @@ prompt = {
             :param content_type: the content_type of api, e.g., application/json, multipart/form-data, can be None
             :return: the response from the API
             """
+        def gather(self, requests_list):
+            """
+            :param requests_list: a list of dicts, each holding the keyword arguments of one 'request' call. Use it when several independent API calls are needed, they are sent concurrently.
+            :return: the list of responses, in the same order as requests_list
+            """
         Please begin your code completion:
         ''',
         '_USER_TOOL_USAGE_PROMPT': '''
@@ -103,13 +103,46 @@ prompt = {
         Relevant Code: {relevant_code}
         Detailed description of user information:
         1. 'Working Directory' represents the working directory. It may not necessarily be the same as the current working directory. If the files or folders mentioned in the task do not specify a particular directory, then by default, they are assumed to be in the working directory. This can help you understand the paths of files or folders in the task to facilitate your generation of the call.
-        2. 'Information of Prerequisite Tasks' provides relevant information about the prerequisite tasks for the current task, encapsulated in a dictionary format. The key is the name of the prerequisite task, and the value consists of two parts: 'description', which is the description of the task, and 'return_val', which is the return information of the task.
+        2. 'Information of Prerequisite Tasks' provides relevant information about the prerequisite tasks for the current task, encapsulated in a dictionary format. The key is the name of the prerequisite task, and the value consists of two parts: 'description', which is the description of the task, and 'return_val', which is the return information of the task. If a prerequisite task also has a 'variable', its return value is already held by that variable in the Python session, so use the variable directly instead of loading or parsing the data again.
         3. 'Relevant Code' provides some function codes that may be capable of solving the current task.
 
         Note: Please output according to the output format specified in the system message.
         ''',
 
 
+        # Python invoke prompts for reusing a stored tool in os
+        '_SYSTEM_TOOL_INVOKE_PROMPT': '''
+        You are a world-class programmer that can complete any task by calling existing functions.
+        An existing function that accomplishes the task is provided, and it has already been imported. Your goal is to generate the call of this function that completes the task.
+        You could only respond with the function call enclosed between <invoke> and </invoke>.
+        Output Format:
+        <invoke>python_function(arg1, arg2, ...)</invoke>
+
+        And the function call should follow the following criteria:
+        1. The Python function call must be syntactically correct as per Python standards.
+        2. Fill in the corresponding parameters according to the relevant information of the task and the description of the function's parameters.
+        3. If the function call requires the output of prerequisite tasks, you can obtain relevant information from 'Information of Prerequisite Tasks'.
+        4. The parameter information should be written directly into the function call, rather than being passed as variables to the function. 
+        5. The generated function call should be a single line and should not include any additional text or comments.
+        ''',
+        '_USER_TOOL_INVOKE_PROMPT': '''
+        User's information is as follows:
+        System Version: {system_version}
+        System language: simplified chinese
+        Working Directory: {working_dir}
+        Task Description: {task_description}     
+        Information of Prerequisite Tasks: {pre_tasks_info}   
+        Function Name: {tool_name}
+        Function Code: {tool_code}
+        Detailed description of user information:
+        1. 'Working Directory' represents the working directory. It may not necessarily be the same as the current working directory. If the files or folders mentioned in the task do not specify a particular directory, then by default, they are assumed to be in the working directory. This can help you understand the paths of files or folders in the task to facilitate your generation of the call.
+        2. 'Information of Prerequisite Tasks' provides relevant information about the prerequisite tasks for the current task, encapsulated in a dictionary format. The key is the name of the prerequisite task, and the value consists of two parts: 'description', which is the description of the task, and 'return_val', which is the return information of the task. If a prerequisite task also has a 'variable', its return value is already held by that variable in the Python session, so use the variable directly instead of loading or parsing the data again.
+        3. 'Function Code' is the code of the function to call, whose name is 'Function Name'.
+
+        Note: Please output according to the output format specified in the system message.
+        ''',
+
+
         # shell/applescript amend in os
         '_SYSTEM_SHELL_APPLESCRIPT_AMEND_PROMPT': '''
         You are an expert in programming, with a focus on diagnosing and resolving code issues.
@@ -199,7 +232,7 @@ prompt = {
         3. 'Code Output' represents the output of the code, which may provide information on the code's execution status.
         4. 'Working Directory' represents the root directory of the working directory, and 'Current Working Directory' represents the directory where the current task is located.    
         5. 'Critique On The Code' refers to code modification suggestions given by other code experts and may be empty.
-        6. 'Information of Prerequisite Tasks' from User's information provides relevant information about the prerequisite tasks for the current task, encapsulated in a dictionary format. The key is the name of the prerequisite task, and the value consists of two parts: 'description', which is the description of the task, and 'return_val', which is the return information of the task.
+        6. 'Information of Prerequisite Tasks' from User's information provides relevant information about the prerequisite tasks for the current task, encapsulated in a dictionary format. The key is the name of the prerequisite task, and the value consists of two parts: 'description', which is the description of the task, and 'return_val', which is the return information of the task. If a prerequisite task also has a 'variable', its return value is already held by that variable in the Python session, so use the variable directly instead of loading or parsing the data again.
         
         Note: Please output according to the output format specified in the system message.
         ''',
@@ -272,7 +305,7 @@ prompt = {
         You need to complete the code using the ToolRequestUtil tool to call the specified API and print the return value
         of the api. 
         ToolRequestUtil is a utility class, and the parameters of its 'request' method are described as follows:
-        def request(self, api_path, method, params=None, content_type=None):
+        def request(self, api_path, method, params=None, files=None, content_type=None):
             """
             :param api_path: the path of the API
             :param method: get/post
@@ -281,6 +314,11 @@ prompt = {
             :param content_type: the content_type of api, e.g., application/json, multipart/form-data, can be None
             :return: the response from the API
             """
+        def gather(self, requests_list):
+            """
+            :param requests_list: a list of dicts, each holding the keyword arguments of one 'request' call. Use it when several independent API calls are needed, they are sent concurrently.
+            :return: the list of responses, in the same order as requests_list
+            """
         Please begin your code completion:
         ''',
         '_USER_TOOL_USAGE_PROMPT': '''
@@ -1,13 +1,24 @@
 from fastapi import APIRouter, HTTPException, File, UploadFile,Depends
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel,Field
 from typing import Optional
 from .audio2text import Audio2TextTool
-import io
-import os
-import shutil
+from ..upload_utils import spool_upload, ResultCache
 router = APIRouter()
 
-whisper_api = Audio2TextTool()
+# Created per worker process by the API server lifespan, see `init_clients`.
+whisper_api = None
+# Transcriptions keyed by the content hash of the uploaded audio.
+transcription_cache = ResultCache()
+
+
+def init_clients():
+    """
+    Creates the Whisper client shared by all requests of the current worker process.
+    """
+    global whisper_api
+    if whisper_api is None:
+        whisper_api = Audio2TextTool()
 
 
 class AudioTextQueryItem(BaseModel):
@@ -18,14 +29,13 @@ class AudioTextQueryItem(BaseModel):
 @router.post("/tools/audio2text", summary="A tool that converts audio to natural language text.")
 async def audio2text(item: AudioTextQueryItem = Depends()):
     try:
-        # Create a temporary file to save the uploaded audio.
-        with open(item.file.filename, "wb") as buffer:
-            shutil.copyfileobj(item.file.file, buffer)
-        with open(item.file.filename, "rb") as audio:
-            caption = whisper_api.caption(audio_file=audio)
-        # Clean up temporary files.
-        os.remove(item.file.filename)
+        # Stream the upload into a spooled temporary file and hash it on the way.
+        with await spool_upload(item.file) as upload:
+            # The Whisper call is blocking, so run it in the thread pool.
+            caption = await transcription_cache.get_or_compute(
+                upload.digest,
+                lambda: run_in_threadpool(whisper_api.caption, audio_file=upload.named_file())
+            )
         return {"text": caption}
     except RuntimeError as e:
         raise HTTPException(status_code=500, detail=str(e))
-
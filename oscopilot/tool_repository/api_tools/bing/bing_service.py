@@ -4,6 +4,7 @@ from typing import Optional
 # from .bing_api import BingAPI
 from .bing_api_v2 import BingAPIV2
 from .image_search_api import ImageSearchAPI
+from .web_loader import WebPageLoader
 import tiktoken
 import os
 from dotenv import load_dotenv
@@ -24,8 +25,27 @@ def num_tokens_from_string(string: str) -> int:
 router = APIRouter()
 
 # bing_api = BingAPI(BING_API) 
-bing_api_v2 = BingAPIV2()
-image_search_api = ImageSearchAPI(BING_API) 
+# Clients are created per worker process by the API server lifespan, see `init_clients`.
+bing_api_v2 = None
+image_search_api = None
+
+
+def init_clients():
+    """
+    Creates the Bing clients shared by all requests of the current worker process.
+    """
+    global bing_api_v2, image_search_api
+    if bing_api_v2 is None:
+        bing_api_v2 = BingAPIV2()
+    if image_search_api is None:
+        image_search_api = ImageSearchAPI(BING_API)
+
+
+def close_clients():
+    """
+    Releases the pooled HTTP connections held by the Bing clients.
+    """
+    WebPageLoader.close_session()
 
 # class QueryItem(BaseModel):
 #     query: str
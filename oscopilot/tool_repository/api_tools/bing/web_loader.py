@@ -4,6 +4,7 @@ import re
 import requests
 import pdfplumber
 from io import BytesIO
+from oscopilot.utils.cassette import get_cassette
 try:
     from bs4 import BeautifulSoup
 except ImportError:
@@ -53,6 +54,10 @@ class WebPageLoader:
     _session = requests.Session()
 
     def load_data(self, url):
+        """Load data from a web page, recording or replaying it when a cassette is configured."""
+        return get_cassette().call("web", {"url": url}, lambda: self._load_data(url))
+
+    def _load_data(self, url):
         """Load data from a web page using a shared requests session."""
         headers = {'User-Agent':'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_11_4) AppleWebKit/537.36 (KHTML like Gecko) Chrome/52.0.2743.116 Safari/537.36'}
         web_data = {}
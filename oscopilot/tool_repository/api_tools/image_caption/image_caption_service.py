@@ -1,12 +1,26 @@
 from fastapi import APIRouter, HTTPException,UploadFile,File,Form, Depends
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel,Field
 from typing import Optional
 from .gpt4v_caption import ImageCaptionTool
-import base64
+from ..upload_utils import spool_upload, ResultCache
 
 router = APIRouter()
 
-image_caption_api = ImageCaptionTool()
+# Created per worker process by the API server lifespan, see `init_clients`.
+image_caption_api = None
+# Captions of uploaded images keyed by (content hash, query).
+caption_cache = ResultCache()
+
+
+
+def init_clients():
+    """
+    Creates the GPT-4V client shared by all requests of the current worker process.
+    """
+    global image_caption_api
+    if image_caption_api is None:
+        image_caption_api = ImageCaptionTool()
 
 
 # class CaptionQueryItem(BaseModel):
@@ -24,13 +38,17 @@ async def image_search(item: dict = Depends(caption_parameters)):
             item["query"] = "What's in this image?"
         if(item["url"] == None and item["image_file"] == None):
             return {"error":"Invalid picture"}
-        image_url=""
         if(item["url"] != None and item["image_file"] == None):
-            image_url = item["url"]
-        elif(item["image_file"] != None):
-            base64Img = base64.b64encode(await item["image_file"].read()).decode('utf-8')
-            image_url = f"data:image/jpeg;base64,{base64Img}"
-        caption = image_caption_api.caption(url=image_url,query=item["query"])
+            caption = await run_in_threadpool(image_caption_api.caption, url=item["url"], query=item["query"])
+        else:
+            with await spool_upload(item["image_file"]) as upload:
+                async def caption_upload():
+                    # Encoding and the GPT-4V call are blocking, keep them off the event loop.
+                    base64Img = await run_in_threadpool(upload.to_base64)
+                    media_type = upload.content_type if (upload.content_type or '').startswith('image/') else 'image/jpeg'
+                    image_url = f"data:{media_type};base64,{base64Img}"
+                    return await run_in_threadpool(image_caption_api.caption, url=image_url, query=item["query"])
+                caption = await caption_cache.get_or_compute((upload.digest, item["query"]), caption_upload)
     except RuntimeError as e:
         raise HTTPException(status_code=500, detail=str(e))
     return {"caption":caption}
@@ -0,0 +1,195 @@
+import asyncio
+import base64
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+
+load_dotenv(dotenv_path='.env', override=True)
+
+# Directory that holds uploads once they outgrow the in-memory spool.
+UPLOAD_DIR = os.getenv('UPLOAD_DIR') or os.path.join(tempfile.gettempdir(), 'oscopilot_uploads')
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_SPOOL_MAX_SIZE = int(os.getenv('UPLOAD_SPOOL_MAX_SIZE', 8 * 1024 * 1024))
+UPLOAD_RESULT_CACHE_SIZE = int(os.getenv('UPLOAD_RESULT_CACHE_SIZE', 256))
+
+
+class SpooledUpload:
+    """
+    An uploaded file copied into a spooled temporary file together with its content hash.
+
+    Small uploads stay in memory, larger ones roll over to a temporary file inside `UPLOAD_DIR`.
+    The client-supplied filename is never used as a path; only its extension is kept so that
+    downstream APIs (e.g. Whisper) can still infer the file format.
+
+    Attributes:
+        file (tempfile.SpooledTemporaryFile): The spooled copy of the upload.
+        digest (str): The SHA-256 hex digest of the upload content.
+        size (int): The size of the upload in bytes.
+        filename (str): A sanitized filename carrying the original extension.
+        content_type (str): The content type reported by the client, if any.
+    """
+    def __init__(self, file, digest, size, filename, content_type=None):
+        self.file = file
+        self.digest = digest
+        self.size = size
+        self.filename = filename
+        self.content_type = content_type
+
+    def named_file(self):
+        """
+        Returns the upload as a `(filename, file)` tuple, rewound to the beginning.
+
+        Returns:
+            tuple: The sanitized filename and the spooled file object.
+        """
+        self.file.seek(0)
+        return self.filename, self.file
+
+    def to_base64(self, chunk_size=3 * UPLOAD_CHUNK_SIZE):
+        """
+        Base64-encodes the upload chunk by chunk.
+
+        The chunk size is a multiple of 3 so that the encoded chunks can be concatenated
+        without padding in between. This is blocking and should run in a worker thread.
+
+        Args:
+            chunk_size (int, optional): Number of raw bytes to encode at a time.
+
+        Returns:
+            str: The base64-encoded content.
+        """
+        self.file.seek(0)
+        encoded = []
+        while True:
+            chunk = self.file.read(chunk_size)
+            if not chunk:
+                break
+            encoded.append(base64.b64encode(chunk).decode('utf-8'))
+        return ''.join(encoded)
+
+    def close(self):
+        """
+        Closes the spooled file, deleting any rolled-over temporary file.
+        """
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+
+async def spool_upload(upload_file, chunk_size=UPLOAD_CHUNK_SIZE):
+    """
+    Streams a FastAPI `UploadFile` into a spooled temporary file while hashing it.
+
+    The upload is read in fixed-size chunks so that large files are never held in memory
+    in full, and the SHA-256 digest is computed on the fly for result deduplication.
+
+    Args:
+        upload_file (UploadFile): The uploaded file.
+        chunk_size (int, optional): The number of bytes read per chunk. Defaults to 1 MiB.
+
+    Returns:
+        SpooledUpload: The spooled upload. Use it as a context manager to release it.
+    """
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    spool = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MAX_SIZE, dir=UPLOAD_DIR)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while True:
+            chunk = await upload_file.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            spool.write(chunk)
+            size += len(chunk)
+    except Exception:
+        spool.close()
+        raise
+    spool.seek(0)
+    extension = os.path.splitext(os.path.basename(upload_file.filename or ''))[1]
+    filename = 'upload' + ''.join(c for c in extension if c.isalnum() or c == '.')
+    return SpooledUpload(spool, digest.hexdigest(), size, filename, upload_file.content_type)
+
+
+class ResultCache:
+    """
+    A bounded LRU cache for tool results keyed by upload content hash.
+
+    Besides remembering finished results, the cache coalesces concurrent requests for the
+    same key: while a result is being computed, further callers await the same future
+    instead of issuing a duplicate API call.
+
+    Attributes:
+        maxsize (int): The maximum number of results kept in the cache.
+    """
+    def __init__(self, maxsize=UPLOAD_RESULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._results = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns the cached result for a key, or None if it is not cached.
+        """
+        with self._lock:
+            if key not in self._results:
+                return None
+            self._results.move_to_end(key)
+            return self._results[key]
+
+    def put(self, key, value):
+        """
+        Stores a result, evicting the least recently used entry when full.
+        """
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._results[key] = value
+            self._results.move_to_end(key)
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+
+    async def get_or_compute(self, key, compute):
+        """
+        Returns the cached result for a key, computing it once if necessary.
+
+        Args:
+            key (hashable): The cache key, typically including the upload digest.
+            compute (callable): A zero-argument coroutine function producing the result.
+
+        Returns:
+            Any: The cached or freshly computed result.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        pending = self._pending.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            result = await compute()
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody else was waiting.
+            future.exception()
+            raise
+        else:
+            self.put(key, result)
+            future.set_result(result)
+            return result
+        finally:
+            self._pending.pop(key, None)
+            # compute() was cancelled (a BaseException): release the waiters instead of leaving them hanging.
+            if not future.done():
+                future.cancel()
@@ -16,7 +16,17 @@ class QueryItem(BaseModel):
 router = APIRouter()
 
 app_id = WOLFRAMALPHA_APP_ID
-client = wolframalpha.Client(app_id)
+# Created per worker process by the API server lifespan, see `init_clients`.
+client = None
+
+
+def init_clients():
+    """
+    Creates the Wolfram|Alpha client shared by all requests of the current worker process.
+    """
+    global client
+    if client is None:
+        client = wolframalpha.Client(app_id)
 
 @router.post("/tools/wolframalpha")
 async def wolframalpha_query(item: QueryItem):
@@ -1,18 +1,192 @@
+import os
+import csv
+import json
+import hashlib
+import threading
 from oscopilot.utils.utils import send_chat_prompts
 from oscopilot.prompts.friday_pt import prompt
 
 
+# Bounds of the sampled content, so that large files do not flood the course design prompt.
+MAX_ROWS = 100
+MAX_PAGES = 20
+MAX_CHARS = 20000
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _sample_rows(rows, max_rows):
+    """
+    Takes the first `max_rows` rows of an iterable of rows, noting how many were left out.
+    """
+    sampled = []
+    skipped = 0
+    for row in rows:
+        if len(sampled) < max_rows:
+            sampled.append(list(row))
+        else:
+            skipped += 1
+    if skipped:
+        sampled.append(['... {} more rows'.format(skipped)])
+    return sampled
+
+
+def extract_xlsx(file_path, max_rows=MAX_ROWS):
+    """
+    Reads the cell values of every sheet, streaming the workbook in read-only mode.
+
+    Returns:
+        str: A dictionary of sheet name to a list of rows.
+    """
+    import openpyxl
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        content = {sheet.title: _sample_rows(sheet.iter_rows(values_only=True), max_rows)
+                   for sheet in workbook.worksheets}
+    finally:
+        workbook.close()
+    return str(content)
+
+
+def extract_csv(file_path, max_rows=MAX_ROWS):
+    """
+    Reads the rows of a CSV file.
+
+    Returns:
+        str: A list of rows.
+    """
+    with open(file_path, 'r', newline='', encoding='utf-8', errors='replace') as f:
+        return str(_sample_rows(csv.reader(f), max_rows))
+
+
+def extract_docx(file_path, max_rows=MAX_ROWS):
+    """
+    Reads the paragraphs and tables of a Word document.
+
+    Returns:
+        str: The paragraphs, followed by the rows of each table.
+    """
+    import docx
+    document = docx.Document(file_path)
+    parts = [paragraph.text for paragraph in document.paragraphs if paragraph.text.strip()]
+    for index, table in enumerate(document.tables):
+        rows = ([cell.text for cell in row.cells] for row in table.rows)
+        parts.append('Table {}: {}'.format(index + 1, _sample_rows(rows, max_rows)))
+    return '\n'.join(parts)
+
+
+def extract_pdf(file_path, max_pages=MAX_PAGES):
+    """
+    Reads the text of the first pages of a PDF.
+
+    Returns:
+        str: The text of each page.
+    """
+    import pdfplumber
+    with pdfplumber.open(file_path) as pdf:
+        pages = [page.extract_text() or '' for page in pdf.pages[:max_pages]]
+        skipped = len(pdf.pages) - len(pages)
+    text = '\n'.join(pages)
+    if skipped > 0:
+        text += '\n... {} more pages'.format(skipped)
+    return text
+
+
+def extract_text(file_path, max_chars=MAX_CHARS):
+    """
+    Reads the beginning of a plain text file.
+    """
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+        text = f.read(max_chars + 1)
+    if len(text) > max_chars:
+        text = text[:max_chars] + '\n...'
+    return text
+
+
+EXTRACTORS = {
+    '.xlsx': extract_xlsx,
+    '.xlsm': extract_xlsx,
+    '.csv': extract_csv,
+    '.docx': extract_docx,
+    '.pdf': extract_pdf,
+    '.txt': extract_text,
+    '.md': extract_text,
+    '.json': extract_text,
+    '.py': extract_text,
+}
+
+
+def file_hash(file_path):
+    """
+    Returns the SHA-256 hex digest of a file's content.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 class TextExtractor:
-    def __init__(self, agent):
+    """
+    Extracts the content of a file, e.g. the demo file of a self-learning session.
+
+    Common formats (xlsx, csv, docx, pdf and plain text) are read directly with bounded sampling.
+    Other formats, or files a native reader fails on, fall back to letting the agent read the
+    file. Results are cached by content hash in memory and, if `cache_dir` is set, on disk. An
+    agent fallback that returned nothing is not cached, so the next call tries again.
+    """
+    def __init__(self, agent, cache_dir=None):
         super().__init__()
         self.agent = agent
         self.prompt = prompt['text_extract_prompt']
-    
+        self.cache_dir = cache_dir
+
     def extract_file_content(self, file_path):
         """
         Extract the content of the file.
         """
+        key = file_hash(file_path)
+        with _cache_lock:
+            if key in _cache:
+                return _cache[key]
+        cache_path = os.path.join(self.cache_dir, key + '.json') if self.cache_dir else None
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                file_content = json.load(f)
+        else:
+            file_content, native = self._extract(file_path)
+            if not native and not file_content:
+                return file_content
+            if cache_path:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(cache_path, 'w', encoding='utf-8') as f:
+                    json.dump(file_content, f, ensure_ascii=False)
+        with _cache_lock:
+            _cache[key] = file_content
+        return file_content
+
+    def _extract(self, file_path):
+        """
+        Reads the file natively if its format is known, otherwise with the agent.
+
+        Returns:
+            tuple: The content, and whether it was read natively.
+        """
+        extractor = EXTRACTORS.get(os.path.splitext(file_path)[1].lower())
+        if extractor is not None:
+            try:
+                return extractor(file_path), True
+            except Exception as e:
+                print(f"Native extraction of {file_path} failed ({e}), falling back to the agent.")
+        return self.extract_with_agent(file_path), False
+
+    def extract_with_agent(self, file_path):
+        """
+        Extract the content of the file by letting the agent write and run code that reads it.
+        """
         extract_task = self.prompt.format(file_path=file_path)
         self.agent.run(extract_task)
         file_content = list(self.agent.planner.tool_node.values())[-1].return_val
-        return file_content
\ No newline at end of file
+        return file_content
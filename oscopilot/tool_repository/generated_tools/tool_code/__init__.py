@@ -0,0 +1,43 @@
+"""
+The tools of the generated tool repository. This file is generated by the ToolManager.
+"""
+import os
+import sys
+import importlib
+
+TOOLS = []
+
+_mtimes = {}
+
+
+def load(name):
+    """
+    Returns the tool class `name`, importing its module on first use and reloading
+    it when the tool file changed since.
+    """
+    module_name = __name__ + '.' + name
+    path = os.path.join(os.path.dirname(__file__), name + '.py')
+    mtime = os.path.getmtime(path)
+    module = sys.modules.get(module_name)
+    if module is None:
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            # The tool was written after the package was imported.
+            importlib.invalidate_caches()
+            module = importlib.import_module(module_name)
+    elif _mtimes.get(name) != mtime:
+        module = importlib.reload(module)
+    _mtimes[name] = mtime
+    return getattr(module, name)
+
+
+def preload():
+    """
+    Imports every tool, skipping the ones that fail to import.
+    """
+    for name in TOOLS:
+        try:
+            load(name)
+        except Exception:
+            pass
@@ -1,3 +1,7 @@
+# Return values longer than this are shown to later subtasks as a summary when they are bound to a kernel variable.
+HANDOFF_TEXT_LIMIT = 500
+
+
 class ActionNode:
     """
     Represents an action node in a workflow or execution graph, encapsulating details like the action's name, description,
@@ -7,6 +11,8 @@ class ActionNode:
         _name (str): The name of the action.
         _description (str): A brief description of what the action does.
         _return_val (str): The value returned by the action upon execution.
+        _return_ref (dict): The return value as published by the Python kernel, including the
+            kernel variable it is bound to with `--object_handoff`.
         _relevant_code (dict): A dictionary mapping relevant code snippets or references associated with the action.
         _next_action (dict): A dictionary mapping subsequent actions that depend on the current action.
         _status (bool): The execution status of the action, indicating whether it has been successfully executed.
@@ -24,6 +30,7 @@ class ActionNode:
         self._name = name
         self._description = description
         self._return_val = ''
+        self._return_ref = None
         self._relevant_code = {}
         self._next_action = {}
         self._status = False
@@ -59,6 +66,16 @@ class ActionNode:
         """
         return self._return_val
    
+    @property
+    def return_ref(self):
+        """
+        Returns the return value as published by the Python kernel, if any.
+
+        Returns:
+            dict: The handle, type, summary, text and, if bound, the variable of the return value.
+        """
+        return self._return_ref
+
     @property
     def relevant_action(self):
         """
@@ -99,6 +116,31 @@ class ActionNode:
         """
         return self._next_action   
     
+    def prompt_info(self, live_kernel=None):
+        """
+        Returns the information about the action given to the subtasks depending on it.
+
+        If the return value is bound to a variable of the kernel that is still running, the
+        variable is included, and a long return value is replaced by its summary, since the
+        subtasks can use the object itself.
+
+        Args:
+            live_kernel (int, optional): The id of the running Python kernel, see `Env.live_kernel_id`.
+
+        Returns:
+            dict: The action's description and return value, and the variable if any.
+        """
+        info = {
+            "description": self.description,
+            "return_val": self.return_val
+        }
+        ref = self._return_ref
+        if ref and ref.get("variable") and live_kernel is not None and ref.get("kernel") == live_kernel:
+            if len(str(self.return_val)) > HANDOFF_TEXT_LIMIT:
+                info["return_val"] = ref["summary"]
+            info["variable"] = ref["variable"]
+        return info
+
     def __str__(self):
         """
         Provides a string representation of the ActionNode instance.
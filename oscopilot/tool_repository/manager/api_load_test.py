@@ -0,0 +1,243 @@
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+from fastapi import APIRouter, File, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from typing import Optional
+
+from oscopilot.tool_repository.manager.api_serving import create_app
+from oscopilot.tool_repository.api_tools.upload_utils import spool_upload, ResultCache
+
+
+# Simulated upstream latency (seconds) of the stand-in tools.
+STAND_IN_LATENCY = float(os.getenv('STAND_IN_LATENCY', 0.05))
+
+# Endpoints exercised by the load test: name -> (method, path, request kwargs)
+ENDPOINTS = {
+    "bing_search": ("get", "/tools/bing/searchv2", {"json": {"query": "load test", "top_k": 5}}),
+    "load_page": ("get", "/tools/bing/load_pagev2", {"json": {"url": "https://example.com", "query": "load test"}}),
+    "image_search": ("get", "/tools/bing/image_search", {"json": {"query": "load test", "top_k": 5}}),
+    "audio2text": ("post", "/tools/audio2text", {"files": {"file": ("test.mp3", b"\x00" * 64 * 1024, "audio/mpeg")}}),
+    "image_caption": ("post", "/tools/image_caption", {"data": {"query": "What's in this image?"},
+                                                       "files": {"image_file": ("birds.jpg", b"\xff" * 64 * 1024, "image/jpeg")}}),
+}
+
+
+class QueryItem(BaseModel):
+    query: str
+    top_k: Optional[int] = Field(None)
+
+
+class PageItem(BaseModel):
+    url: str
+    query: Optional[str] = Field(None)
+
+
+def create_stand_in_router():
+    """
+    Builds a router that mimics the tool API endpoints without calling any external service.
+
+    Search endpoints sleep asynchronously for `STAND_IN_LATENCY` seconds. The upload endpoints
+    run the real spooling and hashing pipeline and simulate the blocking OpenAI call with a
+    sleep in the thread pool, so the measurements include the server's own overhead.
+
+    Returns:
+        APIRouter: The stand-in router.
+    """
+    router = APIRouter()
+    cache = ResultCache(maxsize=0)
+
+    @router.get("/tools/bing/searchv2")
+    async def bing_search(item: QueryItem):
+        await asyncio.sleep(STAND_IN_LATENCY)
+        return [{"snippet": item.query, "title": "stand-in", "link": "https://example.com"}] * (item.top_k or 5)
+
+    @router.get("/tools/bing/load_pagev2")
+    async def load_page(item: PageItem):
+        await asyncio.sleep(STAND_IN_LATENCY)
+        return {"page_content": "stand-in page content of " + item.url}
+
+    @router.get("/tools/bing/image_search")
+    async def image_search(item: QueryItem):
+        await asyncio.sleep(STAND_IN_LATENCY)
+        return [{"imageName": item.query, "imageUrl": "https://example.com/a.jpg", "imageSize": {}}] * (item.top_k or 10)
+
+    @router.post("/tools/audio2text")
+    async def audio2text(file: UploadFile = File(...)):
+        with await spool_upload(file) as upload:
+            text = await cache.get_or_compute(upload.digest, lambda: run_in_threadpool(time.sleep, STAND_IN_LATENCY))
+        return {"text": text or "stand-in transcription"}
+
+    @router.post("/tools/image_caption")
+    async def image_caption(image_file: UploadFile = File(...)):
+        with await spool_upload(image_file) as upload:
+            await run_in_threadpool(upload.to_base64)
+            await run_in_threadpool(time.sleep, STAND_IN_LATENCY)
+        return {"caption": "stand-in caption"}
+
+    return router
+
+
+def create_stand_in_app():
+    """
+    Creates the stand-in application with the same middleware stack as the real API server.
+
+    Returns:
+        FastAPI: The stand-in application.
+    """
+    return create_app(
+        [create_stand_in_router()],
+        max_concurrency=int(os.getenv('API_MAX_CONCURRENCY', 32)),
+        queue_timeout=float(os.getenv('API_QUEUE_TIMEOUT', 1.0)),
+        retry_after=int(os.getenv('API_RETRY_AFTER', 1)),
+    )
+
+
+def get_free_port():
+    """
+    Returns a free TCP port on localhost.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_stand_in_server(port, workers, max_concurrency, latency):
+    """
+    Launches the stand-in server with uvicorn in a subprocess and waits until it is ready.
+
+    Args:
+        port (int): The port to bind.
+        workers (int): The number of uvicorn worker processes.
+        max_concurrency (int): The per-worker concurrency limit.
+        latency (float): The simulated upstream latency in seconds.
+
+    Returns:
+        subprocess.Popen: The server process.
+    """
+    env = os.environ.copy()
+    env['API_MAX_CONCURRENCY'] = str(max_concurrency)
+    env['STAND_IN_LATENCY'] = str(latency)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "--factory", "oscopilot.tool_repository.manager.api_load_test:create_stand_in_app",
+         "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--no-access-log", "--log-level", "warning"],
+        env=env,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/ready", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        if process.poll() is not None:
+            raise RuntimeError("Stand-in server exited during startup.")
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Stand-in server did not become ready in time.")
+
+
+async def run_endpoint(base_url, name, total_requests, concurrency):
+    """
+    Sends `total_requests` requests to one endpoint with at most `concurrency` in flight.
+
+    Args:
+        base_url (str): The server base URL.
+        name (str): The endpoint name, a key of `ENDPOINTS`.
+        total_requests (int): The number of requests to send.
+        concurrency (int): The number of concurrent client connections.
+
+    Returns:
+        dict: Throughput, latency percentiles and status code counts for the endpoint.
+    """
+    method, path, kwargs = ENDPOINTS[name]
+    latencies = []
+    statuses = {}
+    remaining = iter(range(total_requests))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker():
+            for _ in remaining:
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, **kwargs)
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = "error"
+                latencies.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "endpoint": name,
+        "requests": total_requests,
+        "rps": total_requests / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0.0,
+        "statuses": statuses,
+    }
+
+
+def print_report(results):
+    """
+    Prints the load test results as a table.
+
+    Args:
+        results (list[dict]): The per-endpoint results returned by `run_endpoint`.
+    """
+    print(f"{'endpoint':<16}{'requests':>10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}  statuses")
+    for r in results:
+        statuses = ", ".join(f"{k}: {v}" for k, v in sorted(r["statuses"].items(), key=lambda kv: str(kv[0])))
+        print(f"{r['endpoint']:<16}{r['requests']:>10}{r['rps']:>10.1f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}  {statuses}")
+
+
+def main():
+    """
+    Measures requests/sec per endpoint of the tool API server.
+
+    By default a stand-in server (same middleware, fake upstream tools) is started locally,
+    so the numbers reflect the serving stack rather than Bing or OpenAI. Pass `--base_url`
+    to measure an already running server instead.
+
+    Usage:
+        python -m oscopilot.tool_repository.manager.api_load_test --workers 4 --requests 500 --concurrency 64
+    """
+    parser = argparse.ArgumentParser(description='Load test the FRIDAY tool API server')
+    parser.add_argument('--base_url', type=str, default=None, help='target an already running server instead of the stand-in')
+    parser.add_argument('--endpoints', type=str, nargs='+', default=list(ENDPOINTS), choices=list(ENDPOINTS), help='endpoints to test')
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=32, help='concurrent client connections')
+    parser.add_argument('--workers', type=int, default=1, help='stand-in server worker processes')
+    parser.add_argument('--max_concurrency', type=int, default=32, help='stand-in per-worker concurrency limit')
+    parser.add_argument('--latency', type=float, default=STAND_IN_LATENCY, help='stand-in upstream latency in seconds')
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        port = get_free_port()
+        server = start_stand_in_server(port, args.workers, args.max_concurrency, args.latency)
+        base_url = f"http://127.0.0.1:{port}"
+    try:
+        results = [asyncio.run(run_endpoint(base_url, name, args.requests, args.concurrency)) for name in args.endpoints]
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    print_report(results)
+
+
+if __name__ == "__main__":
+    main()
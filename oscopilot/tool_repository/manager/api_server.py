@@ -1,55 +1,116 @@
 import os
+import argparse
 import dotenv
 
-from fastapi import FastAPI
 from oscopilot.utils.server_config import ConfigManager
+from oscopilot.tool_repository.manager.api_serving import create_app, setup_access_logging
 dotenv.load_dotenv(dotenv_path='.env', override=True)
-app = FastAPI()
 
 # Import your services
-from oscopilot.tool_repository.api_tools.bing.bing_service import router as bing_router
-from oscopilot.tool_repository.api_tools.audio2text.audio2text_service import router as audio2text_router
-from oscopilot.tool_repository.api_tools.image_caption.image_caption_service import router as image_caption_router
-from oscopilot.tool_repository.api_tools.wolfram_alpha.wolfram_alpha import router as wolfram_alpha_router
+from oscopilot.tool_repository.api_tools.bing import bing_service
+from oscopilot.tool_repository.api_tools.audio2text import audio2text_service
+from oscopilot.tool_repository.api_tools.image_caption import image_caption_service
+from oscopilot.tool_repository.api_tools.wolfram_alpha import wolfram_alpha
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-
-
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        print(f"Incoming request: {request.method} {request.url}")
-        try:
-            response = await call_next(request)
-        except Exception as e:
-            print(f"Request error: {str(e)}")
-            raise e from None
-        else:
-            print(f"Outgoing response: {response.status_code}")
-        return response
-
-
-app.add_middleware(LoggingMiddleware)
+# Serving settings. They are read from the environment so that every uvicorn worker
+# process picks up the values chosen on the command line in `main`.
+API_MAX_CONCURRENCY = int(os.getenv('API_MAX_CONCURRENCY', 32))
+API_QUEUE_TIMEOUT = float(os.getenv('API_QUEUE_TIMEOUT', 1.0))
+API_RETRY_AFTER = int(os.getenv('API_RETRY_AFTER', 1))
+API_LOG_LEVEL = os.getenv('API_LOG_LEVEL', 'INFO')
+API_ACCESS_LOG_FILE = os.getenv('API_ACCESS_LOG_FILE') or None
 
 # Create a dictionary that maps service names to their routers
 services = {
-    "bing": bing_router, # bing_search, image_search and web_loader
-    "autio2text": audio2text_router,
-    "image_caption": image_caption_router,
-    "wolfram_alpha": wolfram_alpha_router
+    "bing": bing_service.router, # bing_search, image_search and web_loader
+    "autio2text": audio2text_service.router,
+    "image_caption": image_caption_service.router,
+    "wolfram_alpha": wolfram_alpha.router
+}
+
+# Per-worker client setup and teardown of each service
+service_lifespans = {
+    "bing": (bing_service.init_clients, bing_service.close_clients),
+    "autio2text": (audio2text_service.init_clients, None),
+    "image_caption": (image_caption_service.init_clients, None),
+    "wolfram_alpha": (wolfram_alpha.init_clients, None)
 }
 
 server_list = ["bing", "autio2text", "image_caption"]
 
-# Include only the routers for the services listed in server_list
-for service in server_list:
-    if service in services:
-        app.include_router(services[service])
+access_log_listener = None
+
+
+def start_access_log():
+    """
+    Starts the non-blocking access logger of the current worker process.
+    """
+    global access_log_listener
+    if access_log_listener is None:
+        access_log_listener = setup_access_logging(API_LOG_LEVEL, API_ACCESS_LOG_FILE)
+
+
+def stop_access_log():
+    """
+    Flushes and stops the access logger of the current worker process.
+    """
+    global access_log_listener
+    if access_log_listener is not None:
+        access_log_listener.stop()
+        access_log_listener = None
+
+
+# Include only the routers and clients for the services listed in server_list
+enabled_services = [service for service in server_list if service in services]
+startup_hooks = [start_access_log] + [service_lifespans[service][0] for service in enabled_services]
+shutdown_hooks = [service_lifespans[service][1] for service in enabled_services if service_lifespans[service][1]] + [stop_access_log]
+
+app = create_app(
+    [services[service] for service in enabled_services],
+    startup_hooks=startup_hooks,
+    shutdown_hooks=shutdown_hooks,
+    max_concurrency=API_MAX_CONCURRENCY,
+    queue_timeout=API_QUEUE_TIMEOUT,
+    retry_after=API_RETRY_AFTER
+)
 
 # proxy_manager = ConfigManager()
 # proxy_manager.apply_proxies()
 
-if __name__ == "__main__":
+
+def main():
+    """
+    Starts the tool API server.
+
+    With more than one worker, uvicorn spawns that many processes, each importing this
+    module and creating its own clients in the application lifespan.
+
+    Usage:
+        python oscopilot/tool_repository/manager/api_server.py --workers 4 --max_concurrency 64
+    """
+    parser = argparse.ArgumentParser(description='Serve the FRIDAY tool APIs')
+    parser.add_argument('--host', type=str, default='0.0.0.0', help='bind host')
+    parser.add_argument('--port', type=int, default=8079, help='bind port')
+    parser.add_argument('--workers', type=int, default=int(os.getenv('API_WORKERS', 1)), help='number of worker processes')
+    parser.add_argument('--max_concurrency', type=int, default=API_MAX_CONCURRENCY, help='max in-flight requests per worker, 0 disables the limit')
+    parser.add_argument('--queue_timeout', type=float, default=API_QUEUE_TIMEOUT, help='seconds a request waits for a free slot before a 429')
+    parser.add_argument('--retry_after', type=int, default=API_RETRY_AFTER, help='Retry-After seconds sent with a 429')
+    parser.add_argument('--log_level', type=str, default=API_LOG_LEVEL, help='access log level')
+    parser.add_argument('--access_log_file', type=str, default=API_ACCESS_LOG_FILE, help='access log file, defaults to stderr')
+    args = parser.parse_args()
+
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8079)
+    # Hand the settings to the server process(es), which import the app from this module.
+    os.environ['API_MAX_CONCURRENCY'] = str(args.max_concurrency)
+    os.environ['API_QUEUE_TIMEOUT'] = str(args.queue_timeout)
+    os.environ['API_RETRY_AFTER'] = str(args.retry_after)
+    os.environ['API_LOG_LEVEL'] = args.log_level
+    if args.access_log_file:
+        os.environ['API_ACCESS_LOG_FILE'] = args.access_log_file
+    uvicorn.run("oscopilot.tool_repository.manager.api_server:app", host=args.host, port=args.port,
+                workers=args.workers, access_log=False)
+
+
+if __name__ == "__main__":
+    main()
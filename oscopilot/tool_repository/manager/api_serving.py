@@ -0,0 +1,210 @@
+import asyncio
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+
+ACCESS_LOGGER_NAME = "oscopilot.api.access"
+# Paths that bypass the concurrency limiter so that probes keep working under load.
+UNLIMITED_PATHS = ("/health", "/ready")
+
+
+class JsonLogFormatter(logging.Formatter):
+    """
+    Formats log records as single-line JSON objects.
+
+    Structured fields passed through `extra={"fields": {...}}` are merged into the output.
+    """
+    def format(self, record):
+        payload = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "pid": record.process,
+            "message": record.getMessage(),
+        }
+        payload.update(getattr(record, "fields", {}))
+        return json.dumps(payload, ensure_ascii=False)
+
+
+def setup_access_logging(level="INFO", log_file=None):
+    """
+    Configures non-blocking, structured access logging.
+
+    Log records are put on an in-memory queue by a `QueueHandler` and written out by a
+    `QueueListener` thread, so request handlers never block on stdout or file I/O.
+
+    Args:
+        level (str, optional): The logging level of the access logger. Defaults to "INFO".
+        log_file (str, optional): A file to write the access log to. Defaults to stderr.
+
+    Returns:
+        logging.handlers.QueueListener: The started listener. Stop it on shutdown to flush the queue.
+    """
+    handler = logging.FileHandler(log_file) if log_file else logging.StreamHandler()
+    handler.setFormatter(JsonLogFormatter())
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger(ACCESS_LOGGER_NAME)
+    logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+    logger.setLevel(level)
+    logger.propagate = False
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    listener.start()
+    return listener
+
+
+class AccessLogMiddleware:
+    """
+    ASGI middleware that emits one structured access log record per HTTP request.
+
+    Each record carries the method, path, status code, duration and a request id, which is
+    also returned to the client in the `X-Request-ID` header.
+    """
+    def __init__(self, app):
+        self.app = app
+        self.logger = logging.getLogger(ACCESS_LOGGER_NAME)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = uuid.uuid4().hex[:16]
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message.setdefault("headers", []).append((b"x-request-id", request_id.encode()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            self.logger.error("request error", extra={"fields": {"request_id": request_id, "error": str(e)}})
+            raise
+        finally:
+            client = scope.get("client")
+            self.logger.info("request", extra={"fields": {
+                "request_id": request_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status["code"],
+                "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                "client": client[0] if client else None,
+            }})
+
+
+class ConcurrencyLimitMiddleware:
+    """
+    ASGI middleware that bounds the number of requests handled concurrently by a worker.
+
+    Requests beyond `max_concurrency` wait up to `queue_timeout` seconds for a free slot and are
+    then rejected with `429 Too Many Requests` and a `Retry-After` header, so that an overloaded
+    worker sheds load instead of queueing unboundedly.
+
+    Attributes:
+        max_concurrency (int): The maximum number of in-flight requests.
+        queue_timeout (float): Seconds a request may wait for a slot before being rejected.
+        retry_after (int): The value of the `Retry-After` header in seconds.
+        stats (dict): Shared counters; `stats["in_flight"]` is the number of requests being handled.
+    """
+    def __init__(self, app, max_concurrency=32, queue_timeout=1.0, retry_after=1, stats=None):
+        self.app = app
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.stats = stats if stats is not None else {}
+        self.stats.setdefault("in_flight", 0)
+        self.stats.setdefault("rejected", 0)
+        self._semaphore = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.max_concurrency <= 0 or scope["path"] in UNLIMITED_PATHS:
+            await self.app(scope, receive, send)
+            return
+        if self._semaphore is None:
+            # Created lazily so that it binds to the worker's running event loop.
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.stats["rejected"] += 1
+            response = JSONResponse(
+                {"detail": "Server is busy, please retry later."},
+                status_code=429,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        self.stats["in_flight"] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.stats["in_flight"] -= 1
+            self._semaphore.release()
+
+
+def create_app(routers, startup_hooks=None, shutdown_hooks=None, max_concurrency=32, queue_timeout=1.0, retry_after=1):
+    """
+    Builds the tool API application with lifespan-managed clients, limits and health probes.
+
+    The startup hooks run once per worker process when it starts serving, which is where
+    the tool clients (OpenAI, Bing, ...) are created so they are shared by all requests of
+    that worker. `/health` reports liveness, `/ready` reports whether startup has finished.
+
+    Args:
+        routers (list[APIRouter]): The routers of the enabled services.
+        startup_hooks (list[callable], optional): Functions called when a worker starts.
+        shutdown_hooks (list[callable], optional): Functions called when a worker stops.
+        max_concurrency (int, optional): Maximum in-flight requests per worker, 0 disables the limit.
+        queue_timeout (float, optional): Seconds a request waits for a slot before a 429.
+        retry_after (int, optional): The `Retry-After` value sent with a 429.
+
+    Returns:
+        FastAPI: The configured application.
+    """
+    startup_hooks = startup_hooks or []
+    shutdown_hooks = shutdown_hooks or []
+
+    @asynccontextmanager
+    async def lifespan(app):
+        for hook in startup_hooks:
+            hook()
+        app.state.ready = True
+        try:
+            yield
+        finally:
+            app.state.ready = False
+            for hook in shutdown_hooks:
+                hook()
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.ready = False
+    app.state.stats = {"in_flight": 0, "rejected": 0}
+
+    @app.get("/health", include_in_schema=False)
+    async def health():
+        return {"status": "ok", "pid": os.getpid()}
+
+    @app.get("/ready", include_in_schema=False)
+    async def ready():
+        body = {"ready": app.state.ready, "pid": os.getpid()}
+        body.update(app.state.stats)
+        return JSONResponse(body, status_code=200 if app.state.ready else 503)
+
+    for router in routers:
+        app.include_router(router)
+
+    app.add_middleware(ConcurrencyLimitMiddleware, max_concurrency=max_concurrency,
+                       queue_timeout=queue_timeout, retry_after=retry_after, stats=app.state.stats)
+    app.add_middleware(AccessLogMiddleware)
+    return app
@@ -0,0 +1,148 @@
+import os
+import copy
+import json
+import threading
+
+
+class OpenAPIIndex:
+    """
+    An in-memory index over an OpenAPI specification file.
+
+    The specification is parsed once and, for every path, a minimal self-contained OpenAPI
+    document and a short description are precomputed. The file's modification time is checked
+    on access and the index is rebuilt only when the file has changed, so callers on the
+    planning and execution hot paths never re-parse the JSON.
+
+    Attributes:
+        spec_path (str): The path of the OpenAPI JSON file.
+    """
+    def __init__(self, spec_path):
+        self.spec_path = spec_path
+        self._mtime = None
+        self._docs = {}
+        self._description_pair = {}
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        """
+        Rebuilds the index if the specification file changed since the last build.
+        """
+        mtime = os.path.getmtime(self.spec_path)
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            with open(self.spec_path, 'r') as f:
+                spec = json.load(f)
+            self._docs, self._description_pair = self._build(spec)
+            self._mtime = mtime
+
+    def _build(self, spec):
+        """
+        Precomputes the per-path documents and descriptions of a parsed specification.
+
+        Args:
+            spec (dict): The parsed OpenAPI specification.
+
+        Returns:
+            tuple: A dict mapping each path to its minimal document, and a dict mapping each
+                path to its summary. If a path supports both 'get' and 'post', the 'post'
+                summary is preferred.
+        """
+        schemas = spec.get("components", {}).get("schemas", {})
+        docs = {}
+        description_pair = {}
+        for path, path_item in spec.get("paths", {}).items():
+            operation = path_item.get("post") or path_item.get("get")
+            if operation is None:
+                continue
+            description_pair[path] = operation.get("summary", "")
+            # Only the request side is needed to call the API; response schemas
+            # (e.g. validation errors) are left out to keep the prompt short.
+            referenced = {}
+            for method_item in path_item.values():
+                if isinstance(method_item, dict):
+                    self._collect_refs(method_item.get("requestBody"), schemas, referenced)
+                    self._collect_refs(method_item.get("parameters"), schemas, referenced)
+            docs[path] = {
+                "openapi": spec.get("openapi"),
+                "info": spec.get("info"),
+                "paths": {path: path_item},
+                "components": {"schemas": referenced},
+            }
+        return docs, description_pair
+
+    def _collect_refs(self, node, schemas, referenced):
+        """
+        Recursively collects the component schemas referenced by a node, including nested ones.
+
+        Schemas already collected are not visited again, which also guards against
+        self-referencing (cyclic) schemas.
+
+        Args:
+            node (Any): A fragment of the specification.
+            schemas (dict): The `components.schemas` of the specification.
+            referenced (dict): The collected schemas by name, updated in place.
+        """
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if isinstance(ref, str) and ref.startswith("#/components/schemas/"):
+                name = ref.split('/')[-1]
+                if name not in referenced and name in schemas:
+                    referenced[name] = schemas[name]
+                    self._collect_refs(schemas[name], schemas, referenced)
+            for value in node.values():
+                self._collect_refs(value, schemas, referenced)
+        elif isinstance(node, list):
+            for value in node:
+                self._collect_refs(value, schemas, referenced)
+
+    def get_doc(self, api_path):
+        """
+        Returns the minimal OpenAPI document for one API path.
+
+        The document contains the path item and every component schema its request
+        references, directly or through nested references.
+
+        Args:
+            api_path (str): The API path, e.g. '/tools/bing/searchv2'.
+
+        Returns:
+            dict: A copy of the document, or {"error": "The api is not existed"} if the path is unknown.
+        """
+        self._refresh()
+        if api_path not in self._docs:
+            return {"error": "The api is not existed"}
+        return copy.deepcopy(self._docs[api_path])
+
+    def get_description_pair(self):
+        """
+        Returns the mapping of API paths to their descriptions.
+
+        Returns:
+            dict: A copy of the mapping of OpenAPI path names to their summaries.
+        """
+        self._refresh()
+        return dict(self._description_pair)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_openapi_index(spec_path):
+    """
+    Returns the shared OpenAPIIndex of a specification file, creating it on first use.
+
+    Args:
+        spec_path (str): The path of the OpenAPI JSON file.
+
+    Returns:
+        OpenAPIIndex: The index shared by all callers in this process.
+    """
+    spec_path = os.path.abspath(spec_path)
+    with _indexes_lock:
+        if spec_path not in _indexes:
+            _indexes[spec_path] = OpenAPIIndex(spec_path)
+        return _indexes[spec_path]
@@ -10,13 +10,87 @@ import json
 import sys
 import os
 import re
+import functools
+import threading
+import numpy as np
 from dotenv import load_dotenv
+from oscopilot.tool_repository.manager.openapi_index import get_openapi_index
+from oscopilot.utils.tracing import tracer
+from oscopilot.tool_repository.manager.tool_package import write_tool_package, compile_tool, compile_tools
 load_dotenv(dotenv_path='.env', override=True)
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 OPENAI_ORGANIZATION = os.getenv('OPENAI_ORGANIZATION')
 
 EMBED_MODEL_TYPE = os.getenv('EMBED_MODEL_TYPE')
 EMBED_MODEL_NAME = os.getenv('EMBED_MODEL_NAME')
+# Cosine similarity of two tool descriptions above which the tools count as duplicates.
+DEDUPE_THRESHOLD = 0.95
+
+
+def serialized_write(method):
+    """
+    Decorator that runs a ToolManager method under the manager's write lock, so agents
+    sharing one manager from several threads never interleave writes to the repository.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.write_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def cosine_similarity(a, b):
+    """
+    Returns the cosine similarities between the rows of two embedding matrices.
+    """
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    a = a / np.maximum(np.linalg.norm(a, axis=-1, keepdims=True), 1e-12)
+    b = b / np.maximum(np.linalg.norm(b, axis=-1, keepdims=True), 1e-12)
+    return a @ b.T
+
+
+def is_better_tool(score, other_score):
+    """
+    Decides whether a tool with judge score `score` should replace a duplicate scored `other_score`.
+
+    Tools stored without a score (e.g. before scores were recorded, or added by hand) are kept.
+    """
+    if other_score is None:
+        return False
+    return score is not None and score > other_score
+
+
+def plan_compaction(names, embeddings, scores, threshold=DEDUPE_THRESHOLD):
+    """
+    Groups near-duplicate tools and picks the one to keep from each group.
+
+    Tools are visited from the best to the worst score (unscored tools first, since they are
+    kept); each tool not yet removed keeps every remaining tool whose description is more
+    similar than `threshold` as a duplicate to remove.
+
+    Args:
+        names (list[str]): The tool names.
+        embeddings (list[list[float]]): The description embeddings, in the same order.
+        scores (list): The judge scores, None where unknown.
+        threshold (float, optional): The cosine similarity above which tools are duplicates.
+
+    Returns:
+        dict: The name of each removed tool mapped to the name of the tool kept instead.
+    """
+    if not names:
+        return {}
+    similarity = cosine_similarity(embeddings, embeddings)
+    order = sorted(range(len(names)), key=lambda i: (scores[i] is not None, -(scores[i] or 0)))
+    removed = {}
+    for i in order:
+        if names[i] in removed:
+            continue
+        for j in order:
+            if j != i and names[j] not in removed and similarity[i][j] >= threshold:
+                removed[names[j]] = names[i]
+    return removed
+
 
 class ToolManager:
     """
@@ -37,6 +111,7 @@ class ToolManager:
         vectordb_path (str): The path to the vector database used for storing and retrieving
                              tool descriptions based on similarity.
         vectordb (Chroma): An instance of the Chroma class for managing the vector database.
+        write_lock (threading.RLock): Serializes the writes of agents sharing this manager.
 
     Note:
         The class uses OpenAI's `text-embedding-ada-002` model by default for generating embeddings
@@ -53,6 +128,7 @@ class ToolManager:
         # generated_tools: Store the mapping relationship between descriptions and tools (associated through task names)
         self.generated_tools = {}
         self.generated_tool_repo_dir = generated_tool_repo_dir
+        self.write_lock = threading.RLock()
         
         with open(f"{self.generated_tool_repo_dir}/generated_tools.json") as f2:
             self.generated_tools = json.load(f2)
@@ -62,6 +138,8 @@ class ToolManager:
             os.makedirs(self.vectordb_path)
         os.makedirs(f"{generated_tool_repo_dir}/tool_code", exist_ok=True)
         os.makedirs(f"{generated_tool_repo_dir}/tool_description", exist_ok=True)
+        write_tool_package(f"{generated_tool_repo_dir}/tool_code", self.generated_tools)
+        compile_tools(f"{generated_tool_repo_dir}/tool_code")
         # Utilize the Chroma database and employ OpenAI Embeddings for vectorization (default: text-embedding-ada-002)
         
         if EMBED_MODEL_TYPE == "OpenAI":
@@ -152,7 +230,8 @@ class ToolManager:
         return code    
 
 
-    def add_new_tool(self, info):
+    @serialized_write
+    def add_new_tool(self, info, embedding=None):
         """
         Adds a new tool to the tool manager, including updating the vector database
         and tool repository with the provided information.
@@ -166,7 +245,10 @@ class ToolManager:
 
         Args:
             info (dict): A dictionary containing the tool's information, which must
-                         include 'task_name', 'code', and 'description'.
+                         include 'task_name', 'code', and 'description', and may include
+                         the judge 'score' of the tool.
+            embedding (list[float], optional): The embedding of the description, if already
+                         computed by `embed_description`.
 
         Raises:
             AssertionError: If the vector database's count does not match the length
@@ -176,6 +258,7 @@ class ToolManager:
         program_name = info["task_name"]
         program_code = info["code"]
         program_description = info["description"]
+        program_score = info.get("score")
         print(
             f"\033[33m {program_name}:\n{program_description}\033[0m"
         )
@@ -184,21 +267,28 @@ class ToolManager:
             print(f"\033[33mTool {program_name} already exists. Rewriting!\033[0m")
             self.vectordb._collection.delete(ids=[program_name])
         # Store the new task code in the vector database and the tool dictionary
-        self.vectordb.add_texts(
-            texts=[program_description],
+        if embedding is None:
+            embedding = self.embed_description(program_description)
+        self.vectordb._collection.add(
             ids=[program_name],
+            embeddings=[embedding],
+            documents=[program_description],
             metadatas=[{"name": program_name}],
         )
         self.generated_tools[program_name] = {
             "code": program_code,
             "description": program_description,
         }
+        if program_score is not None:
+            self.generated_tools[program_name]["score"] = program_score
         assert self.vectordb._collection.count() == len(
             self.generated_tools
         ), "vectordb is not synced with generated_tools.json"
         # Store the new task code and description in the tool repo, and enter the mapping relationship into the dictionary
         with open(f"{self.generated_tool_repo_dir}/tool_code/{program_name}.py", "w") as fa:
             fa.write(program_code)
+        compile_tool(f"{self.generated_tool_repo_dir}/tool_code/{program_name}.py")
+        write_tool_package(f"{self.generated_tool_repo_dir}/tool_code", self.generated_tools)
         with open(f"{self.generated_tool_repo_dir}/tool_description/{program_name}.txt", "w") as fb:
             fb.write(program_description)
         with open(f"{self.generated_tool_repo_dir}/generated_tools.json", "w") as fc:
@@ -247,7 +337,8 @@ class ToolManager:
             return []
         print(f"\033[33mTool Manager retrieving for {k} Tools\033[0m")
         # Retrieve descriptions of the top k related tasks.
-        docs_and_scores = self.vectordb.similarity_search_with_score(query, k=k)
+        with tracer.span("retrieval", k=k):
+            docs_and_scores = self.vectordb.similarity_search_with_score(query, k=k)
         print(
             f"\033[33mTool Manager retrieved tools: "
             f"{', '.join([doc.metadata['name'] for doc, _ in docs_and_scores])}\033[0m"
@@ -298,6 +389,62 @@ class ToolManager:
         return tool_code
 
 
+    def embed_description(self, description):
+        """
+        Returns the embedding of a tool description, as stored in the vector database.
+        """
+        return self.vectordb._embedding_function.embed_documents([description])[0]
+
+    def find_duplicate(self, description, threshold=DEDUPE_THRESHOLD, embedding=None):
+        """
+        Finds the stored tool whose description is most similar to a new description.
+
+        Args:
+            description (str): The description of the new tool.
+            threshold (float, optional): The cosine similarity above which tools are duplicates.
+            embedding (list[float], optional): The embedding of the description, if already
+                computed by `embed_description`, so that it is not requested again.
+
+        Returns:
+            tuple: The name and similarity of the duplicate tool, or (None, 0.0) if there is none.
+        """
+        if self.vectordb._collection.count() == 0:
+            return None, 0.0
+        if embedding is None:
+            embedding = self.embed_description(description)
+        result = self.vectordb._collection.query(query_embeddings=[embedding], n_results=1,
+                                                 include=["embeddings"])
+        if not result["ids"] or not result["ids"][0]:
+            return None, 0.0
+        similarity = float(cosine_similarity([embedding], result["embeddings"][0])[0][0])
+        if similarity < threshold:
+            return None, similarity
+        return result["ids"][0][0], similarity
+
+    @serialized_write
+    def compact(self, threshold=DEDUPE_THRESHOLD, dry_run=False):
+        """
+        Removes near-duplicate tools from the repository, keeping the best-scoring tool of each group.
+
+        Args:
+            threshold (float, optional): The cosine similarity above which tools are duplicates.
+            dry_run (bool, optional): Only report the tools that would be removed.
+
+        Returns:
+            dict: The name of each removed tool mapped to the name of the tool kept instead.
+        """
+        stored = self.vectordb._collection.get(include=["embeddings"])
+        names = [name for name in stored["ids"] if name in self.generated_tools]
+        embeddings = [embedding for name, embedding in zip(stored["ids"], stored["embeddings"]) if name in self.generated_tools]
+        scores = [self.generated_tools[name].get("score") for name in names]
+        removed = plan_compaction(names, embeddings, scores, threshold)
+        for tool, kept in removed.items():
+            print(f"\033[33m {tool} duplicates {kept}{' (dry run)' if dry_run else ''} \033[0m")
+            if not dry_run:
+                self.delete_tool(tool)
+        return removed
+
+    @serialized_write
     def delete_tool(self, tool):
         """
         Deletes all information related to a specified tool from the tool manager.
@@ -319,6 +466,7 @@ class ToolManager:
         """
         if tool in self.generated_tools:
             self.vectordb._collection.delete(ids=[tool])
+            del self.generated_tools[tool]
             print(
             f"\033[33m delete {tool} from vectordb successfully! \033[0m"
             )              
@@ -339,6 +487,7 @@ class ToolManager:
             print(
             f"\033[33m delete {tool} code successfully! \033[0m"
             )
+        write_tool_package(f"{self.generated_tool_repo_dir}/tool_code", self.generated_tools)
         # del description
         description_path = f"{self.generated_tool_repo_dir}/tool_description/{tool}.txt"
         if os.path.exists(description_path):
@@ -441,27 +590,15 @@ def get_open_api_description_pair():
     """
     Extracts and returns a mapping of OpenAPI path names to their descriptions.
 
-    This function loads the OpenAPI specification from a 'openapi.json' file located
-    in the same directory as this script. It then iterates over the paths defined
-    in the OpenAPI specification, creating a dictionary that maps each path name
-    to its description (summary). If a path supports both 'get' and 'post' operations,
-    the description for the 'post' operation is preferred.
+    The mapping is served from the shared OpenAPI index of the 'openapi.json' file located
+    in the same directory as this script, which parses the file only once and again when it
+    changes. If a path supports both 'get' and 'post' operations, the description for the
+    'post' operation is preferred.
 
     Returns:
         dict: A dictionary mapping OpenAPI path names to their summary descriptions.
     """
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    open_api_path = os.path.join(script_dir, 'openapi.json')
-    with open(open_api_path, 'r') as file:
-        open_api_json = json.load(file)
-    open_api_dict = open_api_json['paths']
-    open_api_description_pair = {}
-    for name, value in open_api_dict.items():
-        if 'post' in value:
-            open_api_description_pair[name] = value['post']['summary']
-        else:
-            open_api_description_pair[name] = value['get']['summary']
-    return open_api_description_pair
+    return get_openapi_index(get_open_api_doc_path()).get_description_pair()
 
 
 def main():
@@ -481,6 +618,7 @@ def main():
     Usage:
         python script.py --add --tool_name <name> --tool_path <path>
         python script.py --delete --tool_name <name>
+        python script.py --compact [--threshold 0.95] [--dry_run]
 
     Raises:
         SystemExit: If no operation type is specified or required arguments are missing,
@@ -498,6 +636,12 @@ def main():
                         help='Name of the tool to be added or deleted')
     parser.add_argument('--tool_path', type=str,
                         help='Path of the tool to be added', required='--add' in sys.argv)
+    parser.add_argument('--compact', action='store_true',
+                        help='Flag to remove near-duplicate tools, keeping the best-scoring one')
+    parser.add_argument('--threshold', type=float, default=DEDUPE_THRESHOLD,
+                        help='Description similarity above which tools are duplicates')
+    parser.add_argument('--dry_run', action='store_true',
+                        help='Only list the tools compaction would remove')
 
     args = parser.parse_args()
 
@@ -507,6 +651,9 @@ def main():
         add_tool(toolManager, args.tool_name, args.tool_path)
     elif args.delete:
         delete_tool(toolManager, args.tool_name)
+    elif args.compact:
+        removed = toolManager.compact(args.threshold, args.dry_run)
+        print(f"{'Would remove' if args.dry_run else 'Removed'} {len(removed)} duplicate tools, {len(toolManager.generated_tools) - (len(removed) if args.dry_run else 0)} tools left.")
     else:
         print_error_and_exit("Please specify an operation type (add or del)")
 
@@ -0,0 +1,98 @@
+import os
+import py_compile
+import compileall
+
+
+# The `__init__.py` written into the tool_code directory, which makes the stored tools importable
+# as the `tool_code` package. Tools are imported lazily by `load`, so a kernel only pays for the
+# tools a step uses, and a tool file rewritten since its import is reloaded on the next `load`.
+TOOL_PACKAGE_INIT = '''"""
+The tools of the generated tool repository. This file is generated by the ToolManager.
+"""
+import os
+import sys
+import importlib
+
+TOOLS = {tools!r}
+
+_mtimes = {{}}
+
+
+def load(name):
+    """
+    Returns the tool class `name`, importing its module on first use and reloading
+    it when the tool file changed since.
+    """
+    module_name = __name__ + '.' + name
+    path = os.path.join(os.path.dirname(__file__), name + '.py')
+    mtime = os.path.getmtime(path)
+    module = sys.modules.get(module_name)
+    if module is None:
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            # The tool was written after the package was imported.
+            importlib.invalidate_caches()
+            module = importlib.import_module(module_name)
+    elif _mtimes.get(name) != mtime:
+        module = importlib.reload(module)
+    _mtimes[name] = mtime
+    return getattr(module, name)
+
+
+def preload():
+    """
+    Imports every tool, skipping the ones that fail to import.
+    """
+    for name in TOOLS:
+        try:
+            load(name)
+        except Exception:
+            pass
+'''
+
+
+def write_tool_package(tool_code_dir, tool_names):
+    """
+    Writes the `__init__.py` of the tool_code package, listing the given tools.
+
+    Args:
+        tool_code_dir (str): The tool_code directory of the generated tool repository.
+        tool_names (list): The names of the stored tools.
+    """
+    init_path = os.path.join(tool_code_dir, '__init__.py')
+    content = TOOL_PACKAGE_INIT.format(tools=sorted(tool_names))
+    if os.path.exists(init_path):
+        with open(init_path, 'r') as f:
+            if f.read() == content:
+                return
+    with open(init_path, 'w') as f:
+        f.write(content)
+
+
+def compile_tool(code_path):
+    """
+    Writes the bytecode of a tool file to __pycache__, so kernels importing it skip compiling.
+
+    Args:
+        code_path (str): The tool file.
+
+    Returns:
+        bool: Whether the tool compiled.
+    """
+    try:
+        py_compile.compile(code_path, doraise=True)
+        return True
+    except py_compile.PyCompileError as e:
+        print(f"\033[33mTool {os.path.basename(code_path)} does not compile: {e.msg}\033[0m")
+        return False
+
+
+def compile_tools(tool_code_dir):
+    """
+    Writes the bytecode of every tool file whose cache is missing or stale.
+
+    Args:
+        tool_code_dir (str): The tool_code directory of the generated tool repository.
+    """
+    compileall.compile_dir(tool_code_dir, maxlevels=0, quiet=2)
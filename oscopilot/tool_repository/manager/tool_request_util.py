@@ -1,9 +1,59 @@
 import requests
 import os
+import copy
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
+from oscopilot.utils.cassette import get_cassette
 
 load_dotenv(dotenv_path='.env', override=True)
-API_BASE_URL = os.getenv('API_BASE_URL') 
+API_BASE_URL = os.getenv('API_BASE_URL')
+# (connect, read) timeouts in seconds applied to every request.
+API_CONNECT_TIMEOUT = float(os.getenv('API_CONNECT_TIMEOUT', 10))
+API_READ_TIMEOUT = float(os.getenv('API_READ_TIMEOUT', 60))
+API_POOL_MAXSIZE = int(os.getenv('API_POOL_MAXSIZE', 16))
+# Seconds a GET response stays cached, 0 disables the cache.
+API_GET_CACHE_TTL = float(os.getenv('API_GET_CACHE_TTL', 0))
+API_GET_CACHE_SIZE = 256
+
+_session = None
+_session_lock = threading.Lock()
+_get_cache = {}
+_get_cache_lock = threading.Lock()
+
+
+def get_shared_session():
+    """
+    Returns the process-wide HTTP session, creating it on first use.
+
+    The session keeps a pool of keep-alive connections per host. Since it lives at module
+    level, it survives across code executions in the same (warm) Jupyter kernel, so later
+    API calls reuse the connections opened by earlier ones.
+
+    Returns:
+        requests.Session: The shared session.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=API_POOL_MAXSIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+
+def clear_get_cache():
+    """
+    Drops all cached GET responses.
+    """
+    with _get_cache_lock:
+        _get_cache.clear()
+
 
 class ToolRequestUtil:
     """
@@ -14,17 +64,26 @@ class ToolRequestUtil:
     designed to interact with APIs by sending GET or POST requests and handling file uploads.
 
     Attributes:
-        session (requests.Session): A requests session for making HTTP requests.
+        session (requests.Session): The shared, connection-pooling session for making HTTP requests.
         headers (dict): Default headers to be sent with each request.
         base_url (str): The base URL for the API endpoints.
+        timeout (tuple): The (connect, read) timeout in seconds applied to every request.
+        cache_ttl (float): Seconds a GET response is cached, 0 disables caching.
     """
-    def __init__(self):
+    def __init__(self, timeout=None, cache_ttl=None):
         """
-        Initializes the ToolRequestUtil with a session and default request headers.
+        Initializes the ToolRequestUtil with the shared session and default request headers.
+
+        Args:
+            timeout (float or tuple, optional): The request timeout. Defaults to
+                (`API_CONNECT_TIMEOUT`, `API_READ_TIMEOUT`).
+            cache_ttl (float, optional): Seconds a GET response is cached. Defaults to `API_GET_CACHE_TTL`.
         """
-        self.session = requests.session()
+        self.session = get_shared_session()
         self.headers = {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_11_4) AppleWebKit/537.36 (KHTML like Gecko) Chrome/52.0.2743.116 Safari/537.36'}
         self.base_url = API_BASE_URL
+        self.timeout = timeout if timeout is not None else (API_CONNECT_TIMEOUT, API_READ_TIMEOUT)
+        self.cache_ttl = cache_ttl if cache_ttl is not None else API_GET_CACHE_TTL
 
     def request(self, api_path, method, params=None, files=None, content_type="application/json"):
         """
@@ -32,7 +91,8 @@ class ToolRequestUtil:
 
         This method constructs the request URL from the base URL and the API path. It supports
         both GET and POST methods, including handling of JSON parameters, file uploads, and
-        different content types.
+        different content types. GET responses are served from the cache when `cache_ttl` is set.
+        When a cassette is configured, the response is recorded to or replayed from it.
 
         Args:
             api_path (str): The path of the API endpoint.
@@ -48,24 +108,106 @@ class ToolRequestUtil:
         Raises:
             Prints an error message to the console if an HTTP request error occurs.
         """
+        record = {
+            "api_path": api_path,
+            "method": method.lower(),
+            "params": params,
+            "files": {name: os.path.basename(value[0] if isinstance(value, (tuple, list)) else getattr(value, 'name', ''))
+                      for name, value in (files or {}).items()},
+            "content_type": content_type,
+        }
+        return get_cassette().call("tool_api", record,
+                                   lambda: self._request(api_path, method, params, files, content_type))
+
+    def _request(self, api_path, method, params, files, content_type):
+        """
+        Sends the request of `request` over the shared session.
+        """
         url = self.base_url + api_path
         try:
             if method.lower() == "get":
+                cache_key = self._cache_key(url, params, content_type)
+                result = self._get_cached(cache_key)
+                if result is not None:
+                    return result
                 if content_type == "application/json":
-                    result = self.session.get(url=url, json=params, headers=self.headers, timeout=60).json()
-                else: 
-                    result = self.session.get(url=url, params=params, headers=self.headers, timeout=60).json()
+                    result = self.session.get(url=url, json=params, headers=self.headers, timeout=self.timeout).json()
+                else:
+                    result = self.session.get(url=url, params=params, headers=self.headers, timeout=self.timeout).json()
+                self._put_cached(cache_key, result)
             elif method.lower() == "post":
                 if content_type == "multipart/form-data":
-                    result = self.session.post(url=url, files=files, data=params, headers=self.headers).json()
+                    result = self.session.post(url=url, files=files, data=params, headers=self.headers, timeout=self.timeout).json()
                 elif content_type == "application/json":
-                    result = self.session.post(url=url, json=params, headers=self.headers).json()
+                    result = self.session.post(url=url, json=params, headers=self.headers, timeout=self.timeout).json()
                 else:
-                    result = self.session.post(url=url, data=params, headers=self.headers).json()
+                    result = self.session.post(url=url, data=params, headers=self.headers, timeout=self.timeout).json()
             else:
                 print("request method error!")
                 return None
             return result
         except Exception as e:
             print("http request error: %s" % e)
-            return None
\ No newline at end of file
+            return None
+
+    def gather(self, requests_list, max_workers=None):
+        """
+        Sends several requests concurrently and returns their results in order.
+
+        The requests run on a thread pool over the shared session, so they reuse pooled
+        connections. Threads are used instead of an asyncio event loop because the code
+        runs inside a Jupyter kernel, which already owns a running loop.
+
+        Args:
+            requests_list (list[dict]): Keyword arguments of `request` for each call, e.g.
+                [{"api_path": "/tools/bing/searchv2", "method": "get", "params": {"query": "..."}}].
+            max_workers (int, optional): The maximum number of parallel requests.
+                Defaults to `API_POOL_MAXSIZE`.
+
+        Returns:
+            list: The results of the requests in the same order, None for failed ones.
+        """
+        if not requests_list:
+            return []
+        max_workers = min(max_workers or API_POOL_MAXSIZE, len(requests_list))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda kwargs: self.request(**kwargs), requests_list))
+
+    def _cache_key(self, url, params, content_type):
+        """
+        Builds the GET cache key, or returns None when caching is disabled or params are not serializable.
+        """
+        if self.cache_ttl <= 0:
+            return None
+        try:
+            return (url, content_type, json.dumps(params, sort_keys=True))
+        except (TypeError, ValueError):
+            return None
+
+    def _get_cached(self, key):
+        """
+        Returns a copy of a cached GET response that has not expired, or None.
+
+        A copy is returned so that a caller changing its response does not change later hits.
+        """
+        if key is None:
+            return None
+        with _get_cache_lock:
+            entry = _get_cache.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.cache_ttl:
+                del _get_cache[key]
+                return None
+            return copy.deepcopy(entry[1])
+
+    def _put_cached(self, key, result):
+        """
+        Caches a GET response, evicting the oldest entry when the cache is full.
+        """
+        if key is None or result is None:
+            return
+        with _get_cache_lock:
+            _get_cache[key] = (time.monotonic(), copy.deepcopy(result))
+            if len(_get_cache) > API_GET_CACHE_SIZE:
+                del _get_cache[next(iter(_get_cache))]
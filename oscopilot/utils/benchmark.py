@@ -0,0 +1,245 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from oscopilot.utils.config import Config
+from oscopilot.utils.usage import usage_ledger
+
+
+_worker_context = None
+
+
+def shard_of(task_id, num_shards):
+    """
+    Returns the shard a task belongs to.
+
+    The shard is derived from a hash of the task id, so every machine computes the same
+    assignment regardless of the order in which it loads the tasks.
+
+    Args:
+        task_id (str): The task id.
+        num_shards (int): The total number of shards.
+
+    Returns:
+        int: The shard index in [0, num_shards).
+    """
+    return int(hashlib.md5(str(task_id).encode('utf-8')).hexdigest(), 16) % num_shards
+
+
+def shard_results_path(results_path, num_shards=1, shard_index=0):
+    """
+    Returns the results file of one shard, e.g. 'results.shard0of4.jsonl'.
+    """
+    if num_shards <= 1:
+        return results_path
+    root, ext = os.path.splitext(results_path)
+    return f"{root}.shard{shard_index}of{num_shards}{ext or '.jsonl'}"
+
+
+def load_checkpoint(results_path, retry_incomplete=False):
+    """
+    Loads the results already written to a results file.
+
+    Args:
+        results_path (str): The JSONL results file.
+        retry_incomplete (bool, optional): Whether tasks that did not finish are run again.
+
+    Returns:
+        dict: The finished results keyed by task id.
+    """
+    done = {}
+    if not os.path.exists(results_path):
+        return done
+    with open(results_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            if retry_incomplete and result.get("status") != "complete":
+                continue
+            done[result["task_id"]] = result
+    return done
+
+
+def init_benchmark_worker(config_params, worker_root, setup):
+    """
+    Initializes a benchmark worker process.
+
+    Each worker gets its own configuration with a private working directory under
+    `worker_root`, so the agents of different workers never share files or kernels,
+    and then builds its task context (typically a FridayAgent) once with `setup`.
+
+    Args:
+        config_params (dict): The parsed command-line arguments of the main process.
+        worker_root (str): The directory holding the per-worker working directories.
+        setup (callable): A picklable function taking the worker's arguments and returning the task context.
+    """
+    global _worker_context
+    params = dict(config_params)
+    if worker_root:
+        params['working_dir'] = os.path.abspath(os.path.join(worker_root, 'worker_{}'.format(os.getpid())))
+        os.makedirs(params['working_dir'], exist_ok=True)
+        # Keeps the usage reports of the workers apart.
+        params['logging_prefix'] = '{}_worker{}'.format(params.get('logging_prefix'), os.getpid())
+    args = argparse.Namespace(**params)
+    Config._instance = None
+    Config.initialize(args)
+    logging.basicConfig(
+        filename=os.path.join(args.logging_filedir, '{}.worker{}'.format(args.logging_filename, os.getpid())),
+        level=logging.INFO,
+        format=f'[{args.logging_prefix}] %(asctime)s - %(levelname)s - %(message)s'
+    )
+    _worker_context = setup(args)
+
+
+def run_benchmark_task(task_fn, task_id, payload):
+    """
+    Runs one task in the current worker and measures its wall time and LLM token usage.
+
+    Args:
+        task_fn (callable): A picklable function `task_fn(context, payload)` returning a dict of results.
+        task_id (str): The task id.
+        payload (Any): The picklable task data passed to `task_fn`.
+
+    Returns:
+        dict: The task results with 'task_id', 'status', 'wall_time' and token counts added.
+    """
+    first_record = len(usage_ledger.records)
+    start = time.perf_counter()
+    try:
+        result = task_fn(_worker_context, payload)
+        status = result.pop("status", "complete")
+    except Exception as e:
+        result = {"error": f"{type(e).__name__}: {e}"}
+        status = "incomplete"
+    records = usage_ledger.records[first_record:]
+    result.update({
+        "task_id": task_id,
+        "status": status,
+        "wall_time": round(time.perf_counter() - start, 3),
+        "llm_calls": len(records),
+        "prompt_tokens": sum(r["prompt_tokens"] for r in records),
+        "completion_tokens": sum(r["completion_tokens"] for r in records),
+        "worker": os.getpid(),
+    })
+    return result
+
+
+class BenchmarkRunner:
+    """
+    Runs benchmark tasks on a pool of isolated agent worker processes.
+
+    Tasks are selected by shard and skipped if their task id is already in the shard's results
+    file, so an interrupted run resumes where it stopped and several machines can split a
+    dataset with `num_shards`/`shard_index`. Results are appended to the file as soon as each
+    task finishes.
+
+    Attributes:
+        results_path (str): The JSONL results file of this shard.
+        workers (int): The number of worker processes.
+        num_shards (int): The total number of shards.
+        shard_index (int): The shard handled by this runner.
+        retry_incomplete (bool): Whether incomplete tasks of a previous run are run again.
+    """
+    def __init__(self, results_path, workers=1, num_shards=1, shard_index=0, retry_incomplete=False, worker_root=None):
+        self.results_path = shard_results_path(results_path, num_shards, shard_index)
+        self.workers = max(1, workers)
+        self.num_shards = max(1, num_shards)
+        self.shard_index = shard_index
+        self.retry_incomplete = retry_incomplete
+        self.worker_root = worker_root
+
+    def pending(self, tasks):
+        """
+        Filters tasks down to the ones of this shard that have no result yet.
+
+        Args:
+            tasks (iterable): (task_id, payload) pairs.
+
+        Returns:
+            list: The pending (task_id, payload) pairs.
+        """
+        done = load_checkpoint(self.results_path, self.retry_incomplete)
+        return [(task_id, payload) for task_id, payload in tasks
+                if shard_of(task_id, self.num_shards) == self.shard_index and task_id not in done]
+
+    def run(self, tasks, task_fn, setup, config_params):
+        """
+        Runs the pending tasks and appends their results to the results file.
+
+        Args:
+            tasks (iterable): (task_id, payload) pairs.
+            task_fn (callable): A picklable function `task_fn(context, payload)` returning a dict.
+            setup (callable): A picklable function building the per-worker context from the arguments.
+            config_params (dict): The parsed command-line arguments, e.g. `vars(args)`.
+
+        Returns:
+            list[dict]: The results of the tasks run now.
+        """
+        pending = self.pending(tasks)
+        print("{} tasks pending in shard {}/{}, running on {} workers".format(
+            len(pending), self.shard_index, self.num_shards, self.workers))
+        if not pending:
+            return []
+        os.makedirs(os.path.dirname(os.path.abspath(self.results_path)), exist_ok=True)
+        results = []
+        with open(self.results_path, 'a', encoding='utf-8') as file:
+            def write(result):
+                results.append(result)
+                file.write(json.dumps(result, ensure_ascii=False) + '\n')
+                file.flush()
+                print("Task {} {} in {:.1f}s ({}/{})".format(
+                    result["task_id"], result["status"], result["wall_time"], len(results), len(pending)))
+
+            if self.workers == 1:
+                init_benchmark_worker(config_params, self.worker_root, setup)
+                for task_id, payload in pending:
+                    write(run_benchmark_task(task_fn, task_id, payload))
+            else:
+                # Spawned (not forked) workers, since the parent may already run threads and kernels.
+                with ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                         initializer=init_benchmark_worker,
+                                         initargs=(config_params, self.worker_root, setup)) as executor:
+                    futures = [executor.submit(run_benchmark_task, task_fn, task_id, payload)
+                               for task_id, payload in pending]
+                    for future in as_completed(futures):
+                        write(future.result())
+        return results
+
+
+def consolidate_results(results_paths, summary_path=None):
+    """
+    Merges results files (e.g. of all shards) into one summary.
+
+    Args:
+        results_paths (list[str]): The JSONL results files.
+        summary_path (str, optional): Where to write the summary as JSON.
+
+    Returns:
+        dict: Totals (tasks, correct, accuracy, incomplete, wall time, tokens) and the per-task results.
+    """
+    tasks = {}
+    for path in results_paths:
+        if os.path.exists(path):
+            tasks.update(load_checkpoint(path))
+    results = sorted(tasks.values(), key=lambda r: str(r["task_id"]))
+    total = len(results)
+    correct = sum(1 for r in results if r.get("correct"))
+    summary = {
+        "tasks": total,
+        "correct": correct,
+        "accuracy": correct / total if total else 0.0,
+        "incomplete": sum(1 for r in results if r.get("status") != "complete"),
+        "wall_time": round(sum(r.get("wall_time", 0) for r in results), 3),
+        "prompt_tokens": sum(r.get("prompt_tokens", 0) for r in results),
+        "completion_tokens": sum(r.get("completion_tokens", 0) for r in results),
+        "results": results,
+    }
+    if summary_path:
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    return summary
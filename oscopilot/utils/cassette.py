@@ -0,0 +1,173 @@
+import os
+import json
+import hashlib
+import threading
+from collections import deque
+
+
+# The settings are read from the environment so that they reach the Jupyter kernels,
+# which run the generated API-calling code in separate processes.
+CASSETTE_PATH_ENV = 'OSCOPILOT_CASSETTE'
+CASSETTE_MODE_ENV = 'OSCOPILOT_CASSETTE_MODE'
+CASSETTE_MATCH_ENV = 'OSCOPILOT_CASSETTE_MATCH'
+CASSETTE_MODES = ('off', 'record', 'replay')
+
+
+class CassetteMissError(Exception):
+    """
+    Raised in replay mode when a request has no recorded response.
+    """
+    pass
+
+
+class Cassette:
+    """
+    Records external calls (LLM chats, tool API requests, web page loads) to a JSONL file and
+    replays them.
+
+    Every interaction is stored as one line holding its kind, a hash of the canonical request,
+    the request and the response. Appending single lines keeps the file consistent when the
+    agent process and its kernels record at the same time.
+
+    In replay mode a request is answered with the recorded responses of the same hash, in the
+    order they were recorded. With the 'sequence' match policy, a request whose hash was not
+    recorded (e.g. because a prompt embeds a timestamp) gets the next unused response of the
+    same kind instead.
+
+    Attributes:
+        path (str): The cassette file.
+        mode (str): 'off', 'record' or 'replay'.
+        match (str): 'exact' or 'sequence'.
+    """
+    def __init__(self, path=None, mode='off', match='exact'):
+        self.path = path
+        self.mode = mode if path else 'off'
+        self.match = match
+        self._lock = threading.Lock()
+        self._by_key = {}
+        self._by_kind = {}
+        self._used = set()
+        if self.mode == 'replay':
+            self._load()
+
+    def _load(self):
+        """
+        Indexes the recorded interactions by request hash and by kind.
+        """
+        if not os.path.exists(self.path):
+            raise CassetteMissError(f"Cassette file {self.path} does not exist.")
+        with open(self.path, 'r') as f:
+            for index, line in enumerate(f):
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                item = (index, entry['response'])
+                self._by_key.setdefault(entry['key'], deque()).append(item)
+                self._by_kind.setdefault(entry['kind'], deque()).append(item)
+
+    @staticmethod
+    def request_key(kind, request):
+        """
+        Returns the hash identifying a request.
+
+        Args:
+            kind (str): The kind of interaction, e.g. 'llm', 'tool_api' or 'web'.
+            request (dict): The JSON-serializable request.
+
+        Returns:
+            str: The SHA-256 hex digest of the canonical request.
+        """
+        canonical = json.dumps({"kind": kind, "request": request}, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def call(self, kind, request, func):
+        """
+        Performs, records or replays one interaction.
+
+        Args:
+            kind (str): The kind of interaction.
+            request (dict): The JSON-serializable request that identifies the interaction.
+            func (callable): A zero-argument function performing the real call and returning
+                a JSON-serializable response.
+
+        Returns:
+            Any: The live or replayed response.
+
+        Raises:
+            CassetteMissError: In replay mode, if no recorded response matches.
+        """
+        if self.mode == 'off':
+            return func()
+        key = self.request_key(kind, request)
+        if self.mode == 'replay':
+            return self._replay(kind, key, request)
+        response = func()
+        line = json.dumps({"kind": kind, "key": key, "request": request, "response": response},
+                          ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(line + '\n')
+        return response
+
+    def _replay(self, kind, key, request):
+        """
+        Returns the next unused recorded response for a request.
+        """
+        with self._lock:
+            for queue in ([self._by_key.get(key)] +
+                          ([self._by_kind.get(kind)] if self.match == 'sequence' else [])):
+                while queue:
+                    index, response = queue[0]
+                    if index in self._used:
+                        queue.popleft()
+                        continue
+                    self._used.add(index)
+                    queue.popleft()
+                    return response
+        raise CassetteMissError(f"No recorded {kind} response for request {json.dumps(request, default=str)[:200]}")
+
+
+_cassette = None
+_cassette_settings = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette():
+    """
+    Returns the process-wide cassette configured by the environment.
+
+    The cassette is rebuilt if `OSCOPILOT_CASSETTE`, `OSCOPILOT_CASSETTE_MODE` or
+    `OSCOPILOT_CASSETTE_MATCH` changed since it was created.
+
+    Returns:
+        Cassette: The cassette; its mode is 'off' unless configured.
+    """
+    global _cassette, _cassette_settings
+    settings = (os.getenv(CASSETTE_PATH_ENV), os.getenv(CASSETTE_MODE_ENV, 'off'), os.getenv(CASSETTE_MATCH_ENV, 'exact'))
+    with _cassette_lock:
+        if _cassette is None or settings != _cassette_settings:
+            _cassette = Cassette(*settings)
+            _cassette_settings = settings
+        return _cassette
+
+
+def configure_cassette(path, mode, match='exact'):
+    """
+    Sets the cassette for this process and the kernels it starts afterwards.
+
+    Args:
+        path (str): The cassette file.
+        mode (str): 'off', 'record' or 'replay'.
+        match (str, optional): 'exact' or 'sequence'. Defaults to 'exact'.
+
+    Returns:
+        Cassette: The configured cassette.
+    """
+    if path:
+        path = os.path.abspath(path)
+        if mode == 'record':
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.environ[CASSETTE_PATH_ENV] = path
+    os.environ[CASSETTE_MODE_ENV] = mode
+    os.environ[CASSETTE_MATCH_ENV] = match
+    return get_cassette()
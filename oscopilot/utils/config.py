@@ -2,6 +2,7 @@ import os
 import argparse
 import logging
 from oscopilot.utils.utils import random_string, get_project_root_path
+from oscopilot.utils.cassette import configure_cassette
 import dotenv
 import sys
 
@@ -63,23 +64,60 @@ def setup_config():
     parser.add_argument('--logging_filename', type=str, default='temp0325.log', help='log file name')
     parser.add_argument('--logging_prefix', type=str, default=random_string(16), help='log file prefix')
     parser.add_argument('--score', type=int, default=8, help='critic score > score => store the tool')
+    parser.add_argument('--dedupe_threshold', type=float, default=0.95, help='description similarity above which a new tool duplicates a stored one and only the better-scoring one is kept, 0 disables')
+    parser.add_argument('--reuse_threshold', type=float, default=0.9, help='description similarity above which a stored tool is called directly for a subtask instead of generating new code, 0 disables')
+    parser.add_argument('--warm_kernel', action='store_true', help='keep the Python kernel running between steps, so imports and loaded tools are reused')
+    parser.add_argument('--step_timeout', type=int, default=600, help='wall-clock seconds a step may run before its kernel or shell is killed and restarted, 0 means unlimited')
+    parser.add_argument('--step_memory_limit', type=int, default=0, help='memory limit in MB of each kernel and shell process, set with setrlimit, 0 means unlimited')
+    parser.add_argument('--step_cpu_limit', type=int, default=0, help='CPU seconds each step may use, measured over the kernel or shell and the processes they start, 0 means unlimited')
+    parser.add_argument('--step_cgroup', action='store_true', help='also run each kernel and shell process in a systemd scope whose cgroup caps its memory and CPU share')
+    parser.add_argument('--step_cpu_quota', type=int, default=0, help='CPU share of each kernel and shell process with --step_cgroup, in percent of one CPU, 0 means unlimited')
+    parser.add_argument('--object_handoff', action='store_true', help='bind the return value of each subtask to a variable of the Python kernel and give later subtasks its name and a summary instead of the full value; keeps the kernel warm')
+    parser.add_argument('--kernel_pool_size', type=int, default=0, help='number of Python kernels started ahead of time with the tool library preloaded, 0 disables the pool')
+    parser.add_argument('--active_line_mode', type=str, default='statement', choices=['off', 'top', 'trace', 'statement'], help='how the Python kernel reports the line being executed: not at all, markers before top-level statements, a line hook installed once per kernel, or markers before every statement (the default, as before)')
+    parser.add_argument('--workdir_checkpoints', action='store_true', help='snapshot the working dir before each subtask and restore it before each repair attempt')
+    parser.add_argument('--checkpoint_dir', type=str, default=None, help='directory outside the working dir in which each environment creates a private store for its snapshots, the system temporary directory by default')
+    parser.add_argument('--checkpoint_max_mb', type=int, default=100, help='files larger than this many MB are not snapshotted')
+    parser.add_argument('--output_limit', type=int, default=20000, help='max characters of a step output kept in memory and shown to the LLM, the head and tail are kept; 0 means unlimited')
+    parser.add_argument('--output_log_dir', type=str, default='log/step_outputs', help='directory the full output of a step is written to when it exceeds output_limit')
+    parser.add_argument('--dir_listing_mode', type=str, default='summary', choices=['full', 'summary', 'diff'], help='how the working dir is shown to the LLM after each step: every entry, a bounded summary, or the changes since the previous step')
+    parser.add_argument('--dir_listing_limit', type=int, default=200, help='max number of working dir entries shown in summary and diff mode')
+    parser.add_argument('--trace', action='store_true', help='record spans of planning, execution, LLM calls and retrieval')
+    parser.add_argument('--trace_dir', type=str, default='log/traces', help='directory the traces are written to as OpenTelemetry JSON')
+    parser.add_argument('--token_budget', type=int, default=0, help='max prompt + completion tokens of a run, 0 means unlimited')
+    parser.add_argument('--budget_action', type=str, default='abort', choices=['abort', 'downgrade'], help='what to do once the token budget is used up')
+    parser.add_argument('--downgrade_model', type=str, default=None, help='model used after the budget is used up when budget_action is downgrade')
+    parser.add_argument('--structured_output', action='store_true', help='ask the LLM for the task graph, judgements, error analyses and repairs through function calling (format: json with Ollama), validated against their schemas, instead of parsing JSON out of free-form text')
+    parser.add_argument('--cassette', type=str, default=None, help='cassette file recording LLM, tool API and web responses')
+    parser.add_argument('--cassette_mode', type=str, default='off', choices=['off', 'record', 'replay'], help='record responses to the cassette or replay them offline')
+    parser.add_argument('--cassette_match', type=str, default='exact', choices=['exact', 'sequence'], help='replay by exact request, or fall back to the next recorded response of the same kind')
 
 
     # for Self-Leanring
     parser.add_argument('--software_name', type=str, default='Excel', help='The name of the software used for learning.')
     parser.add_argument('--package_name', type=str, default='openpyxl', help='The name of the package used for learning.')
     parser.add_argument('--demo_file_path', type=str, default=get_project_root_path() + 'working_dir/Invoices.xlsx', help='Entering the path of the demo file helps you design the course, or leave it empty if not applicable.')
+    parser.add_argument('--lesson_workers', type=int, default=1, help='number of lessons of a course learned at the same time, each by its own agent')
 
 
     # for GAIA
     parser.add_argument('--dataset_cache', type=str, default=None, help='Path to the dataset cache folder')
-    parser.add_argument('--level', type=int, default=1, help='Specifies the level of the GAIA dataset to use. Valid options are 1, 2, or 3')
+    parser.add_argument('--level', type=str, default='1', choices=['1', '2', '3', 'all'], help='Specifies the level of the GAIA dataset to use. Valid options are 1, 2, 3, or all')
     parser.add_argument('--dataset_type', type=str, default='test', help='Defines the type of dataset to use, either `validation` for development or `test` for testing purposes')
-    parser.add_argument('--gaia_task_id', type=str, default=None, help='GAIA dataset task_id')
+    parser.add_argument('--dataset_snapshot', type=str, default=None, help='Local snapshot of the GAIA dataset, created on first use and then loaded without network access')
+    parser.add_argument('--gaia_task_id', type=str, default=None, help='GAIA dataset task_id, or several comma-separated task_ids to rerun')
 
 
     # for SheetCopilot
-    parser.add_argument('--sheet_task_id', type=int, default=1, help='sheet task dataset task id')
+    parser.add_argument('--sheet_task_id', type=int, default=None, help='sheet task dataset task id, runs all tasks if not given')
+
+
+    # for benchmark runners
+    parser.add_argument('--workers', type=int, default=1, help='number of agent worker processes running benchmark tasks in parallel')
+    parser.add_argument('--num_shards', type=int, default=1, help='number of shards the benchmark tasks are split into, e.g. one per machine')
+    parser.add_argument('--shard_index', type=int, default=0, help='the shard of the benchmark tasks run by this process')
+    parser.add_argument('--results_path', type=str, default=None, help='JSONL file the benchmark results are appended to; finished tasks in it are skipped')
+    parser.add_argument('--retry_incomplete', action='store_true', help='run again the tasks recorded as incomplete in the results file')
 
     # Check if the script is being run in a test environment
     if 'pytest' in sys.modules:
@@ -92,6 +130,9 @@ def setup_config():
 
     Config.initialize(args)
 
+    if args.cassette_mode != 'off':
+        configure_cassette(args.cassette, args.cassette_mode, args.cassette_match)
+
     if not os.path.exists(args.logging_filedir):
         os.mkdir(args.logging_filedir)
 
@@ -0,0 +1,121 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+
+
+class CourseLog:
+    """
+    An append-only log of the lessons designed and learned during self-learning.
+
+    Every event is one JSON line, `{"name", "lesson", "status", "time"}` with status
+    'designed' or 'completed', so recording a lesson costs one append regardless of how
+    long learning has been running. Reopening the log replays it once to rebuild:
+
+    - the names of the completed lessons,
+    - the designed lessons that were not completed yet,
+    - a ring buffer of the most recently designed lessons, used as the prior course in prompts.
+
+    A course file of the old format (one JSON object of all lessons) found next to the log is
+    imported as completed lessons on first use.
+
+    Attributes:
+        path (str): The JSONL log file.
+        completed (set): The names of the completed lessons.
+        pending (dict): The designed but not yet completed lessons, by name.
+        recent (collections.deque): The (name, lesson) pairs of the most recently designed lessons.
+    """
+    def __init__(self, path, window=50):
+        """
+        Opens the log, replaying the existing entries.
+
+        Args:
+            path (str): The JSONL log file; created if it does not exist.
+            window (int, optional): The number of recent lessons kept for prompts. Defaults to 50.
+        """
+        self.path = path
+        self.completed = set()
+        self.pending = {}
+        self.recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if os.path.exists(path):
+            self._replay()
+        self._file = open(path, 'a', encoding='utf-8')
+        legacy_path = os.path.splitext(path)[0] + '.json'
+        if not self.recent and os.path.exists(legacy_path):
+            with open(legacy_path, 'r', encoding='utf-8') as f:
+                legacy_course = json.load(f)
+            # The old format only kept lessons of finished rounds.
+            if isinstance(legacy_course, dict):
+                self.record_course(legacy_course)
+                for name in legacy_course:
+                    self.mark_completed(name)
+
+    def _replay(self):
+        """
+        Rebuilds the indexes from the log file.
+        """
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A line cut short by an interrupted run.
+                    continue
+                self._apply(entry["name"], entry.get("lesson", ""), entry["status"])
+
+    def _apply(self, name, lesson, status):
+        if status == 'designed':
+            self.recent.append((name, lesson))
+            if name not in self.completed:
+                self.pending[name] = lesson
+        elif status == 'completed':
+            self.completed.add(name)
+            self.pending.pop(name, None)
+
+    def _append(self, name, lesson, status):
+        line = json.dumps({"name": name, "lesson": lesson, "status": status, "time": time.time()}, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+            self._apply(name, lesson, status)
+
+    def record_course(self, course):
+        """
+        Records the lessons of a newly designed course.
+
+        Args:
+            course (dict): The lessons by name.
+        """
+        for name, lesson in course.items():
+            self._append(name, lesson, 'designed')
+
+    def mark_completed(self, name):
+        """
+        Records that a lesson was learned.
+
+        Args:
+            name (str): The lesson name.
+        """
+        self._append(name, '', 'completed')
+
+    def prior_course(self):
+        """
+        Returns the most recently designed lessons, oldest first.
+
+        Returns:
+            dict: The lessons by name.
+        """
+        with self._lock:
+            return dict(self.recent)
+
+    def close(self):
+        """
+        Closes the log file.
+        """
+        with self._lock:
+            self._file.close()
@@ -5,6 +5,10 @@ import time
 import requests
 import json
 from dotenv import load_dotenv
+from oscopilot.utils.tracing import tracer
+from oscopilot.utils.usage import usage_ledger
+from oscopilot.utils.cassette import get_cassette
+from oscopilot.utils.structured_output import function_tool, schema_instruction
 
 
 load_dotenv(dotenv_path='.env', override=True)
@@ -41,7 +45,7 @@ class OpenAI:
 
         self.model_name = MODEL_NAME
 
-    def chat(self, messages, temperature=0, prefix=""):
+    def chat(self, messages, temperature=0, prefix="", schema=None):
         """
         Sends a chat completion request to the OpenAI API using the specified messages and parameters.
 
@@ -52,22 +56,61 @@ class OpenAI:
                                      each message.
             temperature (float, optional): Controls randomness in the generation. Lower values
                                            make the model more deterministic. Defaults to 0.
+            prefix (str, optional): A label of the calling phase, used in logs and traces.
+            schema (str, optional): The name of a schema in `structured_output.SCHEMAS`. The model
+                                    is then made to call the function of that schema, and its
+                                    JSON arguments are returned.
 
         Returns:
             str: The content of the first message in the response from the OpenAI API.
 
         """
-        response = openai.chat.completions.create(
-            model=self.model_name,
-            messages=messages,
-            temperature=temperature
-        )
+        model_name = usage_ledger.select_model(self.model_name)
+        request = {"model": model_name, "messages": messages, "temperature": temperature}
+        if schema is not None:
+            request["schema"] = schema
+        with tracer.span("llm.chat", model=model_name, prefix=prefix.strip()) as span:
+            start = time.perf_counter()
+            reply = get_cassette().call("llm", request, lambda: self._complete(model_name, messages, temperature, schema))
+            span.set_attribute("prompt_tokens", reply["prompt_tokens"])
+            span.set_attribute("completion_tokens", reply["completion_tokens"])
+        usage_ledger.record(model_name, reply["prompt_tokens"], reply["completion_tokens"], time.perf_counter() - start, prefix)
 
         if len(prefix) > 0 and prefix[-1] != " ":
             prefix += " "
-        logging.info(f"{prefix}Response: {response.choices[0].message.content}")
+        logging.info(f"{prefix}Response: {reply['content']}")
 
-        return response.choices[0].message.content
+        return reply["content"]
+
+    def _complete(self, model_name, messages, temperature, schema=None):
+        """
+        Calls the chat completion API, forcing a call of the schema's function if a schema is given.
+
+        Returns:
+            dict: The message content, or the function arguments, and the prompt and completion token counts.
+        """
+        if schema is None:
+            response = openai.chat.completions.create(
+                model=model_name,
+                messages=messages,
+                temperature=temperature
+            )
+            content = response.choices[0].message.content
+        else:
+            response = openai.chat.completions.create(
+                model=model_name,
+                messages=messages,
+                temperature=temperature,
+                tools=[function_tool(schema)],
+                tool_choice={"type": "function", "function": {"name": schema}}
+            )
+            tool_calls = response.choices[0].message.tool_calls
+            content = tool_calls[0].function.arguments if tool_calls else response.choices[0].message.content
+        return {
+            "content": content,
+            "prompt_tokens": response.usage.prompt_tokens if response.usage is not None else 0,
+            "completion_tokens": response.usage.completion_tokens if response.usage is not None else 0,
+        }
 
 
 class OLLAMA:
@@ -96,7 +139,7 @@ class OLLAMA:
 
         self.llama_serve = MODEL_SERVER + "/api/chat"
 
-    def chat(self, messages, temperature=0):
+    def chat(self, messages, temperature=0, prefix="", schema=None):
         """
         Sends a chat completion request to the OpenAI API using the specified messages and parameters.
 
@@ -107,30 +150,63 @@ class OLLAMA:
                                      each message.
             temperature (float, optional): Controls randomness in the generation. Lower values
                                            make the model more deterministic. Defaults to 0.
+            prefix (str, optional): A label of the calling phase, used in logs and traces.
+            schema (str, optional): The name of a schema in `structured_output.SCHEMAS`. The model
+                                    is then told the schema and constrained to JSON output with
+                                    `format: json`.
 
         Returns:
             str: The content of the first message in the response from the OpenAI API.
 
         """
+        model_name = usage_ledger.select_model(self.model_name)
         payload = {
-            "model": self.model_name,
+            "model": model_name,
             "messages": messages,
             "stream": False
             
         }
+        if schema is not None:
+            payload["messages"] = messages + [{"role": "system", "content": schema_instruction(schema)}]
+            payload["format"] = "json"
+
+        with tracer.span("llm.chat", model=model_name, prefix=prefix.strip()) as span:
+            start = time.perf_counter()
+            reply = get_cassette().call("llm", payload, lambda: self._complete(payload))
+            if reply["status_code"] == 200:
+                span.set_attribute("prompt_tokens", reply["prompt_tokens"])
+                span.set_attribute("completion_tokens", reply["completion_tokens"])
+                usage_ledger.record(model_name, reply["prompt_tokens"], reply["completion_tokens"],
+                                    time.perf_counter() - start, prefix)
+
+        if reply["status_code"] == 200:
+            # Get the response data
+            logging.info(f"""Response: {reply["content"]}""")
+            return reply["content"]
+        else:
+            logging.error("Failed to call LLM: %s", reply["status_code"])
+            return ""
 
+    def _complete(self, payload):
+        """
+        Calls the Ollama chat API.
+
+        Returns:
+            dict: The HTTP status code, the message content and the prompt and completion token counts.
+        """
         headers = {
                 "Content-Type": "application/json"}
 
         response = requests.post(self.llama_serve, data=json.dumps(payload),headers=headers)
-
-        if response.status_code == 200:
-            # Get the response data
-            logging.info(f"""Response: {response.json()["message"]["content"]}""")
-            return response.json()["message"]["content"]
-        else:
-            logging.error("Failed to call LLM: ", response.status_code)
-            return ""
+        if response.status_code != 200:
+            return {"status_code": response.status_code, "content": "", "prompt_tokens": 0, "completion_tokens": 0}
+        data = response.json()
+        return {
+            "status_code": 200,
+            "content": data["message"]["content"],
+            "prompt_tokens": data.get("prompt_eval_count", 0),
+            "completion_tokens": data.get("eval_count", 0),
+        }
 
 def main():
     start_time = time.time()
@@ -0,0 +1,313 @@
+import json
+
+
+FENCE = '```'
+
+
+class ResponseParser:
+    """
+    A single-pass parser of LLM responses, which can be fed the response as it streams in.
+
+    It collects the fenced code blocks (```lang ... ```) and the contents of the given tag pairs,
+    e.g. <invoke>...</invoke>. The code blocks and every tag pair are scanned by their own cursor,
+    which only moves forward, so the response is read once however many tags are extracted, and
+    text that no cursor needs anymore is dropped.
+
+    Attributes:
+        blocks (list): The (language, code) pairs of the closed code blocks, language lowercased
+            and '' if the fence has none.
+        tags (dict): The contents of each (begin, end) tag pair, in order.
+    """
+    def __init__(self, tags=()):
+        self.blocks = []
+        self.tags = {tag: [] for tag in tags}
+        self._text = ''
+        self._base = 0
+        self._fence_pos = 0
+        # The open block: (language, start of its code), or None.
+        self._open_block = None
+        self._tag_pos = {tag: 0 for tag in tags}
+        # The start of the content of each open tag.
+        self._open_tags = {}
+        self._closed = False
+
+    def _find(self, sub, start):
+        index = self._text.find(sub, start - self._base)
+        return -1 if index == -1 else index + self._base
+
+    def _slice(self, start, end):
+        return self._text[start - self._base:end - self._base]
+
+    def feed(self, chunk):
+        """
+        Adds the next part of the response.
+
+        Args:
+            chunk (str): The text received.
+        """
+        self._text += chunk
+        self._scan_blocks()
+        for tag in self.tags:
+            self._scan_tag(tag)
+        self._trim()
+
+    def close(self):
+        """
+        Ends the response. A code block left open is kept, since responses are often cut off
+        before the closing fence.
+
+        Returns:
+            ResponseParser: The parser itself.
+        """
+        if not self._closed:
+            self._closed = True
+            if self._open_block is not None:
+                language, start = self._open_block
+                self.blocks.append((language, self._slice(start, self._base + len(self._text))))
+                self._open_block = None
+        return self
+
+    def _scan_blocks(self):
+        end_of_text = self._base + len(self._text)
+        while True:
+            if self._open_block is None:
+                fence = self._find(FENCE, self._fence_pos)
+                if fence == -1:
+                    # A fence may be split across chunks.
+                    self._fence_pos = max(self._fence_pos, end_of_text - len(FENCE) + 1)
+                    return
+                line_end = self._find('\n', fence + len(FENCE))
+                if line_end == -1:
+                    # Wait for the rest of the language line.
+                    self._fence_pos = fence
+                    return
+                language = self._slice(fence + len(FENCE), line_end).strip().lower()
+                self._open_block = (language, line_end + 1)
+                self._fence_pos = line_end + 1
+            else:
+                fence = self._find(FENCE, self._fence_pos)
+                if fence == -1:
+                    self._fence_pos = max(self._fence_pos, end_of_text - len(FENCE) + 1)
+                    return
+                language, start = self._open_block
+                self.blocks.append((language, self._slice(start, fence)))
+                self._open_block = None
+                self._fence_pos = fence + len(FENCE)
+
+    def _scan_tag(self, tag):
+        begin_str, end_str = tag
+        end_of_text = self._base + len(self._text)
+        while True:
+            if tag not in self._open_tags:
+                begin = self._find(begin_str, self._tag_pos[tag])
+                if begin == -1:
+                    # A tag may be split across chunks.
+                    self._tag_pos[tag] = max(self._tag_pos[tag], end_of_text - len(begin_str) + 1)
+                    return
+                self._open_tags[tag] = begin + len(begin_str)
+                self._tag_pos[tag] = begin + len(begin_str)
+            start = self._open_tags[tag]
+            end = self._find(end_str, self._tag_pos[tag])
+            if end == -1:
+                self._tag_pos[tag] = max(self._tag_pos[tag], end_of_text - len(end_str) + 1)
+                return
+            self.tags[tag].append(self._slice(start, end))
+            del self._open_tags[tag]
+            self._tag_pos[tag] = end + len(end_str)
+
+    def _trim(self):
+        keep = min([self._fence_pos] + list(self._tag_pos.values()) + list(self._open_tags.values()))
+        if self._open_block is not None:
+            keep = min(keep, self._open_block[1])
+        if keep - self._base > 4096:
+            self._text = self._text[keep - self._base:]
+            self._base = keep
+
+
+def parse_response(text, tags=()):
+    """
+    Parses a complete response.
+
+    Args:
+        text (str): The response.
+        tags (iterable, optional): The (begin, end) tag pairs to extract.
+
+    Returns:
+        ResponseParser: The closed parser holding the blocks and tags.
+    """
+    parser = ResponseParser(tags)
+    parser.feed(text)
+    return parser.close()
+
+
+def extract_tag(text, begin_str, end_str):
+    """
+    Returns the contents of every `begin_str ... end_str` pair of a response, in order.
+    """
+    tag = (begin_str, end_str)
+    return parse_response(text, [tag]).tags[tag]
+
+
+def extract_code(text, language=None):
+    """
+    Returns the code of the first fenced block of the given language, or of the first fenced
+    block of any language if there is none.
+
+    Args:
+        text (str): The response.
+        language (str, optional): The language of the wanted block, e.g. 'python'.
+
+    Returns:
+        str: The code, or None if the response has no code block.
+    """
+    blocks = parse_response(text).blocks
+    if language is not None:
+        for block_language, code in blocks:
+            if block_language == language.lower():
+                return code
+    if blocks:
+        return blocks[0][1]
+    return None
+
+
+def repair_json(text):
+    """
+    Fixes the usual formatting drift of JSON written by an LLM, outside of strings: trailing
+    commas, Python's True/False/None, and strings, objects and arrays left open by a cut-off
+    response.
+
+    Args:
+        text (str): The JSON text.
+
+    Returns:
+        str: The repaired text.
+    """
+    literals = {'True': 'true', 'False': 'false', 'None': 'null'}
+    out = []
+    stack = []
+    in_string = False
+    escaped = False
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+            i += 1
+            continue
+        if char == '"':
+            in_string = True
+        elif char in '{[':
+            stack.append('}' if char == '{' else ']')
+        elif char in '}]':
+            # Drop a comma right before the closing bracket.
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ',':
+                out.pop()
+            if stack:
+                stack.pop()
+        elif char.isalpha():
+            j = i
+            while j < len(text) and (text[j].isalnum() or text[j] == '_'):
+                j += 1
+            word = text[i:j]
+            out.append(literals.get(word, word))
+            i = j
+            continue
+        out.append(char)
+        i += 1
+    if in_string:
+        out.append('"')
+    while out and (out[-1].isspace() or out[-1] in ',:'):
+        out.pop()
+    out.extend(reversed(stack))
+    return ''.join(out)
+
+
+def _balanced_end(text):
+    """
+    Returns the index just past the bracket closing the one `text` starts with, or the length
+    of `text` if it is never closed. Brackets inside strings are ignored.
+    """
+    depth = 0
+    in_string = False
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if in_string:
+            if char == '\\':
+                i += 1
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '{[':
+            depth += 1
+        elif char in '}]':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return len(text)
+
+
+def _json_candidates(text):
+    """
+    Yields the texts that may hold the JSON of a response: ```json blocks first, then other
+    blocks that look like JSON, then the JSON value starting at the first '{' or '['.
+    """
+    blocks = parse_response(text).blocks
+    for language, code in blocks:
+        if language == 'json':
+            yield code
+    for language, code in blocks:
+        if language != 'json' and code.lstrip().startswith(('{', '[')):
+            yield code
+    starts = [index for index in (text.find('{'), text.find('[')) if index != -1]
+    if starts:
+        candidate = text[min(starts):]
+        # Cut what follows the value, e.g. a closing fence or a remark, which may hold brackets too.
+        try:
+            _, end = json.JSONDecoder().raw_decode(candidate)
+        except json.JSONDecodeError:
+            # Not valid as is, so keep it up to its closing bracket for `repair_json`.
+            end = _balanced_end(candidate)
+        yield candidate[:end]
+
+
+def parse_json(text):
+    """
+    Finds and parses the JSON of a response, repairing it if it does not parse as is.
+
+    Args:
+        text (str): The response.
+
+    Returns:
+        The parsed JSON value.
+
+    Raises:
+        ValueError: If the response holds no JSON. A `json.JSONDecodeError` if none of the
+            candidates parses, even after repair.
+    """
+    error = None
+    for candidate in _json_candidates(text):
+        candidate = candidate.strip()
+        if not candidate:
+            continue
+        try:
+            return json.loads(candidate)
+        except json.JSONDecodeError as e:
+            error = error or e
+        try:
+            return json.loads(repair_json(candidate))
+        except json.JSONDecodeError:
+            pass
+    if error is not None:
+        raise error
+    raise ValueError("No JSON data found in the string.")
@@ -14,6 +14,7 @@ class RepairingResult:
     critique: str = ''
     score: str = ''
     result: str = ''
+    return_value: Optional[dict] = None
 
 
 @dataclass
@@ -51,12 +52,42 @@ class EnvState:
     error: Optional[str] = None
     pwd: Optional[str] = ''
     ls: Optional[str] = ''
+    stderr: Optional[str] = ''
+    output_paths: List[str] = field(default_factory=list)
+    # The return value published by the result helper of the kernel: its `handle`, `type`,
+    # `text` and, for JSON values, the value itself as `json`.
+    return_value: Optional[dict] = None
+    # Set when the step broke its limits: 'timeout', or 'exited' if its process died.
+    violation: Optional[str] = None
+    # The files changed since the working directory snapshot, with `--workdir_checkpoints`.
+    changes: Optional[str] = None
 
     def __str__(self):
         return (f"Result: {self.result}\n"
+                f"Return: {self.return_value}\n"
+                f"Stderr: {self.stderr}\n"
                 f"Error: {self.error}\n"
                 f"PWD: {self.pwd}\n"
                 f"LS: {self.ls}")    
+
+    def output(self):
+        """
+        Returns the standard output, followed by the standard error and the return value if there were any.
+        """
+        output = self.result
+        if self.stderr and self.stderr != self.error:
+            output += f"\n[stderr]\n{self.stderr}"
+        if self.return_value is not None:
+            output += f"\n<return>\n{self.return_value['text']}\n</return>"
+        return output
+
+    def return_text(self):
+        """
+        Returns the text of the return value, or the standard output if none was published.
+        """
+        if self.return_value is not None:
+            return self.return_value['text']
+        return self.result
     
 
 @dataclass
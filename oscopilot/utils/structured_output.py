@@ -0,0 +1,170 @@
+import json
+
+
+class StructuredOutputError(ValueError):
+    """
+    Raised when a structured response is not valid JSON or does not match its schema.
+    """
+
+
+SUBTASK_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "description": {"type": "string"},
+        "dependencies": {"type": "array", "items": {"type": "string"}},
+        "type": {"type": "string"},
+    },
+    "required": ["description", "dependencies", "type"],
+}
+
+# The schemas of the JSON payloads requested from the LLM, by name. The name is also the name
+# of the function the model is made to call.
+SCHEMAS = {
+    "task_graph": {
+        "description": "The subtasks of the task, keyed by subtask name, with the names of the subtasks each one depends on.",
+        "schema": {
+            "type": "object",
+            "additionalProperties": SUBTASK_SCHEMA,
+            "minProperties": 1,
+        },
+    },
+    "judgement": {
+        "description": "The judgement of whether the executed code completed its task, and its generality score.",
+        "schema": {
+            "type": "object",
+            "properties": {
+                "reasoning": {"type": "string"},
+                "status": {"type": "string", "enum": ["Complete", "Amend", "Replan"]},
+                "score": {"type": "integer", "minimum": 1, "maximum": 10},
+            },
+            "required": ["reasoning", "status", "score"],
+        },
+    },
+    "error_analysis": {
+        "description": "Whether the error of the executed code can be fixed by amending the code or needs new operations.",
+        "schema": {
+            "type": "object",
+            "properties": {
+                "reasoning": {"type": "string"},
+                "type": {"type": "string", "enum": ["environmental", "amendable"]},
+            },
+            "required": ["reasoning", "type"],
+        },
+    },
+    "repair": {
+        "description": "The amended code and the code invoking it.",
+        "schema": {
+            "type": "object",
+            "properties": {
+                "reasoning": {"type": "string"},
+                "code": {"type": "string", "description": "The complete amended code, without markdown fences."},
+                "invoke": {"type": "string", "description": "The code calling the amended code, as it would appear between <invoke> and </invoke>."},
+            },
+            "required": ["code", "invoke"],
+        },
+    },
+}
+
+JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "boolean": bool,
+    "integer": int,
+    "number": (int, float),
+    "null": type(None),
+}
+
+
+def validate(value, schema, path="$"):
+    """
+    Checks a value against the subset of JSON schema used in `SCHEMAS`: type, enum, properties,
+    required, additionalProperties, items, minProperties, minimum and maximum.
+
+    Args:
+        value: The parsed JSON value.
+        schema (dict): The schema.
+        path (str, optional): The location of the value, used in error messages.
+
+    Raises:
+        StructuredOutputError: If the value does not match the schema.
+    """
+    expected = schema.get("type")
+    if expected is not None:
+        # bool is a subclass of int, but not a JSON number.
+        if not isinstance(value, JSON_TYPES[expected]) or (expected in ("integer", "number") and isinstance(value, bool)):
+            raise StructuredOutputError(f"{path} should be of type {expected}, got {type(value).__name__}")
+    if "enum" in schema and value not in schema["enum"]:
+        raise StructuredOutputError(f"{path} should be one of {schema['enum']}, got {value!r}")
+    if "minimum" in schema and value < schema["minimum"]:
+        raise StructuredOutputError(f"{path} should be at least {schema['minimum']}, got {value}")
+    if "maximum" in schema and value > schema["maximum"]:
+        raise StructuredOutputError(f"{path} should be at most {schema['maximum']}, got {value}")
+    if isinstance(value, dict):
+        for key in schema.get("required", []):
+            if key not in value:
+                raise StructuredOutputError(f"{path} is missing the key '{key}'")
+        if len(value) < schema.get("minProperties", 0):
+            raise StructuredOutputError(f"{path} should have at least {schema['minProperties']} keys")
+        properties = schema.get("properties", {})
+        for key, item in value.items():
+            if key in properties:
+                validate(item, properties[key], f"{path}.{key}")
+            elif isinstance(schema.get("additionalProperties"), dict):
+                validate(item, schema["additionalProperties"], f"{path}.{key}")
+    if isinstance(value, list) and "items" in schema:
+        for index, item in enumerate(value):
+            validate(item, schema["items"], f"{path}[{index}]")
+
+
+def parse_structured(text, name):
+    """
+    Parses and validates the JSON payload returned by a structured output call.
+
+    Args:
+        text (str): The JSON text returned by the model.
+        name (str): The name of the schema in `SCHEMAS`.
+
+    Returns:
+        dict: The validated payload.
+
+    Raises:
+        StructuredOutputError: If the text is not JSON or does not match the schema.
+    """
+    try:
+        value = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise StructuredOutputError(f"The {name} response is not valid JSON: {e}")
+    validate(value, SCHEMAS[name]["schema"])
+    if name == "task_graph":
+        # Subtasks are added to the graph in order, so a dependency must be listed before its dependents.
+        seen = set()
+        for task_name, task_info in value.items():
+            for dependency in task_info["dependencies"]:
+                if dependency not in seen:
+                    raise StructuredOutputError(f"$.{task_name} depends on '{dependency}', which is not a preceding subtask")
+            seen.add(task_name)
+    return value
+
+
+def function_tool(name):
+    """
+    Returns the schema as an OpenAI function-calling tool.
+    """
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": SCHEMAS[name]["description"],
+            "parameters": SCHEMAS[name]["schema"],
+        },
+    }
+
+
+def schema_instruction(name):
+    """
+    Returns the instruction telling a model without function calling which JSON object to answer with.
+    """
+    return (f"Respond only with a JSON object matching the JSON schema below. {SCHEMAS[name]['description']}\n"
+            f"{json.dumps(SCHEMAS[name]['schema'])}")
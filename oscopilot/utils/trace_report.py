@@ -0,0 +1,184 @@
+import os
+import sys
+import json
+import argparse
+
+
+def load_spans(path):
+    """
+    Loads the spans of an OTLP/JSON trace file written by `oscopilot.utils.tracing`.
+
+    Args:
+        path (str): The path of the trace file.
+
+    Returns:
+        list[dict]: The spans with the attributes flattened into a plain dict and times in seconds.
+    """
+    with open(path, 'r') as f:
+        document = json.load(f)
+    spans = []
+    for resource_spans in document.get("resourceSpans", []):
+        for scope_spans in resource_spans.get("scopeSpans", []):
+            for span in scope_spans.get("spans", []):
+                attributes = {}
+                for attribute in span.get("attributes", []):
+                    value = attribute["value"]
+                    if "intValue" in value:
+                        attributes[attribute["key"]] = int(value["intValue"])
+                    else:
+                        attributes[attribute["key"]] = next(iter(value.values()), None)
+                spans.append({
+                    "id": span["spanId"],
+                    "parent": span.get("parentSpanId"),
+                    "name": span["name"],
+                    "start": int(span["startTimeUnixNano"]) / 1e9,
+                    "end": int(span["endTimeUnixNano"]) / 1e9,
+                    "attributes": attributes,
+                    "error": span.get("status", {}).get("code") == 2,
+                })
+    return spans
+
+
+def span_label(span):
+    """
+    Returns the span name together with its most telling attribute.
+    """
+    attributes = span["attributes"]
+    for key in ("prefix", "sub_task", "language"):
+        if attributes.get(key):
+            return f"{span['name']} [{attributes[key]}]"
+    return span["name"]
+
+
+def render_timeline(spans, width=50, min_ms=0.0):
+    """
+    Renders the spans as an indented tree with a bar showing when each span ran.
+
+    Args:
+        spans (list[dict]): The spans of one trace.
+        width (int, optional): The width of the timeline bars in characters.
+        min_ms (float, optional): Spans shorter than this are hidden.
+
+    Returns:
+        str: The rendered timeline.
+    """
+    children = {}
+    for span in spans:
+        children.setdefault(span["parent"], []).append(span)
+    for siblings in children.values():
+        siblings.sort(key=lambda s: s["start"])
+    roots = children.get(None, [])
+    if not roots:
+        return ""
+    t0 = min(s["start"] for s in roots)
+    total = max(s["end"] for s in roots) - t0 or 1e-9
+
+    lines = []
+
+    def visit(span, depth):
+        duration_ms = (span["end"] - span["start"]) * 1000
+        if duration_ms < min_ms:
+            return
+        begin = int((span["start"] - t0) / total * width)
+        length = max(1, int((span["end"] - span["start"]) / total * width))
+        bar = " " * begin + "#" * min(length, width - begin)
+        label = ("  " * depth + span_label(span))[:48]
+        marker = " !" if span["error"] else ""
+        lines.append(f"{label:<48} {duration_ms:>10.1f} ms |{bar:<{width}}|{marker}")
+        for child in children.get(span["id"], []):
+            visit(child, depth + 1)
+
+    for root in roots:
+        visit(root, 0)
+    return "\n".join(lines)
+
+
+def summarize(spans):
+    """
+    Aggregates the spans by name.
+
+    The self time of a span is its duration minus the time spent in its direct children,
+    which tells where the time is actually spent rather than just which phases are long.
+
+    Args:
+        spans (list[dict]): The spans of one trace.
+
+    Returns:
+        list[dict]: One row per span name with count, total and self time in seconds and
+            token counts, sorted by self time.
+    """
+    child_time = {}
+    for span in spans:
+        if span["parent"]:
+            child_time[span["parent"]] = child_time.get(span["parent"], 0.0) + span["end"] - span["start"]
+    rows = {}
+    for span in spans:
+        row = rows.setdefault(span["name"], {"name": span["name"], "count": 0, "total": 0.0, "self": 0.0,
+                                             "prompt_tokens": 0, "completion_tokens": 0})
+        duration = span["end"] - span["start"]
+        row["count"] += 1
+        row["total"] += duration
+        row["self"] += max(0.0, duration - child_time.get(span["id"], 0.0))
+        row["prompt_tokens"] += span["attributes"].get("prompt_tokens", 0) or 0
+        row["completion_tokens"] += span["attributes"].get("completion_tokens", 0) or 0
+    return sorted(rows.values(), key=lambda r: r["self"], reverse=True)
+
+
+def render_report(path, width=50, min_ms=0.0):
+    """
+    Renders the timeline and the per-phase summary of one trace file.
+
+    Args:
+        path (str): The path of the trace file.
+        width (int, optional): The width of the timeline bars in characters.
+        min_ms (float, optional): Spans shorter than this are hidden from the timeline.
+
+    Returns:
+        str: The report.
+    """
+    spans = load_spans(path)
+    if not spans:
+        return f"{path}: no spans"
+    roots = [s for s in spans if not s["parent"]]
+    wall = sum(s["end"] - s["start"] for s in roots) or 1e-9
+    task = next((s["attributes"].get("task") for s in roots if s["attributes"].get("task")), "")
+    lines = [f"Trace {os.path.basename(path)}", f"Task: {task.strip()[:200]}" if task else "",
+             f"Wall time: {wall:.2f} s", "", render_timeline(spans, width, min_ms), "",
+             f"{'span':<20}{'count':>7}{'total s':>10}{'self s':>10}{'self %':>8}{'prompt tok':>12}{'compl tok':>11}"]
+    for row in summarize(spans):
+        lines.append(f"{row['name']:<20}{row['count']:>7}{row['total']:>10.2f}{row['self']:>10.2f}"
+                     f"{row['self'] / wall * 100:>7.1f}%{row['prompt_tokens']:>12}{row['completion_tokens']:>11}")
+    return "\n".join(line for line in lines if line is not None)
+
+
+def main():
+    """
+    Prints a per-task timeline and time breakdown of recorded traces.
+
+    Usage:
+        python -m oscopilot.utils.trace_report log/traces
+        python -m oscopilot.utils.trace_report log/traces/<trace_id>.json --min_ms 5
+    """
+    parser = argparse.ArgumentParser(description='Summarize FRIDAY traces')
+    parser.add_argument('paths', nargs='+', help='trace files or directories of trace files')
+    parser.add_argument('--width', type=int, default=50, help='width of the timeline bars')
+    parser.add_argument('--min_ms', type=float, default=0.0, help='hide spans shorter than this many milliseconds')
+    args = parser.parse_args()
+
+    files = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            files.extend(sorted((os.path.join(path, name) for name in os.listdir(path) if name.endswith('.json')),
+                                key=os.path.getmtime))
+        else:
+            files.append(path)
+    if not files:
+        print("No trace files found.")
+        sys.exit(1)
+    for path in files:
+        print(render_report(path, args.width, args.min_ms))
+        print()
+
+
+if __name__ == '__main__':
+    main()
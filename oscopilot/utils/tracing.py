@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import threading
+import functools
+from contextlib import contextmanager
+
+
+class Span:
+    """
+    A timed operation within a trace.
+
+    Attributes:
+        name (str): The name of the operation, e.g. 'planning' or 'llm.chat'.
+        trace_id (str): The 32 hex digit id of the trace the span belongs to.
+        span_id (str): The 16 hex digit id of the span.
+        parent_id (str): The id of the parent span, or None for the root span.
+        start_ns (int): The start time in nanoseconds since the epoch.
+        end_ns (int): The end time in nanoseconds since the epoch.
+        attributes (dict): Key-value details of the operation.
+        error (str): The error message if the operation raised, otherwise None.
+    """
+    def __init__(self, name, trace_id, parent_id=None, attributes=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes or {})
+        self.error = None
+
+    def set_attribute(self, key, value):
+        """
+        Sets an attribute of the span.
+        """
+        self.attributes[key] = value
+
+    def to_otel(self):
+        """
+        Converts the span to the OpenTelemetry (OTLP/JSON) span representation.
+
+        Returns:
+            dict: The span in OTLP/JSON format.
+        """
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [{"key": k, "value": _otel_value(v)} for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    """
+    The span handed out while tracing is disabled; it ignores all attributes.
+    """
+    def set_attribute(self, key, value):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def _otel_value(value):
+    """
+    Wraps a Python value into an OTLP/JSON AnyValue.
+    """
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Tracer:
+    """
+    Collects spans of the agent's hot paths and exports each finished trace to a JSON file.
+
+    Tracing is enabled with the `--trace` option (or the `OSCOPILOT_TRACE=1` environment variable).
+    While disabled, `span` only costs a flag check. Span nesting is tracked per thread, so
+    concurrently running agents produce separate, well-formed traces.
+
+    The exported files follow the OTLP/JSON layout (`resourceSpans` / `scopeSpans` / `spans`), so
+    they can be loaded by OpenTelemetry tooling as well as by `oscopilot.utils.trace_report`.
+    """
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._finished = {}
+
+    @property
+    def enabled(self):
+        """
+        Whether tracing is enabled by the configuration or the environment.
+        """
+        # Imported here because config indirectly imports the LLM clients, which use the tracer.
+        from oscopilot.utils.config import Config
+        return bool(Config.get_parameter('trace')) or os.getenv('OSCOPILOT_TRACE') == '1'
+
+    @property
+    def trace_dir(self):
+        """
+        The directory the traces are exported to.
+        """
+        from oscopilot.utils.config import Config
+        return Config.get_parameter('trace_dir') or os.getenv('OSCOPILOT_TRACE_DIR') or os.path.join('log', 'traces')
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def current_span(self):
+        """
+        Returns the innermost open span of the current thread, or None.
+        """
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """
+        Times the enclosed block as a span.
+
+        A span opened while no other span is open on the thread starts a new trace, which is
+        exported when that root span ends.
+
+        Args:
+            name (str): The name of the operation.
+            **attributes: Initial attributes of the span.
+
+        Yields:
+            Span: The open span, to which further attributes can be added.
+        """
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        span = Span(name, parent.trace_id if parent else os.urandom(16).hex(),
+                    parent.span_id if parent else None, attributes)
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            stack.pop()
+            with self._lock:
+                self._finished.setdefault(span.trace_id, []).append(span)
+            if parent is None:
+                self.export(span.trace_id)
+
+    def export(self, trace_id):
+        """
+        Writes the finished spans of a trace to `<trace_dir>/<trace_id>.json`.
+
+        Args:
+            trace_id (str): The trace to export.
+
+        Returns:
+            str: The path of the written file, or None if the trace has no spans.
+        """
+        with self._lock:
+            spans = self._finished.pop(trace_id, [])
+        if not spans:
+            return None
+        os.makedirs(self.trace_dir, exist_ok=True)
+        path = os.path.join(self.trace_dir, f"{trace_id}.json")
+        document = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "oscopilot"}}]},
+                "scopeSpans": [{
+                    "scope": {"name": "oscopilot"},
+                    "spans": [span.to_otel() for span in sorted(spans, key=lambda s: s.start_ns)],
+                }],
+            }]
+        }
+        with open(path, 'w') as f:
+            json.dump(document, f, ensure_ascii=False)
+        return path
+
+
+tracer = Tracer()
+
+
+def traced(name=None):
+    """
+    Decorator that runs a function inside a span.
+
+    Args:
+        name (str, optional): The span name. Defaults to the function's name.
+
+    Returns:
+        callable: The decorator.
+    """
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,216 @@
+import os
+import json
+import time
+import atexit
+import logging
+import functools
+import threading
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+
+load_dotenv(dotenv_path='.env', override=True)
+# Optional price table in USD per 1K tokens, e.g. {"gpt-4-turbo": [0.01, 0.03]} (prompt, completion).
+MODEL_PRICES = json.loads(os.getenv('MODEL_PRICES') or '{}')
+
+
+class BudgetExceededError(Exception):
+    """
+    Raised before an LLM call when the run's token budget is used up and the budget action is 'abort'.
+    """
+    pass
+
+
+class UsageLedger:
+    """
+    Records the token usage and latency of every LLM call of a run.
+
+    Each record is tagged with the current task, subtask and module, which are set with the
+    `tags` context manager or the `usage_tag` decorator, so the report can break the usage down
+    by where it was spent. Tags are kept per thread.
+
+    A token budget can be set with `--token_budget`. Once it is used up, further calls either
+    raise `BudgetExceededError` (`--budget_action abort`) or switch to `--downgrade_model`
+    (`--budget_action downgrade`).
+    """
+    def __init__(self):
+        self.records = []
+        self._total_tokens = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._report_registered = False
+
+    def _tags(self):
+        if not hasattr(self._local, 'tags'):
+            self._local.tags = {}
+        return self._local.tags
+
+    @contextmanager
+    def tags(self, **tags):
+        """
+        Tags the LLM calls made in the enclosed block, e.g. `tags(task=..., subtask=...)`.
+
+        Args:
+            **tags: The tags to set; they override the enclosing tags of the same name.
+        """
+        current = self._tags()
+        previous = dict(current)
+        current.update(tags)
+        try:
+            yield
+        finally:
+            self._local.tags = previous
+
+    @property
+    def total_tokens(self):
+        """
+        The number of prompt and completion tokens used so far.
+        """
+        # A running total, as the budget is checked before every call.
+        return self._total_tokens
+
+    def check_budget(self):
+        """
+        Raises if the token budget is used up and the budget action is 'abort'.
+
+        Raises:
+            BudgetExceededError: If the run has to be aborted.
+        """
+        self.select_model(None)
+
+    def select_model(self, model_name):
+        """
+        Checks the budget before an LLM call and returns the model to call.
+
+        Args:
+            model_name (str): The model the client would use.
+
+        Returns:
+            str: `model_name`, or the downgrade model once the budget is exhausted.
+
+        Raises:
+            BudgetExceededError: If the budget is exhausted and the budget action is 'abort'.
+        """
+        from oscopilot.utils.config import Config
+        budget = Config.get_parameter('token_budget') or 0
+        if budget <= 0 or self.total_tokens < budget:
+            return model_name
+        if Config.get_parameter('budget_action') == 'downgrade' and Config.get_parameter('downgrade_model'):
+            return Config.get_parameter('downgrade_model')
+        raise BudgetExceededError(f"Token budget of {budget} exhausted ({self.total_tokens} tokens used).")
+
+    def record(self, model, prompt_tokens, completion_tokens, latency, prefix=""):
+        """
+        Records one LLM call with the current tags.
+
+        Args:
+            model (str): The model that served the call.
+            prompt_tokens (int): The number of prompt tokens.
+            completion_tokens (int): The number of completion tokens.
+            latency (float): The call latency in seconds.
+            prefix (str, optional): The label the caller passed to the LLM client.
+        """
+        prices = MODEL_PRICES.get(model, [0, 0])
+        entry = {
+            "time": time.time(),
+            "model": model,
+            "prefix": prefix.strip(),
+            "task": self._tags().get('task', ''),
+            "subtask": self._tags().get('subtask', ''),
+            "module": self._tags().get('module', 'other'),
+            "prompt_tokens": prompt_tokens or 0,
+            "completion_tokens": completion_tokens or 0,
+            "latency": round(latency, 3),
+            "cost": ((prompt_tokens or 0) * prices[0] + (completion_tokens or 0) * prices[1]) / 1000,
+        }
+        with self._lock:
+            self.records.append(entry)
+            self._total_tokens += entry["prompt_tokens"] + entry["completion_tokens"]
+            if not self._report_registered:
+                self._report_registered = True
+                atexit.register(self.write_report)
+
+    def summary(self):
+        """
+        Aggregates the records by module, subtask and task.
+
+        Returns:
+            dict: The totals and the per-module, per-subtask and per-task aggregates.
+        """
+        with self._lock:
+            records = list(self.records)
+
+        def aggregate(key):
+            groups = {}
+            for r in records:
+                group = groups.setdefault(r[key] or '-', {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                                                          "latency": 0.0, "cost": 0.0})
+                group["calls"] += 1
+                group["prompt_tokens"] += r["prompt_tokens"]
+                group["completion_tokens"] += r["completion_tokens"]
+                group["latency"] = round(group["latency"] + r["latency"], 3)
+                group["cost"] += r["cost"]
+            return groups
+
+        return {
+            "total": {
+                "calls": len(records),
+                "prompt_tokens": sum(r["prompt_tokens"] for r in records),
+                "completion_tokens": sum(r["completion_tokens"] for r in records),
+                "latency": round(sum(r["latency"] for r in records), 3),
+                "cost": sum(r["cost"] for r in records),
+            },
+            "by_model": aggregate('model'),
+            "by_module": aggregate('module'),
+            "by_subtask": aggregate('subtask'),
+            "by_task": aggregate('task'),
+        }
+
+    def write_report(self, path=None):
+        """
+        Writes the records and their aggregates to a JSON file in the logging directory.
+
+        Args:
+            path (str, optional): The report path. Defaults to `<logging_filedir>/usage_<logging_prefix>.json`.
+
+        Returns:
+            str: The path of the report, or None if nothing was recorded.
+        """
+        if not self.records:
+            return None
+        from oscopilot.utils.config import Config
+        if path is None:
+            log_dir = Config.get_parameter('logging_filedir') or 'log'
+            path = os.path.join(log_dir, 'usage_{}.json'.format(Config.get_parameter('logging_prefix') or os.getpid()))
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        summary = self.summary()
+        with self._lock:
+            records = list(self.records)
+        with open(path, 'w') as f:
+            json.dump({"summary": summary, "records": records}, f, ensure_ascii=False, indent=2)
+        total = summary["total"]
+        logging.info(f"LLM usage: {total['calls']} calls, {total['prompt_tokens']} prompt tokens, "
+                     f"{total['completion_tokens']} completion tokens, cost ${total['cost']:.4f}. Report: {path}")
+        return path
+
+
+usage_ledger = UsageLedger()
+
+
+def usage_tag(module):
+    """
+    Decorator that tags the LLM calls made by a function with a module name.
+
+    Args:
+        module (str): The module tag, e.g. 'executor.generate'.
+
+    Returns:
+        callable: The decorator.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with usage_ledger.tags(module=module):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
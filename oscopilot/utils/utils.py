@@ -11,9 +11,11 @@ import tqdm
 import re
 import tiktoken
 import random
-from datasets import load_dataset
+from datasets import load_dataset, load_from_disk
 from oscopilot.prompts.general_pt import prompt as general_pt
 from oscopilot.utils.llms import OpenAI
+from oscopilot.utils.usage import BudgetExceededError, usage_tag
+from oscopilot.utils.structured_output import parse_structured
 import platform
 from functools import wraps
 
@@ -337,6 +339,29 @@ def send_chat_prompts(sys_prompt, user_prompt, llm, prefix=""):
     return llm.chat(message, prefix=prefix)
 
 
+def send_structured_prompts(sys_prompt, user_prompt, llm, schema, prefix=""):
+    """
+    Sends chat prompts to a language learning model in structured output mode and returns the validated JSON payload.
+
+    Args:
+        sys_prompt (str): The system prompt that sets the context or provides instructions for the language learning model.
+        user_prompt (str): The user prompt that contains the specific query or command intended for the language learning model.
+        llm (object): The language learning model, whose `chat` method accepts a `schema` argument.
+        schema (str): The name of the expected payload's schema in `structured_output.SCHEMAS`.
+
+    Returns:
+        dict: The payload, parsed and validated against the schema.
+
+    Raises:
+        StructuredOutputError: If the response does not match the schema.
+    """
+    message = [
+            {"role": "system", "content": sys_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+    return parse_structured(llm.chat(message, prefix=prefix, schema=schema), schema)
+
+
 def get_project_root_path():
     """
     This function returns the absolute path of the project root directory. It assumes that it is being called from a file located in oscopilot/utils/.
@@ -361,8 +386,16 @@ def get_project_root_path():
     return project_root_path + '/'
 
 
+_postprocess_llm = None
+
+
+@usage_tag('gaia.postprocess')
 def GAIA_postprocess(question, response):
-    llm = OpenAI()
+    global _postprocess_llm
+    # One client per process, so its HTTP connections are reused across tasks.
+    if _postprocess_llm is None:
+        _postprocess_llm = OpenAI()
+    llm = _postprocess_llm
     extractor_prompt = general_pt['GAIA_ANSWER_EXTRACTOR_PROMPT'].format(
         question=question,
         response=response
@@ -372,29 +405,91 @@ def GAIA_postprocess(question, response):
 
 
 class GAIALoader:
-    def __init__(self, level=1, cache_dir=None):
+    def __init__(self, level=1, cache_dir=None, snapshot_dir=None):
+        """
+        Loads the GAIA dataset of a level.
+
+        Snapshots are kept per dataset config in `snapshot_dir`, e.g. `snapshot_dir/2023_level1`.
+        If the snapshot of the level was saved by an earlier run, the dataset is memory-mapped
+        from its Arrow files without resolving the dataset on the hub. Otherwise the dataset is
+        downloaded (or read from `cache_dir`) and, if `snapshot_dir` is given, saved there.
+
+        Args:
+            level (int or str, optional): The GAIA level, or 'all'. Defaults to 1.
+            cache_dir (str, optional): The Hugging Face cache directory.
+            snapshot_dir (str, optional): The directory of the local dataset snapshots.
+        """
+        self._indices = {}
+        name = "2023_all" if str(level) == 'all' else "2023_level{}".format(level)
+        snapshot_path = os.path.join(snapshot_dir, name) if snapshot_dir else None
+        if snapshot_path and os.path.exists(os.path.join(snapshot_path, 'dataset_dict.json')):
+            self.dataset = load_from_disk(snapshot_path)
+            return
         if cache_dir != None:
             assert os.path.exists(cache_dir), f"Cache directory {cache_dir} does not exist."
             self.cache_dir = cache_dir
             try:
-                self.dataset = load_dataset("gaia-benchmark/GAIA", "2023_level{}".format(level), cache_dir=self.cache_dir)
+                self.dataset = load_dataset("gaia-benchmark/GAIA", name, cache_dir=self.cache_dir)
             except Exception as e:
                 raise Exception(f"Failed to load GAIA dataset: {e}")
         else:
-            self.dataset = load_dataset("gaia-benchmark/GAIA", "2023_level{}".format(level))
-            
-        
-    def get_data_by_task_id(self, task_id, dataset_type):
+            self.dataset = load_dataset("gaia-benchmark/GAIA", name)
+        if snapshot_path:
+            self.dataset.save_to_disk(snapshot_path)
+
+    def _index(self, dataset_type):
+        """
+        Returns the task_id to row map of a split, built once from the task_id column.
+        """
         if self.dataset is None or dataset_type not in self.dataset:
             raise ValueError("Dataset not loaded or data set not available.")
+        if dataset_type not in self._indices:
+            task_ids = self.dataset[dataset_type]['task_id']
+            self._indices[dataset_type] = {task_id: row for row, task_id in enumerate(task_ids)}
+        return self._indices[dataset_type]
 
-        data_set = self.dataset[dataset_type]
-        for record in data_set:
-            if record['task_id'] == task_id:
-                return record
-        return None
+    def get_data_by_task_id(self, task_id, dataset_type):
+        row = self._index(dataset_type).get(task_id)
+        if row is None:
+            return None
+        return self.dataset[dataset_type][row]
+
+    def iter_tasks(self, dataset_type, task_ids=None, level=None, has_file=None, file_types=None):
+        """
+        Lazily yields the tasks of a split that match the filters.
 
-    def task2query(self, task):
+        The filters are evaluated on the task_id, Level and file_name columns, so only the
+        matching rows are decoded.
+
+        Args:
+            dataset_type (str): The split, e.g. 'validation' or 'test'.
+            task_ids (list[str], optional): Only these tasks, in this order.
+            level (int or str, optional): Only tasks of this level.
+            has_file (bool, optional): Only tasks with (True) or without (False) an attached file.
+            file_types (list[str], optional): Only tasks whose file has one of these extensions, e.g. ['xlsx', 'pdf'].
+
+        Yields:
+            dict: The matching task records.
+        """
+        index = self._index(dataset_type)
+        data_set = self.dataset[dataset_type]
+        if task_ids is not None:
+            rows = [index[task_id] for task_id in task_ids if task_id in index]
+        else:
+            rows = range(len(data_set))
+        if level is not None or has_file is not None or file_types:
+            levels = data_set['Level']
+            file_names = data_set['file_name']
+            file_types = {t.lower().lstrip('.') for t in file_types} if file_types else None
+            rows = [row for row in rows
+                    if (level is None or str(levels[row]) == str(level))
+                    and (has_file is None or (file_names[row] != '') == has_file)
+                    and (file_types is None or file_names[row].split('.')[-1].lower() in file_types)]
+        for row in rows:
+            yield data_set[row]
+
+    @staticmethod
+    def task2query(task):
         query = 'Your task is: {}'.format(task['Question'])
         if task['file_name'] != '':
             query = query + '\n{0} is the absolute file path you need to use, and the file type is {1}. Note that there is no file extension at the end.'.format(task['file_path'], task['file_name'].split('.')[-1])
@@ -404,25 +499,55 @@ class GAIALoader:
     
 class SheetTaskLoader:
     def __init__(self, sheet_task_path=None):
+        self.sheet_task_path = None
+        self._dataset = None
         if sheet_task_path != None:
             assert os.path.exists(sheet_task_path), f"Sheet task jsonl file {sheet_task_path} does not exist."
             self.sheet_task_path = sheet_task_path
+        else:
+            print("Sheet task jsonl file not provided.")
+
+    @property
+    def dataset(self):
+        """
+        The queries of all tasks, built on first access.
+        """
+        if self._dataset is None and self.sheet_task_path is not None:
             try:
-                self.dataset = self.load_sheet_task_dataset()
+                self._dataset = self.load_sheet_task_dataset()
             except Exception as e:
                 raise Exception(f"Failed to load sheet task dataset: {e}")
-        else:
-            print("Sheet task jsonl file not provided.")
+        return self._dataset
 
+    def iter_tasks(self):
+        """
+        Streams the tasks of the jsonl file one line at a time.
 
-    def load_sheet_task_dataset(self):
-        dataset = []
+        Yields:
+            tuple: The task index and the task record. Blank lines are skipped and not counted,
+                so the index matches the position of the task in the loaded dataset.
+        """
         with open(self.sheet_task_path, 'r') as file:
-            for _, line in enumerate(file):
-                task_info = json.loads(line)
-                query = self.task2query(task_info['Context'], task_info['Instructions'], get_project_root_path() + task_info['file_path'])
-                dataset.append(query)
-        return dataset
+            records = (line for line in file if line.strip())
+            for index, line in enumerate(records):
+                yield index, json.loads(line)
+
+    def load_sheet_task_dataset(self):
+        return [self.task_info2query(task_info) for _, task_info in self.iter_tasks()]
+
+    def task_info2query(self, task_info, file_path=None):
+        """
+        Builds the query of a task record, optionally pointing it at a copy of its workbook.
+
+        Args:
+            task_info (dict): The task record.
+            file_path (str, optional): The workbook to use. Defaults to the task's own workbook.
+
+        Returns:
+            str: The query.
+        """
+        file_path = file_path or get_project_root_path() + task_info['file_path']
+        return self.task2query(task_info['Context'], task_info['Instructions'], file_path)
 
     def task2query(self, context, instructions, file_path):
         SHEET_TASK_PROMPT = """You are an expert in handling excel file. {context}
@@ -433,9 +558,14 @@ class SheetTaskLoader:
         return query
     
     def get_data_by_task_id(self, task_id):
-        if self.dataset is None:
+        if self.sheet_task_path is None:
             raise ValueError("Dataset not loaded.")
-        return self.dataset[task_id]
+        if self._dataset is not None:
+            return self._dataset[task_id]
+        for index, task_info in self.iter_tasks():
+            if index == task_id:
+                return self.task_info2query(task_info)
+        raise IndexError(f"Sheet task {task_id} does not exist.")
 
 
 def get_os_version():
@@ -534,6 +664,9 @@ def api_exception_mechanism(max_retries=3):
             while attempts < max_retries:
                 try:
                     return func(*args, **kwargs)
+                except BudgetExceededError:
+                    # Retrying cannot succeed once the budget is used up.
+                    raise
                 except Exception as e:
                     attempts += 1
                     logging.error(f"Error on attempt {attempts} in {func.__name__}: {str(e)}")
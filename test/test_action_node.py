@@ -0,0 +1,62 @@
+import pytest
+from oscopilot.tool_repository.manager.action_node import ActionNode, HANDOFF_TEXT_LIMIT
+
+
+class TestActionNode:
+    """
+    A test class for verifying the information about a finished subtask given to the subtasks depending on it.
+    """
+
+    def setup_method(self, method):
+        """
+        Setup method executed before each test method in this class.
+
+        Args:
+            method: The test method that will be run after this setup method.
+        """
+        self.node = ActionNode("load_sales", "Load the sales sheet.", "Python")
+
+    def finish(self, return_val, variable="load_sales_result", kernel=1):
+        self.node._return_val = return_val
+        self.node._return_ref = {"handle": "load_sales", "type": "DataFrame", "summary": "DataFrame of shape (5000, 3)",
+                                 "text": return_val, "variable": variable, "kernel": kernel}
+
+    def test_without_handoff(self):
+        """
+        Test that a return value not bound to a variable is given as is.
+        """
+        self.node._return_val = "42"
+        assert self.node.prompt_info(1) == {"description": "Load the sales sheet.", "return_val": "42"}
+
+    def test_short_value_keeps_text(self):
+        """
+        Test that a short bound return value is given with its variable.
+        """
+        self.finish("   region  total\n0  north    120")
+        info = self.node.prompt_info(1)
+        assert info["return_val"] == "   region  total\n0  north    120"
+        assert info["variable"] == "load_sales_result"
+
+    def test_long_value_is_summarized(self):
+        """
+        Test that a bound return value longer than the limit is replaced by its summary.
+        """
+        self.finish("x" * (HANDOFF_TEXT_LIMIT + 1))
+        info = self.node.prompt_info(1)
+        assert info["return_val"] == "DataFrame of shape (5000, 3)"
+        assert info["variable"] == "load_sales_result"
+
+    def test_variable_of_restarted_kernel_is_dropped(self):
+        """
+        Test that the variable is not given once the kernel holding it was replaced, and the full value is sent instead.
+        """
+        long_text = "x" * (HANDOFF_TEXT_LIMIT + 1)
+        self.finish(long_text, kernel=1)
+        for live_kernel in (2, None):
+            info = self.node.prompt_info(live_kernel)
+            assert "variable" not in info
+            assert info["return_val"] == long_text
+
+
+if __name__ == '__main__':
+    pytest.main()
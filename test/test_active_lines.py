@@ -0,0 +1,74 @@
+import re
+import contextlib
+import io
+import pytest
+
+pytest.importorskip("jupyter_client")
+from oscopilot.environments.py_jupyter_env import add_top_level_line_prints
+
+
+def run(code):
+    """
+    Runs code and returns its namespace and the line numbers of the active line markers it printed.
+    """
+    ns = {}
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        exec(code, ns)
+    return ns, [int(n) for n in re.findall(r"##active_line(\d+)##", output.getvalue())]
+
+
+class TestTopLevelLinePrints:
+    """
+    A test class for verifying the active line markers inserted before top-level statements in the 'top' mode.
+    """
+
+    def setup_method(self, method):
+        """
+        Setup method executed before each test method in this class.
+
+        Args:
+            method: The test method that will be run after this setup method.
+        """
+        self.add = add_top_level_line_prints
+
+    def test_markers_report_original_lines(self):
+        """
+        Test that each top-level statement reports its line in the original code, and loop bodies get no markers.
+        """
+        code = "total = 0\nfor i in range(3):\n    total += i\nprint(total)"
+        ns, lines = run(self.add(code))
+        assert lines == [1, 2, 4]
+        assert ns["total"] == 3
+
+    def test_decorators(self):
+        """
+        Test that the marker of a decorated function goes before its decorators, so the code still runs.
+        """
+        code = "import functools\n@functools.lru_cache()\n@staticmethod\ndef double(x):\n    return 2 * x\nvalue = 1"
+        new_code = self.add(code)
+        assert new_code.split("\n")[2] == 'print("##active_line4##")'
+        assert new_code.split("\n")[3] == "@functools.lru_cache()"
+        _, lines = run(new_code)
+        assert lines == [1, 4, 6]
+
+    def test_statements_on_one_line(self):
+        """
+        Test that statements sharing a line after a semicolon get a single marker.
+        """
+        ns, lines = run(self.add("a = 1; b = 2\nc = a + b"))
+        assert lines == [1, 2]
+        assert ns["c"] == 3
+
+    def test_multiline_string_with_blank_lines(self):
+        """
+        Test that multi-line strings are left intact, blank lines included.
+        """
+        code = 'text = """first\n\nthird\n"""\nsize = len(text)'
+        ns, lines = run(self.add(code))
+        assert ns["text"] == "first\n\nthird\n"
+        assert lines == [1, 5]
+
+
+if __name__ == '__main__':
+    pytest.main()
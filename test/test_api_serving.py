@@ -0,0 +1,91 @@
+import time
+import asyncio
+import threading
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+from fastapi import APIRouter
+from fastapi.testclient import TestClient
+from oscopilot.tool_repository.manager.api_serving import create_app
+
+
+class TestApiServing:
+    """
+    A test class for verifying the load shedding, health probes and request ids of the tool API.
+    """
+
+    def setup_method(self, method):
+        """
+        Setup method executed before each test method in this class.
+
+        Args:
+            method: The test method that will be run after this setup method.
+        """
+        self.release = threading.Event()
+        self.started = []
+        router = APIRouter()
+
+        @router.get("/tools/slow")
+        async def slow():
+            while not self.release.is_set():
+                await asyncio.sleep(0.01)
+            return {"done": True}
+
+        @router.get("/tools/fast")
+        async def fast():
+            return {"done": True}
+
+        self.app = create_app([router], startup_hooks=[lambda: self.started.append(True)],
+                              max_concurrency=1, queue_timeout=0.05, retry_after=3)
+
+    def test_rejects_when_slots_are_held(self):
+        """
+        Test that a request arriving while every slot is held is rejected with 429 and `Retry-After`, and the probes still answer.
+        """
+        with TestClient(self.app) as client:
+            responses = []
+            holder = threading.Thread(target=lambda: responses.append(client.get("/tools/slow")))
+            holder.start()
+            deadline = time.monotonic() + 5
+            while self.app.state.stats["in_flight"] < 1 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            try:
+                busy = client.get("/tools/fast")
+                assert busy.status_code == 429
+                assert busy.headers["Retry-After"] == "3"
+                assert client.get("/health").status_code == 200
+                ready = client.get("/ready")
+                assert ready.status_code == 200
+                assert ready.json()["in_flight"] == 1
+                assert ready.json()["rejected"] == 1
+            finally:
+                self.release.set()
+                holder.join()
+            assert responses[0].status_code == 200
+            assert client.get("/tools/fast").status_code == 200
+
+    def test_ready_before_and_after_startup(self):
+        """
+        Test that `/ready` answers 503 until the startup hooks ran, while `/health` answers from the start.
+        """
+        client = TestClient(self.app)
+        assert client.get("/ready").status_code == 503
+        assert client.get("/health").status_code == 200
+        assert self.started == []
+        with TestClient(self.app) as client:
+            assert self.started == [True]
+            assert client.get("/ready").json()["ready"] is True
+
+    def test_request_id_header(self):
+        """
+        Test that every response carries its own request id.
+        """
+        with TestClient(self.app) as client:
+            ids = {client.get("/tools/fast").headers["X-Request-ID"] for _ in range(3)}
+            assert len(ids) == 3
+            assert all(len(request_id) == 16 for request_id in ids)
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,59 @@
+import os
+import json
+import tempfile
+import pytest
+from oscopilot.utils.benchmark import BenchmarkRunner, consolidate_results, shard_of, shard_results_path
+
+
+class TestBenchmarkRunner:
+    """
+    A test class for verifying the task selection and result consolidation of the BenchmarkRunner.
+    """
+
+    def setup_method(self, method):
+        """
+        Setup method executed before each test method in this class.
+
+        Writes a results file with one complete and one incomplete task.
+
+        Args:
+            method: The test method that will be run after this setup method.
+        """
+        self.results_path = os.path.join(tempfile.mkdtemp(), "results.jsonl")
+        with open(self.results_path, 'w') as f:
+            f.write(json.dumps({"task_id": "a", "status": "complete", "correct": True, "wall_time": 1.5, "prompt_tokens": 10}) + '\n')
+            f.write(json.dumps({"task_id": "b", "status": "incomplete", "correct": False, "wall_time": 2.0, "prompt_tokens": 5}) + '\n')
+        self.tasks = [("a", {}), ("b", {}), ("c", {})]
+
+    def test_resume_skips_finished_tasks(self):
+        """
+        Test that tasks already in the results file are skipped, unless incomplete ones are retried.
+        """
+        assert [t for t, _ in BenchmarkRunner(self.results_path).pending(self.tasks)] == ["c"]
+        retry = BenchmarkRunner(self.results_path, retry_incomplete=True)
+        assert [t for t, _ in retry.pending(self.tasks)] == ["b", "c"]
+
+    def test_shards_partition_tasks(self):
+        """
+        Test that every task belongs to exactly one shard and each shard has its own results file.
+        """
+        task_ids = [str(i) for i in range(50)]
+        shards = [[t for t in task_ids if shard_of(t, 3) == i] for i in range(3)]
+        assert sorted(sum(shards, [])) == sorted(task_ids)
+        assert shard_results_path("r.jsonl", 3, 1) == "r.shard1of3.jsonl"
+        assert shard_results_path("r.jsonl") == "r.jsonl"
+
+    def test_consolidate_results(self):
+        """
+        Test that the summary counts accuracy, incomplete tasks, wall time and tokens.
+        """
+        summary = consolidate_results([self.results_path, self.results_path + ".missing"])
+        assert summary["tasks"] == 2
+        assert summary["accuracy"] == 0.5
+        assert summary["incomplete"] == 1
+        assert summary["wall_time"] == 3.5
+        assert summary["prompt_tokens"] == 15
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import pytest
+from oscopilot.utils.cassette import Cassette, CassetteMissError
+
+
+class TestCassette:
+    """
+    A test class for verifying that the Cassette records interactions and replays them deterministically.
+    """
+
+    def setup_method(self, method):
+        """
+        Setup method executed before each test method in this class.
+
+        Records three interactions, two of them with the same request, to a temporary cassette file.
+
+        Args:
+            method: The test method that will be run after this setup method.
+        """
+        self.path = os.path.join(tempfile.mkdtemp(), "run.jsonl")
+        recorder = Cassette(self.path, mode='record')
+        recorder.call("llm", {"messages": "plan"}, lambda: {"content": "first"})
+        recorder.call("llm", {"messages": "plan"}, lambda: {"content": "second"})
+        recorder.call("tool_api", {"api_path": "/tools/bing/searchv2"}, lambda: [{"title": "result"}])
+
+    def test_replay_in_recorded_order(self):
+        """
+        Test that repeated requests are answered with their responses in the recorded order.
+        """
+        player = Cassette(self.path, mode='replay')
+        assert player.call("llm", {"messages": "plan"}, lambda: pytest.fail("live call in replay")) == {"content": "first"}
+        assert player.call("llm", {"messages": "plan"}, lambda: None) == {"content": "second"}
+        assert player.call("tool_api", {"api_path": "/tools/bing/searchv2"}, lambda: None) == [{"title": "result"}]
+
+    def test_exact_miss(self):
+        """
+        Test that an unrecorded request raises in exact match mode.
+        """
+        player = Cassette(self.path, mode='replay')
+        with pytest.raises(CassetteMissError):
+            player.call("llm", {"messages": "other"}, lambda: None)
+
+    def test_sequence_fallback(self):
+        """
+        Test that an unrecorded request gets the next unused response of the same kind in sequence mode.
+        """
+        player = Cassette(self.path, mode='replay', match='sequence')
+        assert player.call("llm", {"messages": "changed prompt"}, lambda: None) == {"content": "first"}
+        assert player.call("llm", {"messages": "plan"}, lambda: None) == {"content": "second"}
+
+    def test_off_mode_calls_through(self):
+        """
+        Test that a cassette without a path performs the live call and records nothing.
+        """
+        assert Cassette(None, mode='record').call("llm", {}, lambda: "live") == "live"
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,52 @@
+import os
+import json
+import tempfile
+import pytest
+from oscopilot.utils.course_log import CourseLog
+
+
+class TestCourseLog:
+    """
+    A test class for verifying that the CourseLog appends lessons and rebuilds its indexes when reopened.
+    """
+
+    def setup_method(self, method):
+        """
+        Setup method executed before each test method in this class.
+
+        Args:
+            method: The test method that will be run after this setup method.
+        """
+        self.courses_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.courses_dir, "Excel_openpyxl.jsonl")
+
+    def test_reopen_restores_state(self):
+        """
+        Test that completed and pending lessons and the recent window survive reopening the log.
+        """
+        log = CourseLog(self.path, window=2)
+        log.record_course({"read_sheet": "Read Sheet1.", "sum_sales": "Sum the Sales column.", "plot": "Plot sales."})
+        log.mark_completed("read_sheet")
+        log.close()
+
+        log = CourseLog(self.path, window=2)
+        assert log.completed == {"read_sheet"}
+        assert log.pending == {"sum_sales": "Sum the Sales column.", "plot": "Plot sales."}
+        assert log.prior_course() == {"sum_sales": "Sum the Sales column.", "plot": "Plot sales."}
+        log.close()
+
+    def test_import_legacy_course(self):
+        """
+        Test that a course file of the old JSON format is imported as completed lessons.
+        """
+        with open(os.path.join(self.courses_dir, "Excel_openpyxl.json"), 'w') as f:
+            json.dump({"read_sheet": "Read Sheet1."}, f)
+        log = CourseLog(self.path)
+        assert log.completed == {"read_sheet"}
+        assert log.pending == {}
+        assert log.prior_course() == {"read_sheet": "Read Sheet1."}
+        log.close()
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -1,3 +1,6 @@
+import os
+import json
+import tempfile
 import pytest
 from oscopilot.utils import SheetTaskLoader, get_project_root_path
 
@@ -51,6 +54,23 @@ class TestSheetTaskLoader:
         """        
         assert self.sheet_task_loader.get_data_by_task_id(1) != {}
 
+    def test_task_ids_skip_blank_lines(self):
+        """
+        Test that blank lines are not counted, so a task id picks the same task whether or not the dataset was loaded.
+        """
+        tasks = [{"Context": "Context {}.".format(i), "Instructions": "Do {}.".format(i), "file_path": "sheet.xlsx"}
+                 for i in range(3)]
+        path = os.path.join(tempfile.mkdtemp(), "sheet_task.jsonl")
+        with open(path, "w") as f:
+            f.write("\n" + json.dumps(tasks[0]) + "\n\n" + json.dumps(tasks[1]) + "\n   \n" + json.dumps(tasks[2]) + "\n")
+        streamed = SheetTaskLoader(path)
+        assert [index for index, _ in streamed.iter_tasks()] == [0, 1, 2]
+        loaded = SheetTaskLoader(path)
+        loaded.dataset
+        for task_id in range(3):
+            assert streamed.get_data_by_task_id(task_id) == loaded.get_data_by_task_id(task_id)
+            assert "Do {}.".format(task_id) in streamed.get_data_by_task_id(task_id)
+
 if __name__ == '__main__':
     pytest.main()
 
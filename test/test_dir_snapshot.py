@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+import pytest
+from oscopilot.environments.dir_snapshot import DirectorySnapshot
+
+
+class TestDirectorySnapshot:
+    """
+    A test class for verifying that the cached working directory listing follows the directory and renders each mode.
+    """
+
+    def setup_method(self, method):
+        """
+        Setup method executed before each test method in this class.
+
+        Args:
+            method: The test method that will be run after this setup method.
+        """
+        self.working_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.working_dir, "data"))
+        self._write("sales.csv", "region,amount\n", mtime=1000)
+        self._write("notes.txt", "keep me", mtime=2000)
+        self._touch_dir(1)
+
+    def _write(self, name, content, mtime=None):
+        path = os.path.join(self.working_dir, name)
+        with open(path, "w") as f:
+            f.write(content)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+    def _touch_dir(self, mtime):
+        """
+        Sets the directory mtime, so the mtime check sees a change even within the clock resolution.
+        """
+        os.utime(self.working_dir, (mtime, mtime))
+
+    def test_full_listing(self):
+        """
+        Test that a full listing has every entry sorted by name, with its size and type.
+        """
+        snapshot = DirectorySnapshot(self.working_dir, use_watcher=False)
+        lines = snapshot.listing('full').splitlines()
+        assert [line.split("\t")[0] for line in lines] == ["data", "notes.txt", "sales.csv"]
+        assert lines[1] == "notes.txt\t 7 bytes\t File"
+        assert lines[0].endswith("Directory")
+
+    def test_summary_listing(self):
+        """
+        Test that a summary over the limit gives an overview and the most recently modified entries.
+        """
+        snapshot = DirectorySnapshot(self.working_dir, use_watcher=False)
+        os.utime(os.path.join(self.working_dir, "data"), (500, 500))
+        lines = snapshot.listing('summary', limit=2).splitlines()
+        assert lines[0].startswith("2 files and 1 directories, 21 bytes in files.")
+        assert [line.split("\t")[0] for line in lines[1:3]] == ["notes.txt", "sales.csv"]
+        assert lines[3] == "... 1 more entries not shown"
+        assert snapshot.listing('summary', limit=3) == snapshot.listing('full')
+
+    def test_diff_per_consumer(self):
+        """
+        Test that each consumer gets the changes since its own previous listing.
+        """
+        snapshot = DirectorySnapshot(self.working_dir, use_watcher=False)
+        assert snapshot.listing('diff', consumer="planner") == snapshot.listing('full')
+        self._write("report.xlsx", "xlsx")
+        os.remove(os.path.join(self.working_dir, "notes.txt"))
+        self._touch_dir(2)
+        assert snapshot.listing('diff', consumer="planner") == "Added: report.xlsx\t 4 bytes\t File\nRemoved: notes.txt"
+        assert snapshot.listing('diff', consumer="planner") == "No changes in the working directory since the previous step."
+        assert snapshot.listing('diff', consumer="executor") == snapshot.listing('full')
+
+    def test_mtime_fallback(self):
+        """
+        Test that without a watcher, added entries and changed file contents are picked up.
+        """
+        snapshot = DirectorySnapshot(self.working_dir, use_watcher=False)
+        snapshot.refresh()
+        self._write("report.xlsx", "xlsx")
+        self._touch_dir(2)
+        assert "report.xlsx" in snapshot.refresh()
+        self._write("notes.txt", "edited, and longer")
+        self._touch_dir(2)
+        assert snapshot.refresh()["notes.txt"][1] == len("edited, and longer")
+
+    def test_recreated_directory(self):
+        """
+        Test that a watched directory deleted and created again is still followed.
+        """
+        pytest.importorskip('inotify_simple')
+        snapshot = DirectorySnapshot(self.working_dir)
+        snapshot.refresh()
+        shutil.rmtree(self.working_dir)
+        assert snapshot.refresh() == {}
+        os.makedirs(self.working_dir)
+        self._write("report.xlsx", "xlsx")
+        assert list(snapshot.refresh()) == ["report.xlsx"]
+        self._write("summary.txt", "done")
+        assert sorted(snapshot.refresh()) == ["report.xlsx", "summary.txt"]
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import pytest
+from datasets import Dataset, DatasetDict
+from oscopilot.utils import GAIALoader
+
+
+class TestGAIALoader:
+    """
+    A test class for verifying the indexed lookup and filtered iteration of the GAIALoader on a local snapshot.
+    """
+
+    def setup_method(self, method):
+        """
+        Setup method executed before each test method in this class.
+
+        Saves a small GAIA-like dataset as a snapshot and loads it without network access.
+
+        Args:
+            method: The test method that will be run after this setup method.
+        """
+        snapshot_dir = self.snapshot_dir = tempfile.mkdtemp()
+        DatasetDict({"validation": Dataset.from_dict({
+            "task_id": ["t1", "t2", "t3"],
+            "Question": ["q1", "q2", "q3"],
+            "Level": ["1", "2", "1"],
+            "file_name": ["", "data.xlsx", "paper.pdf"],
+            "file_path": ["", "/tmp/data.xlsx", "/tmp/paper.pdf"],
+            "Final answer": ["a1", "a2", "a3"],
+        })}).save_to_disk(os.path.join(snapshot_dir, "2023_level1"))
+        self.gaia = GAIALoader(snapshot_dir=snapshot_dir)
+
+    def test_get_data_by_task_id(self):
+        """
+        Test that tasks are found by id, and unknown ids return None.
+        """
+        assert self.gaia.get_data_by_task_id("t2", "validation")["Question"] == "q2"
+        assert self.gaia.get_data_by_task_id("missing", "validation") is None
+
+    def test_iter_tasks_filters(self):
+        """
+        Test that iteration honours the task id, level, has-file and file type filters.
+        """
+        ids = lambda **kwargs: [t["task_id"] for t in self.gaia.iter_tasks("validation", **kwargs)]
+        assert ids() == ["t1", "t2", "t3"]
+        assert ids(task_ids=["t3", "t1"]) == ["t3", "t1"]
+        assert ids(level=1) == ["t1", "t3"]
+        assert ids(has_file=False) == ["t1"]
+        assert ids(file_types=["xlsx"]) == ["t2"]
+
+    def test_snapshot_is_kept_per_level(self, monkeypatch):
+        """
+        Test that the snapshot of one level is not reused for another.
+        """
+        loaded = []
+        monkeypatch.setattr("oscopilot.utils.utils.load_dataset", lambda path, name, **kwargs: loaded.append(name) or self.gaia.dataset)
+        GAIALoader(level=2, snapshot_dir=self.snapshot_dir)
+        assert loaded == ["2023_level2"]
+        assert os.path.exists(os.path.join(self.snapshot_dir, "2023_level2", "dataset_dict.json"))
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,122 @@
+import re
+import sys
+import types
+import pytest
+from oscopilot.environments.kernel_runtime import result_helper_code, RESULT_MIME_TYPE, active_line_hook_code
+
+
+class Table:
+    """
+    A stand-in for a DataFrame: an object with a shape and columns.
+    """
+    shape = (5000, 2)
+    columns = ["region", "total"]
+
+    def __str__(self):
+        return "region total\n" * 5000
+
+
+class TestResultHelper:
+    """
+    A test class for verifying the kernel helper publishing, binding and clearing the return values of subtasks.
+    """
+
+    def setup_method(self, method):
+        """
+        Setup method executed before each test method in this class.
+
+        Defines the helper in a namespace standing in for the kernel's, with the published data recorded.
+
+        Args:
+            method: The test method that will be run after this setup method.
+        """
+        display = pytest.importorskip("IPython.display")
+        self.published = []
+        self.monkeypatch = pytest.MonkeyPatch()
+        self.monkeypatch.setattr(display, "publish_display_data", lambda data: self.published.append(data[RESULT_MIME_TYPE]))
+        self.ns = {}
+        exec(result_helper_code(), self.ns)
+
+    def teardown_method(self, method):
+        self.monkeypatch.undo()
+
+    def test_summaries(self):
+        """
+        Test that values are summarized by their shape and columns, keys or length.
+        """
+        self.ns["_oscopilot_return"](Table(), "load_sales", 100)
+        self.ns["_oscopilot_return"]({"a": 1, "b": 2}, "counts")
+        self.ns["_oscopilot_return"]([1, 2, 3], "ids")
+        self.ns["_oscopilot_return"](3.5, "mean")
+        summaries = [payload["summary"] for payload in self.published]
+        assert summaries == ["Table of shape (5000, 2) with columns ['region', 'total']",
+                             "dict of 2 items with keys ['a', 'b']", "list of length 3", "float"]
+
+    def test_text_is_bounded_and_json_kept(self):
+        """
+        Test that the text is cut to the limit, and JSON values are published as such.
+        """
+        self.ns["_oscopilot_return"](Table(), "load_sales", 100)
+        self.ns["_oscopilot_return"]({"a": [1, 2]}, "counts", 100)
+        table, counts = self.published
+        assert "characters omitted" in table["text"] and len(table["text"]) < 200
+        assert "json" not in table
+        assert counts["json"] == {"a": [1, 2]}
+        assert self.ns["_oscopilot_results"]["counts"] == {"a": [1, 2]}
+
+    def test_bind_and_clear(self):
+        """
+        Test that a bound value is assigned to `<handle>_result`, and clearing drops it and the kept values.
+        """
+        table = Table()
+        self.ns["_oscopilot_return"](table, "load sales", 100, True)
+        assert self.published[0]["variable"] == "load_sales_result"
+        assert self.ns["load_sales_result"] is table
+        self.ns["_oscopilot_clear"]()
+        assert "load_sales_result" not in self.ns
+        assert self.ns["_oscopilot_results"] == {}
+
+
+class TestActiveLineHook:
+    """
+    A test class for verifying the line hook reporting active lines in the 'trace' mode.
+    """
+
+    def setup_method(self, method):
+        """
+        Setup method executed before each test method in this class.
+
+        Installs the hook for a namespace standing in for the kernel's user namespace.
+
+        Args:
+            method: The test method that will be run after this setup method.
+        """
+        ipython = pytest.importorskip("IPython")
+        self.ns = {}
+        self.monkeypatch = pytest.MonkeyPatch()
+        self.monkeypatch.setattr(ipython, "get_ipython", lambda: types.SimpleNamespace(user_ns=self.ns))
+        exec(compile("def work():\n    a = 1\n    b = 2\n    return a + b\n", "<cell>", "exec"), self.ns)
+
+    def teardown_method(self, method):
+        monitoring = getattr(sys, "monitoring", None)
+        if monitoring is not None:
+            for tool_id in range(6):
+                if monitoring.get_tool(tool_id) == "oscopilot_active_line":
+                    monitoring.set_events(tool_id, 0)
+                    monitoring.register_callback(tool_id, monitoring.events.LINE, None)
+                    monitoring.free_tool_id(tool_id)
+        sys.settrace(None)
+        self.monkeypatch.undo()
+
+    def test_reports_lines_of_user_code(self, capsys):
+        """
+        Test that the lines run in the user namespace are reported with their line numbers, and other code is not.
+        """
+        exec(active_line_hook_code(interval=0), {})
+        assert self.ns["work"]() == 3
+        lines = [int(n) for n in re.findall(r"##active_line(\d+)##", capsys.readouterr().out)]
+        assert lines == [2, 3, 4]
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,121 @@
+import os
+import sys
+import types
+import argparse
+import tempfile
+import threading
+import pytest
+from oscopilot.utils.config import Config
+from oscopilot.agents.self_learning import SelfLearning
+
+
+class FakeAgent:
+    """
+    An agent whose modules each have an environment, recording the lessons it runs and where.
+    """
+
+    def __init__(self, working_dir, barrier):
+        self.planner, self.retriever, self.executor = (types.SimpleNamespace(environment=types.SimpleNamespace(working_dir=working_dir))
+                                                       for _ in range(3))
+        self.barrier = barrier
+        self.runs = []
+
+    def run(self, lesson):
+        working_dir = self.executor.environment.working_dir
+        assert {module.environment.working_dir for module in (self.planner, self.retriever)} == {working_dir}
+        self.runs.append((working_dir, lesson))
+        # All lessons run at the same time, and each writes the same relative path.
+        self.barrier.wait(timeout=10)
+        with open(os.path.join(working_dir, "result.txt"), "w") as f:
+            f.write(lesson)
+
+
+class TestLessonWorkers:
+    """
+    A test class for verifying that lessons learned concurrently run on separate agents in separate working directories.
+    """
+
+    def setup_method(self, method):
+        """
+        Setup method executed before each test method in this class.
+
+        Args:
+            method: The test method that will be run after this setup method.
+        """
+        self.root = tempfile.mkdtemp()
+        self.working_dir = os.path.join(self.root, "working_dir")
+        os.makedirs(self.working_dir)
+        self.demo_file = os.path.join(self.root, "demo.xlsx")
+        with open(self.demo_file, "w") as f:
+            f.write("demo")
+        self.barrier = threading.Barrier(3)
+        self.agents = []
+        self.primary = self.make_agent(self.working_dir)
+        self.self_learning = SelfLearning(self.primary, lambda prompt, tool_manager: None, None,
+                                          argparse.Namespace(lesson_workers=3),
+                                          agent_factory=lambda: self.make_agent(self.working_dir))
+        self.self_learning.demo_file_path = self.demo_file
+
+    def teardown_method(self, method):
+        Config._instance = None
+
+    def make_agent(self, working_dir):
+        agent = FakeAgent(working_dir, self.barrier)
+        self.agents.append(agent)
+        return agent
+
+    def test_concurrent_lessons_are_isolated(self):
+        """
+        Test that concurrent lessons get distinct sibling working directories, each with its own copy of the demo file.
+        """
+        course = {f"lesson_{i}": f"Sum column {i} of {self.demo_file}." for i in range(3)}
+        self.self_learning.learn_course(course)
+        runs = [run for agent in self.agents for run in agent.runs]
+        assert len(runs) == 3
+        working_dirs = {working_dir for working_dir, _ in runs}
+        assert working_dirs == {os.path.join(self.root, f"working_dir_lesson_worker_{i}") for i in range(3)}
+        for working_dir, lesson in runs:
+            demo_copy = os.path.join(working_dir, "demo.xlsx")
+            assert demo_copy in lesson
+            assert self.demo_file not in lesson
+            with open(demo_copy) as f:
+                assert f.read() == "demo"
+            with open(os.path.join(working_dir, "result.txt")) as f:
+                assert f.read() == lesson
+        assert os.listdir(self.working_dir) == []
+        assert self.primary.executor.environment.working_dir == self.working_dir
+        assert self.primary.planner.environment.working_dir == self.working_dir
+
+    @pytest.mark.skipif(os.name != 'posix', reason="runs a POSIX shell")
+    def test_shell_runs_in_working_dir(self):
+        """
+        Test that Shell steps start in the working directory of their environment, also after it changed.
+        """
+        from oscopilot.environments import Env
+        Config._instance = None
+        Config.initialize(argparse.Namespace(working_dir=self.working_dir, output_log_dir=self.root))
+        env = Env()
+        assert env.step('Shell', 'pwd').result.strip() == os.path.realpath(self.working_dir)
+        env.working_dir = self.root
+        assert env.step('Shell', 'pwd').result.strip() == os.path.realpath(self.root)
+
+    def test_python_runs_in_working_dir(self):
+        """
+        Test that a warm Python kernel follows the working directory of its environment.
+        """
+        pytest.importorskip('jupyter_client')
+        from oscopilot.environments import Env
+        Config._instance = None
+        Config.initialize(argparse.Namespace(working_dir=self.working_dir, output_log_dir=self.root,
+                                             warm_kernel=True, active_line_mode='off'))
+        env = Env()
+        try:
+            assert env.step('Python', 'import os\nprint(os.getcwd())').result.strip() == os.path.realpath(self.working_dir)
+            env.working_dir = self.root
+            assert env.step('Python', 'print(os.getcwd())').result.strip() == os.path.realpath(self.root)
+        finally:
+            env.terminate()
+
+
+if __name__ == '__main__':
+    pytest.main()
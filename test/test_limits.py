@@ -0,0 +1,121 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import pytest
+from oscopilot.utils.config import Config
+from oscopilot.environments.limits import limited_command, LIMITS_LAUNCHER
+
+
+def process_alive(pid):
+    """
+    Returns whether a process is running, counting a zombie waiting to be reaped as gone.
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except OSError:
+        return False
+
+
+class TestLimits:
+    """
+    A test class for verifying that steps are wrapped in their resource limits and stopped when they break them.
+    """
+
+    def setup_method(self, method):
+        """
+        Setup method executed before each test method in this class.
+
+        Args:
+            method: The test method that will be run after this setup method.
+        """
+        self.working_dir = tempfile.mkdtemp()
+        self.configure()
+
+    def teardown_method(self, method):
+        Config._instance = None
+
+    def configure(self, **parameters):
+        Config._instance = None
+        Config.initialize(argparse.Namespace(working_dir=self.working_dir, output_log_dir=self.working_dir, **parameters))
+
+    def test_limited_command_without_limits(self):
+        """
+        Test that the command is left as is when no limit is set.
+        """
+        assert limited_command(['bash']) == ['bash']
+
+    def test_limited_command_memory_limit(self):
+        """
+        Test that a memory limit runs the command through the setrlimit launcher.
+        """
+        self.configure(step_memory_limit=512, step_cpu_limit=30)
+        cmd = limited_command(['bash', '-i'])
+        if os.name == 'posix':
+            assert cmd == [sys.executable, '-c', LIMITS_LAUNCHER, '512', 'bash', '-i']
+        else:
+            assert cmd == ['bash', '-i']
+
+    def test_limited_command_cgroup(self, monkeypatch):
+        """
+        Test that `--step_cgroup` runs the command in a systemd scope capping memory and CPU share.
+        """
+        monkeypatch.setattr('shutil.which', lambda name: '/usr/bin/' + name)
+        self.configure(step_cgroup=True, step_cpu_quota=50)
+        assert limited_command(['bash']) == ['systemd-run', '--user', '--scope', '--quiet', '-p', 'CPUQuota=50%', 'bash']
+
+    @pytest.mark.skipif(os.name != 'posix', reason="process groups are POSIX")
+    def test_shell_timeout_kills_children(self):
+        """
+        Test that a Shell step running too long is stopped along with the programs it started.
+        """
+        from oscopilot.environments import Env
+        self.configure(step_timeout=3)
+        env = Env()
+        state = env.step('Shell', f'{sys.executable} -c "import os, time; print(os.getpid(), flush=True); time.sleep(60)"')
+        assert state.violation == 'timeout'
+        assert 'StepTimeout' in state.error
+        child = int(state.result.split()[0])
+        deadline = time.monotonic() + 5
+        while process_alive(child) and time.monotonic() < deadline:
+            time.sleep(0.1)
+        assert not process_alive(child)
+
+    @pytest.mark.skipif(os.name != 'posix', reason="process groups are POSIX")
+    def test_shell_cpu_limit(self):
+        """
+        Test that a Shell step using more CPU time than allowed is stopped before its timeout.
+        """
+        from oscopilot.environments import Env
+        self.configure(step_timeout=60, step_cpu_limit=1)
+        env = Env()
+        start = time.monotonic()
+        state = env.step('Shell', f'{sys.executable} -c "while True: pass"')
+        assert state.violation == 'cpu'
+        assert time.monotonic() - start < 30
+
+    def test_python_timeout_restarts_kernel(self):
+        """
+        Test that a Python step running too long reports a timeout and the next step gets a fresh kernel.
+        """
+        pytest.importorskip('jupyter_client')
+        from oscopilot.environments import Env
+        self.configure(step_timeout=3, warm_kernel=True, active_line_mode='off')
+        env = Env()
+        env.step('Python', 'leftover = 1')
+        state = env.step('Python', 'import time\ntime.sleep(60)')
+        assert state.violation == 'timeout'
+        state = env.step('Python', 'print("leftover" in globals())')
+        assert state.violation is None
+        assert state.result.strip() == 'False'
+        env.terminate()
+
+
+if __name__ == '__main__':
+    pytest.main()
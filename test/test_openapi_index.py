@@ -0,0 +1,104 @@
+import os
+import json
+import tempfile
+import pytest
+from oscopilot.tool_repository.manager.openapi_index import OpenAPIIndex
+
+
+SPEC = {
+    "openapi": "3.1.0",
+    "info": {"title": "FastAPI", "version": "0.1.0"},
+    "paths": {
+        "/tools/search": {
+            "get": {
+                "summary": "Search the web.",
+                "requestBody": {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/Query"}}}},
+                "responses": {"422": {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/Error"}}}}}
+            }
+        },
+        "/tools/upload": {
+            "get": {"summary": "Get summary."},
+            "post": {
+                "summary": "Post summary.",
+                "requestBody": {"content": {"multipart/form-data": {"schema": {"allOf": [{"$ref": "#/components/schemas/Tree"}]}}}}
+            }
+        }
+    },
+    "components": {
+        "schemas": {
+            "Query": {"properties": {"filter": {"$ref": "#/components/schemas/Filter"}}},
+            "Filter": {"properties": {"site": {"type": "string"}}},
+            "Tree": {"properties": {"children": {"items": {"$ref": "#/components/schemas/Tree"}}}},
+            "Error": {"properties": {"detail": {"type": "string"}}}
+        }
+    }
+}
+
+
+class TestOpenAPIIndex:
+    """
+    A test class for verifying the precomputed per-path documents and descriptions of OpenAPIIndex.
+    """
+
+    def setup_method(self, method):
+        """
+        Setup method executed before each test method in this class.
+
+        Writes a small OpenAPI specification with nested and self-referencing schemas to a
+        temporary file and builds an index over it.
+
+        Args:
+            method: The test method that will be run after this setup method.
+        """
+        self.tmp_dir = tempfile.mkdtemp()
+        self.spec_path = os.path.join(self.tmp_dir, "openapi.json")
+        with open(self.spec_path, "w") as f:
+            json.dump(SPEC, f)
+        self.index = OpenAPIIndex(self.spec_path)
+
+    def test_description_pair(self):
+        """
+        Test that every path is described and that the 'post' summary is preferred over 'get'.
+        """
+        assert self.index.get_description_pair() == {
+            "/tools/search": "Search the web.",
+            "/tools/upload": "Post summary."
+        }
+
+    def test_nested_refs_resolved(self):
+        """
+        Test that schemas referenced through other schemas are included in the document.
+        """
+        doc = self.index.get_doc("/tools/search")
+        assert set(doc["components"]["schemas"]) == {"Query", "Filter"}
+        assert list(doc["paths"]) == ["/tools/search"]
+
+    def test_cyclic_refs(self):
+        """
+        Test that a self-referencing schema is collected once without infinite recursion.
+        """
+        doc = self.index.get_doc("/tools/upload")
+        assert set(doc["components"]["schemas"]) == {"Tree"}
+
+    def test_unknown_path(self):
+        """
+        Test that an unknown path returns the error document.
+        """
+        assert self.index.get_doc("/tools/missing") == {"error": "The api is not existed"}
+
+    def test_reload_on_change(self):
+        """
+        Test that the index is rebuilt when the specification file changes.
+        """
+        self.index.get_description_pair()
+        spec = json.loads(json.dumps(SPEC))
+        spec["paths"]["/tools/search"]["get"]["summary"] = "Changed."
+        with open(self.spec_path, "w") as f:
+            json.dump(spec, f)
+        mtime = os.path.getmtime(self.spec_path) + 10
+        os.utime(self.spec_path, (mtime, mtime))
+        assert self.index.get_description_pair()["/tools/search"] == "Changed."
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,67 @@
+import tempfile
+import pytest
+from oscopilot.environments.output_capture import OutputCapture
+
+
+class TestOutputCapture:
+    """
+    A test class for verifying that step output is bounded in memory and spilled to disk in full.
+    """
+
+    def setup_method(self, method):
+        """
+        Setup method executed before each test method in this class.
+
+        Args:
+            method: The test method that will be run after this setup method.
+        """
+        self.spill_dir = tempfile.mkdtemp()
+
+    def test_small_output_is_kept_whole(self):
+        """
+        Test that output within the limit is returned unchanged and not written to disk.
+        """
+        capture = OutputCapture(limit=100, spill_dir=self.spill_dir)
+        capture.append("Sheet1 loaded\n")
+        capture.append("Total: 42\n")
+        capture.close()
+        assert capture.getvalue() == "Sheet1 loaded\nTotal: 42\n"
+        assert not capture.truncated
+        assert capture.spill_path is None
+
+    def test_large_output_keeps_head_and_tail(self):
+        """
+        Test that output over the limit keeps its head and tail and is written to disk in full.
+        """
+        capture = OutputCapture(limit=20, spill_dir=self.spill_dir)
+        rows = ["row {}\n".format(i) for i in range(100)]
+        for row in rows:
+            capture.append(row)
+        capture.close()
+        full = "".join(rows)
+        value = capture.getvalue()
+        assert capture.truncated
+        assert value.startswith(full[:10])
+        assert value.endswith(full[-10:])
+        assert capture.spill_path in value
+        with open(capture.spill_path) as f:
+            assert f.read() == full
+
+    def test_single_large_chunk_keeps_head(self):
+        """
+        Test that one chunk over the limit, like a long traceback, keeps its start as well as its end.
+        """
+        capture = OutputCapture(limit=20, spill_dir=self.spill_dir)
+        capture.append("HEAD-" + "x" * 100 + "-TAIL")
+        capture.append("\nDone")
+        capture.close()
+        value = capture.getvalue()
+        assert value.startswith("HEAD-xxxxx")
+        assert value.endswith("-TAIL\nDone")
+        assert "[95 characters omitted" in value
+        with open(capture.spill_path) as f:
+            assert f.read() == "HEAD-" + "x" * 100 + "-TAIL\nDone"
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,131 @@
+import json
+import random
+import pytest
+from oscopilot.utils.response_parser import ResponseParser, parse_response, extract_tag, extract_code, parse_json
+
+
+TAGS = [('<invoke>', '</invoke>'), ('<return>', '</return>')]
+
+RESPONSES = [
+    "The task needs a single call.\n"
+    "```python\n"
+    "class count_files(BaseAction):\n"
+    "    def __call__(self, path):\n"
+    "        return len(os.listdir(path))\n"
+    "```\n"
+    "<invoke>count_files()(path='/home/user/docs')</invoke>\n",
+    "Reasoning: the subtasks depend on each other.\n"
+    "```json\n"
+    "{\n"
+    "    \"retrieve_document\": {\"name\": \"retrieve_document\", \"dependencies\": []},\n"
+    "    \"summarize\": {\"name\": \"summarize\", \"dependencies\": [\"retrieve_document\"],},\n"
+    "}\n"
+    "```\n",
+    "```bash\nls -la ~/Desktop\n```\nthen\n```python\nprint('done')\n```\n<return>done</return>",
+    "<invoke>a()</invoke><invoke>b()</invoke> and an unfinished <invoke>c(",
+    "```python\nprint('cut off before the closing fence')\n",
+]
+
+
+class TestResponseParser:
+    """
+    A test class for verifying that code blocks, tags and JSON are recovered from LLM responses,
+    whether parsed whole or as a stream.
+    """
+
+    def setup_method(self, method):
+        """
+        Setup method executed before each test method in this class.
+
+        Args:
+            method: The test method that will be run after this setup method.
+        """
+        self.random = random.Random(1234)
+
+    def test_extracts_code_and_invoke_tag(self):
+        """
+        Test that the code block and the invoke tag of a tool creation response are extracted.
+        """
+        code = extract_code(RESPONSES[0], 'python')
+        assert code.startswith("class count_files(BaseAction):")
+        assert extract_tag(RESPONSES[0], '<invoke>', '</invoke>') == ["count_files()(path='/home/user/docs')"]
+
+    def test_extract_code_prefers_language_and_falls_back(self):
+        """
+        Test that the block of the requested language is chosen, and another block is used if there is none.
+        """
+        assert extract_code(RESPONSES[2], 'python') == "print('done')\n"
+        assert extract_code(RESPONSES[2], 'shell') == "ls -la ~/Desktop\n"
+        assert extract_code("No code in this answer.", 'python') is None
+
+    def test_unclosed_block_and_tag(self):
+        """
+        Test that a block cut off before its fence is kept, while an unclosed tag is not.
+        """
+        assert extract_code(RESPONSES[4], 'python') == "print('cut off before the closing fence')\n"
+        assert extract_tag(RESPONSES[3], '<invoke>', '</invoke>') == ["a()", "b()"]
+
+    def test_parse_json_repairs_trailing_commas(self):
+        """
+        Test that JSON with trailing commas is parsed.
+        """
+        data = parse_json(RESPONSES[1])
+        assert data["summarize"]["dependencies"] == ["retrieve_document"]
+
+    def test_parse_json_repairs_truncated_json(self):
+        """
+        Test that JSON cut off mid-way is closed and parsed.
+        """
+        data = parse_json('```json\n{"reasoning": "The file exists", "judge": True, "score": 8, "errors": ["miss')
+        assert data == {"reasoning": "The file exists", "judge": True, "score": 8, "errors": ["miss"]}
+
+    def test_parse_json_without_fences(self):
+        """
+        Test that JSON written without a code block is found.
+        """
+        assert parse_json('Here is the plan: {"subtasks": [1, 2]} as requested.') == {"subtasks": [1, 2]}
+        with pytest.raises(ValueError):
+            parse_json("There is nothing to parse here.")
+        with pytest.raises(json.JSONDecodeError):
+            parse_json('```json\n{"a": 1 "b": 2}\n```')
+
+    def test_parse_json_ignores_brackets_after_value(self):
+        """
+        Test that a remark with brackets after bare JSON is not taken as part of it.
+        """
+        assert parse_json('{"score": 7} -- note: [done]') == {"score": 7}
+        assert parse_json('Plan: ["a", "b]"] (see [1])') == ["a", "b]"]
+        assert parse_json('{"a": 1, "b": [2, 3],} then [4]') == {"a": 1, "b": [2, 3]}
+
+    def test_streamed_chunks_match_whole_parse(self):
+        """
+        Test that feeding a response in random chunks gives the same blocks and tags as parsing it whole.
+        """
+        for text in RESPONSES:
+            whole = parse_response(text, TAGS)
+            for _ in range(200):
+                parser = ResponseParser(TAGS)
+                pos = 0
+                while pos < len(text):
+                    size = self.random.randint(1, 8)
+                    parser.feed(text[pos:pos + size])
+                    pos += size
+                parser.close()
+                assert parser.blocks == whole.blocks
+                assert parser.tags == whole.tags
+
+    def test_long_stream_is_trimmed(self):
+        """
+        Test that text no longer needed is dropped while a long response streams in.
+        """
+        parser = ResponseParser(TAGS)
+        for i in range(2000):
+            parser.feed("line {} of the answer\n".format(i))
+        parser.feed("<return>42</return>")
+        parser.close()
+        assert parser.tags[('<return>', '</return>')] == ["42"]
+        assert len(parser._text) < 8192
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,57 @@
+import argparse
+import tempfile
+import pytest
+from oscopilot.utils.config import Config
+
+
+class TestResultChannel:
+    """
+    A test class for verifying that tool return values travel from the kernel on their own channel, apart from the printed output.
+    """
+
+    def setup_method(self, method):
+        """
+        Setup method executed before each test method in this class.
+
+        Args:
+            method: The test method that will be run after this setup method.
+        """
+        pytest.importorskip("jupyter_client")
+        from oscopilot.environments import Env
+        working_dir = tempfile.mkdtemp()
+        Config._instance = None
+        Config.initialize(argparse.Namespace(working_dir=working_dir, output_log_dir=working_dir))
+        self.env = Env()
+
+    def teardown_method(self, method):
+        Config._instance = None
+
+    def run_tool(self, code, handle):
+        # The same call of the result helper as FridayExecutor.execute_tool appends.
+        return self.env.step('Python', f"{code}\nresult={handle}()\n_oscopilot_return(result, {handle!r}, 20000, False)")
+
+    def test_return_value_round_trip(self):
+        """
+        Test that the return value is published with its handle, type, text and JSON, and kept out of the output.
+        """
+        state = self.run_tool('def count_rows():\n    print("counting")\n    return {"rows": 3}', 'count_rows')
+        assert state.error is None
+        assert state.return_value["handle"] == "count_rows"
+        assert state.return_value["type"] == "dict"
+        assert state.return_value["text"] == "{'rows': 3}"
+        assert state.return_value["json"] == {"rows": 3}
+        assert state.result.strip() == "counting"
+        assert state.return_text() == "{'rows': 3}"
+
+    def test_failing_tool_falls_back_to_output(self):
+        """
+        Test that no return value is published when the tool raises, and the output is used instead.
+        """
+        state = self.run_tool('def broken():\n    print("partial")\n    raise ValueError("bad sheet")', 'broken')
+        assert state.return_value is None
+        assert "ValueError" in state.error
+        assert "partial" in state.return_text()
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,97 @@
+import os
+import re
+import shutil
+import zipfile
+import tempfile
+import importlib.util
+import pytest
+from oscopilot.utils import get_project_root_path
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+def load_sheet_runner():
+    """
+    Imports the SheetCopilot benchmark script, which is not part of the package.
+    """
+    spec = importlib.util.spec_from_file_location(
+        "run_sheet_task", os.path.join(get_project_root_path(), "examples", "SheetCopilot", "run_sheet_task.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def cache_formula_value(path, formula, value):
+    """
+    Stores the value Excel would have cached for a formula cell, which openpyxl never writes itself.
+    """
+    source = path + ".orig"
+    shutil.move(path, source)
+    with zipfile.ZipFile(source) as src, zipfile.ZipFile(path, "w") as dst:
+        for item in src.infolist():
+            data = src.read(item.filename)
+            if item.filename.startswith("xl/worksheets/"):
+                pattern = r"(<f>{}</f>)(<v\s*/>|<v></v>)?".format(re.escape(formula))
+                data = re.sub(pattern.encode(), lambda m: m.group(1) + "<v>{}</v>".format(value).encode(), data)
+            dst.writestr(item, data)
+    os.remove(source)
+
+
+class TestCompareWorkbooks:
+    """
+    A test class for verifying how a workbook produced for a sheet task is checked against its answer.
+    """
+
+    def setup_method(self, method):
+        """
+        Setup method executed before each test method in this class.
+
+        Args:
+            method: The test method that will be run after this setup method.
+        """
+        self.runner = load_sheet_runner()
+        self.dir = tempfile.mkdtemp()
+
+    def save(self, name, cells, title="Sheet1"):
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.title = title
+        for coordinate, value in cells.items():
+            sheet[coordinate] = value
+        path = os.path.join(self.dir, name)
+        workbook.save(path)
+        return path
+
+    def test_float_tolerance(self):
+        """
+        Test that numbers equal up to float rounding match, and other numbers do not.
+        """
+        answer = self.save("answer.xlsx", {"A1": 0.3})
+        assert self.runner.compare_workbooks(self.save("close.xlsx", {"A1": 0.1 + 0.2}), answer) == (True, "")
+        correct, mismatch = self.runner.compare_workbooks(self.save("off.xlsx", {"A1": 0.31}), answer)
+        assert not correct
+        assert mismatch == "Sheet1!A1: 0.31 != 0.3"
+
+    def test_cached_value_and_formula_fallback(self):
+        """
+        Test that a formula is compared by its cached value when both sides have one, and by its normalized text otherwise.
+        """
+        answer = self.save("answer.xlsx", {"B1": 10, "B2": 20, "A1": "=SUM(B1:B2)"})
+        cache_formula_value(answer, "SUM(B1:B2)", 30)
+        typed = self.save("typed.xlsx", {"B1": 10, "B2": 20, "A1": 30})
+        assert self.runner.compare_workbooks(typed, answer) == (True, "")
+        uncached = self.save("uncached.xlsx", {"B1": 10, "B2": 20, "A1": "=sum( $B$1:B2 )"})
+        assert self.runner.compare_workbooks(uncached, answer) == (True, "")
+        wrong = self.save("wrong.xlsx", {"B1": 10, "B2": 20, "A1": "=SUM(B1:B3)"})
+        assert self.runner.compare_workbooks(wrong, answer) == (False, "Sheet1!A1: '=SUM(B1:B3)' != '=SUM(B1:B2)'")
+
+    def test_missing_sheet(self):
+        """
+        Test that a workbook without a sheet of the answer does not match.
+        """
+        answer = self.save("answer.xlsx", {"A1": 1}, title="Summary")
+        assert self.runner.compare_workbooks(self.save("result.xlsx", {"A1": 1}), answer) == (False, "missing sheet Summary")
+
+
+if __name__ == '__main__':
+    pytest.main()
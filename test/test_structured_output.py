@@ -0,0 +1,69 @@
+import json
+import pytest
+from oscopilot.utils.structured_output import StructuredOutputError, parse_structured, function_tool
+
+
+class TestStructuredOutput:
+    """
+    A test class for verifying that structured LLM payloads are validated against their schemas.
+    """
+
+    def setup_method(self, method):
+        """
+        Setup method executed before each test method in this class.
+
+        Args:
+            method: The test method that will be run after this setup method.
+        """
+        self.task_graph = {
+            "retrieve_document": {"name": "retrieve_document", "description": "Find the report.", "dependencies": [], "type": "Shell"},
+            "summarize_document": {"name": "summarize_document", "description": "Summarize it.", "dependencies": ["retrieve_document"], "type": "QA"},
+        }
+
+    def test_valid_payloads(self):
+        """
+        Test that payloads matching their schemas are returned parsed.
+        """
+        judgement = parse_structured('{"reasoning": "The file was created.", "status": "Complete", "score": 7}', "judgement")
+        assert judgement["status"] == "Complete"
+        assert parse_structured(json.dumps(self.task_graph), "task_graph") == self.task_graph
+        repair = parse_structured(json.dumps({"code": "print(1)", "invoke": "f()"}), "repair")
+        assert repair["invoke"] == "f()"
+
+    def test_invalid_payloads(self):
+        """
+        Test that missing keys, wrong types and values outside an enum or range are rejected.
+        """
+        with pytest.raises(StructuredOutputError, match="missing the key 'score'"):
+            parse_structured('{"reasoning": "ok", "status": "Complete"}', "judgement")
+        with pytest.raises(StructuredOutputError, match="one of"):
+            parse_structured('{"reasoning": "ok", "status": "Done", "score": 7}', "judgement")
+        with pytest.raises(StructuredOutputError, match="type integer"):
+            parse_structured('{"reasoning": "ok", "status": "Complete", "score": true}', "judgement")
+        with pytest.raises(StructuredOutputError, match="at most"):
+            parse_structured('{"reasoning": "ok", "status": "Amend", "score": 11}', "judgement")
+        with pytest.raises(StructuredOutputError, match="not valid JSON"):
+            parse_structured('```json\n{"reasoning": "ok"}\n```', "error_analysis")
+
+    def test_task_graph_dependencies_must_precede(self):
+        """
+        Test that a subtask depending on a subtask not listed before it is rejected.
+        """
+        reordered = dict(reversed(list(self.task_graph.items())))
+        with pytest.raises(StructuredOutputError, match="not a preceding subtask"):
+            parse_structured(json.dumps(reordered), "task_graph")
+        with pytest.raises(StructuredOutputError, match="at least 1"):
+            parse_structured("{}", "task_graph")
+
+    def test_function_tool(self):
+        """
+        Test that a schema is exposed as a function-calling tool.
+        """
+        tool = function_tool("repair")
+        assert tool["type"] == "function"
+        assert tool["function"]["name"] == "repair"
+        assert tool["function"]["parameters"]["required"] == ["code", "invoke"]
+
+
+if __name__ == '__main__':
+    pytest.main()
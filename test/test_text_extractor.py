@@ -0,0 +1,70 @@
+import os
+import tempfile
+import pytest
+from oscopilot.tool_repository.basic_tools import text_extractor
+from oscopilot.tool_repository.basic_tools.text_extractor import TextExtractor
+
+
+class TestTextExtractor:
+    """
+    A test class for verifying the native, cached file extraction of the TextExtractor.
+    """
+
+    def setup_method(self, method):
+        """
+        Setup method executed before each test method in this class.
+
+        Creates a TextExtractor without an agent, so any fallback to the agent fails the test.
+
+        Args:
+            method: The test method that will be run after this setup method.
+        """
+        self.dir = tempfile.mkdtemp()
+        self.text_extractor = TextExtractor(agent=None, cache_dir=os.path.join(self.dir, "cache"))
+
+    def test_extract_csv_sampled(self):
+        """
+        Test that a CSV file is read natively and only its first rows are returned.
+        """
+        path = os.path.join(self.dir, "sales.csv")
+        with open(path, 'w') as f:
+            f.write("Product,Units\n" + "".join("Quad,{}\n".format(i) for i in range(150)))
+        content = self.text_extractor.extract_file_content(path)
+        assert content.startswith("[['Product', 'Units'], ['Quad', '0']")
+        assert "51 more rows" in content
+
+    def test_cache_by_content(self, monkeypatch):
+        """
+        Test that files with the same content are extracted once and served from the disk cache.
+        """
+        path = os.path.join(self.dir, "notes.txt")
+        with open(path, 'w') as f:
+            f.write("hello")
+        assert self.text_extractor.extract_file_content(path) == "hello"
+        assert len(os.listdir(os.path.join(self.dir, "cache"))) == 1
+        copy = os.path.join(self.dir, "notes_copy.txt")
+        with open(copy, 'w') as f:
+            f.write("hello")
+        monkeypatch.setattr(TextExtractor, "_extract", lambda self, file_path: pytest.fail("extracted again"))
+        assert self.text_extractor.extract_file_content(copy) == "hello"
+        monkeypatch.setattr(text_extractor, "_cache", {})
+        assert TextExtractor(agent=None, cache_dir=os.path.join(self.dir, "cache")).extract_file_content(copy) == "hello"
+
+    def test_failed_agent_fallback_is_not_cached(self, monkeypatch):
+        """
+        Test that an agent fallback returning nothing is tried again instead of being served from the cache.
+        """
+        path = os.path.join(self.dir, "drawing.vsdx")
+        with open(path, 'w') as f:
+            f.write("shapes")
+        results = [None, "two shapes"]
+        monkeypatch.setattr(self.text_extractor, "extract_with_agent", lambda file_path: results.pop(0))
+        assert self.text_extractor.extract_file_content(path) is None
+        assert not os.path.exists(os.path.join(self.dir, "cache"))
+        assert self.text_extractor.extract_file_content(path) == "two shapes"
+        monkeypatch.setattr(self.text_extractor, "extract_with_agent", lambda file_path: pytest.fail("extracted again"))
+        assert self.text_extractor.extract_file_content(path) == "two shapes"
+
+
+if __name__ == '__main__':
+    pytest.main()
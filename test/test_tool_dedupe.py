@@ -0,0 +1,118 @@
+import os
+import tempfile
+import threading
+import pytest
+from oscopilot.tool_repository.manager.tool_manager import ToolManager, is_better_tool, plan_compaction
+
+
+class CountingEmbeddings:
+    """
+    An embedding function counting the descriptions it is asked to embed.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += len(texts)
+        return [[1.0, float(len(text)), 0.0] for text in texts]
+
+
+class MemoryCollection:
+    """
+    The part of a Chroma collection used by the tool manager, kept in memory.
+    """
+
+    def __init__(self):
+        self.embeddings = {}
+
+    def count(self):
+        return len(self.embeddings)
+
+    def add(self, ids, embeddings, documents, metadatas):
+        self.embeddings.update(zip(ids, embeddings))
+
+    def delete(self, ids):
+        for name in ids:
+            self.embeddings.pop(name, None)
+
+    def query(self, query_embeddings, n_results, include):
+        names = list(self.embeddings)[:n_results]
+        return {"ids": [names], "embeddings": [[self.embeddings[name] for name in names]]}
+
+
+class MemoryVectorStore:
+    """
+    A stand-in for the Chroma store of the tool manager.
+    """
+
+    def __init__(self):
+        self._embedding_function = CountingEmbeddings()
+        self._collection = MemoryCollection()
+
+    def persist(self):
+        pass
+
+
+class TestToolDedupe:
+    """
+    A test class for verifying how near-duplicate tools are grouped and which variant is kept.
+    """
+
+    def setup_method(self, method):
+        """
+        Setup method executed before each test method in this class.
+
+        Two reading tools point in almost the same direction, the plotting tool is unrelated.
+
+        Args:
+            method: The test method that will be run after this setup method.
+        """
+        self.names = ["read_excel", "read_excel_sheet", "plot_sales"]
+        self.embeddings = [[1.0, 0.0, 0.0], [0.99, 0.05, 0.0], [0.0, 0.0, 1.0]]
+
+    def test_keep_better_scoring_duplicate(self):
+        """
+        Test that only the lower-scoring tool of a near-duplicate pair is removed.
+        """
+        removed = plan_compaction(self.names, self.embeddings, [8, 9, 8], threshold=0.95)
+        assert removed == {"read_excel": "read_excel_sheet"}
+
+    def test_unscored_tools_are_kept(self):
+        """
+        Test that a tool stored without a score is kept over a scored duplicate.
+        """
+        removed = plan_compaction(self.names, self.embeddings, [None, 10, 8], threshold=0.95)
+        assert removed == {"read_excel_sheet": "read_excel"}
+        assert not is_better_tool(10, None)
+        assert is_better_tool(9, 8)
+
+    def test_threshold(self):
+        """
+        Test that nothing is removed when no pair is similar enough.
+        """
+        assert plan_compaction(self.names, self.embeddings, [8, 9, 8], threshold=0.9999) == {}
+
+    def test_description_is_embedded_once(self):
+        """
+        Test that checking a new tool for duplicates and storing it embeds its description once.
+        """
+        repo_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(repo_dir, "tool_code"))
+        os.makedirs(os.path.join(repo_dir, "tool_description"))
+        manager = ToolManager.__new__(ToolManager)
+        manager.generated_tools = {}
+        manager.generated_tool_repo_dir = repo_dir
+        manager.write_lock = threading.RLock()
+        manager.vectordb = MemoryVectorStore()
+        for name in ["read_excel", "read_csv"]:
+            description = "Read the {} file.".format(name)
+            embedding = manager.embed_description(description)
+            manager.find_duplicate(description, 0.95, embedding)
+            manager.add_new_tool({"task_name": name, "code": "pass\n", "description": description}, embedding)
+        assert manager.vectordb._embedding_function.calls == 2
+        assert manager.vectordb._collection.embeddings["read_csv"] == embedding
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,62 @@
+import os
+import sys
+import tempfile
+import pytest
+from oscopilot.tool_repository.manager.tool_package import write_tool_package, compile_tool
+
+
+TOOL_TEMPLATE = '''
+class greet:
+    def __call__(self):
+        return {greeting!r}
+'''
+
+
+class TestToolPackage:
+    """
+    A test class for verifying that stored tools are importable through the generated tool_code package.
+    """
+
+    def setup_method(self, method):
+        """
+        Setup method executed before each test method in this class.
+
+        Args:
+            method: The test method that will be run after this setup method.
+        """
+        self.repo_dir = tempfile.mkdtemp()
+        self.tool_code_dir = os.path.join(self.repo_dir, "tool_code")
+        os.makedirs(self.tool_code_dir)
+        for name in [m for m in sys.modules if m == "tool_code" or m.startswith("tool_code.")]:
+            del sys.modules[name]
+        sys.path.insert(0, self.repo_dir)
+
+    def teardown_method(self, method):
+        sys.path.remove(self.repo_dir)
+
+    def _write_tool(self, greeting):
+        path = os.path.join(self.tool_code_dir, "greet.py")
+        with open(path, "w") as f:
+            f.write(TOOL_TEMPLATE.format(greeting=greeting))
+        assert compile_tool(path)
+        return path
+
+    def test_load_and_reload(self):
+        """
+        Test that a tool is loaded from the package and reloaded after its file is rewritten.
+        """
+        write_tool_package(self.tool_code_dir, [])
+        import tool_code
+        # The tool is written after the package was imported.
+        path = self._write_tool("hello")
+        write_tool_package(self.tool_code_dir, ["greet"])
+        assert tool_code.load("greet")()() == "hello"
+
+        self._write_tool("hi")
+        mtime = os.path.getmtime(path) + 1
+        os.utime(path, (mtime, mtime))
+        assert tool_code.load("greet")()() == "hi"
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,135 @@
+import time
+import types
+import threading
+import pytest
+from oscopilot.tool_repository.manager import tool_request_util
+from oscopilot.tool_repository.manager.tool_request_util import ToolRequestUtil, clear_get_cache
+
+
+class StubResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+class StubSession:
+    """
+    A session answering every request with its path and parameters, counting the calls.
+
+    A request may ask to be delayed with a `delay` parameter, so concurrent requests finish out of order.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, json=None, params=None, headers=None, timeout=None):
+        with self._lock:
+            self.calls += 1
+        query = json if json is not None else params
+        time.sleep((query or {}).get("delay", 0))
+        return StubResponse({"url": url, "query": query, "items": [1, 2]})
+
+    def post(self, url, json=None, data=None, files=None, headers=None, timeout=None):
+        return self.get(url, json=json if json is not None else data)
+
+
+class TestToolRequestUtil:
+    """
+    A test class for verifying that tool API requests are gathered in order and GET responses are cached safely.
+    """
+
+    def setup_method(self, method):
+        """
+        Setup method executed before each test method in this class.
+
+        Args:
+            method: The test method that will be run after this setup method.
+        """
+        clear_get_cache()
+        self.session = StubSession()
+        self.now = 1000.0
+
+    def teardown_method(self, method):
+        clear_get_cache()
+
+    def make_util(self, monkeypatch, cache_ttl):
+        monkeypatch.delenv("OSCOPILOT_CASSETTE", raising=False)
+        monkeypatch.delenv("OSCOPILOT_CASSETTE_MODE", raising=False)
+        monkeypatch.setattr(tool_request_util, "time", types.SimpleNamespace(monotonic=lambda: self.now))
+        util = ToolRequestUtil(cache_ttl=cache_ttl)
+        util.session = self.session
+        util.base_url = "http://api"
+        return util
+
+    def test_gather_keeps_order(self, monkeypatch):
+        """
+        Test that gathered requests return their results in request order, even when they finish in another order.
+        """
+        util = self.make_util(monkeypatch, cache_ttl=0)
+        requests_list = [{"api_path": "/tools/search", "method": "get", "params": {"page": i, "delay": 0.05 * (3 - i)}}
+                         for i in range(4)]
+        results = util.gather(requests_list, max_workers=4)
+        assert [result["query"]["page"] for result in results] == [0, 1, 2, 3]
+        assert util.gather([]) == []
+
+    def test_get_cache_ttl(self, monkeypatch):
+        """
+        Test that a GET response is served from the cache until its TTL expires, and POST responses are not cached.
+        """
+        util = self.make_util(monkeypatch, cache_ttl=60)
+        first = util.request("/tools/search", "get", {"query": "sales"})
+        self.now += 30
+        assert util.request("/tools/search", "get", {"query": "sales"}) == first
+        assert self.session.calls == 1
+        util.request("/tools/search", "get", {"query": "prices"})
+        assert self.session.calls == 2
+        self.now += 31
+        util.request("/tools/search", "get", {"query": "sales"})
+        assert self.session.calls == 3
+        util.request("/tools/upload", "post", {"query": "sales"})
+        util.request("/tools/upload", "post", {"query": "sales"})
+        assert self.session.calls == 5
+
+    def test_get_cache_eviction(self, monkeypatch):
+        """
+        Test that the oldest response is evicted once the cache is full.
+        """
+        monkeypatch.setattr(tool_request_util, "API_GET_CACHE_SIZE", 2)
+        util = self.make_util(monkeypatch, cache_ttl=60)
+        for query in ["a", "b", "c"]:
+            util.request("/tools/search", "get", {"query": query})
+        assert self.session.calls == 3
+        util.request("/tools/search", "get", {"query": "c"})
+        util.request("/tools/search", "get", {"query": "b"})
+        assert self.session.calls == 3
+        util.request("/tools/search", "get", {"query": "a"})
+        assert self.session.calls == 4
+
+    def test_cached_response_is_a_copy(self, monkeypatch):
+        """
+        Test that changing a returned response does not change later cache hits.
+        """
+        util = self.make_util(monkeypatch, cache_ttl=60)
+        first = util.request("/tools/search", "get", {"query": "sales"})
+        first["items"].append(3)
+        second = util.request("/tools/search", "get", {"query": "sales"})
+        assert second["items"] == [1, 2]
+        second["items"].clear()
+        assert util.request("/tools/search", "get", {"query": "sales"})["items"] == [1, 2]
+        assert self.session.calls == 1
+
+    def test_cache_disabled(self, monkeypatch):
+        """
+        Test that a TTL of 0 sends every GET request.
+        """
+        util = self.make_util(monkeypatch, cache_ttl=0)
+        util.request("/tools/search", "get", {"query": "sales"})
+        util.request("/tools/search", "get", {"query": "sales"})
+        assert self.session.calls == 2
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,167 @@
+import argparse
+import pytest
+from oscopilot import FridayAgent, FridayExecutor
+from oscopilot.environments.kernel_pool import tool_import_code
+from oscopilot.prompts.friday_pt import prompt
+from oscopilot.utils import EnvState, ExecutionState, InnerMonologue, JudgementResult
+from oscopilot.utils.config import Config
+
+
+STORED_CODE = "class read_excel(BaseAction):\n    def __call__(self, path):\n        return path\n"
+
+
+class StubToolManager:
+    """
+    A tool manager holding one stored tool, `read_excel`, that matches every description.
+    """
+
+    def __init__(self, repo_dir):
+        self.generated_tool_repo_dir = repo_dir
+        self.searches = []
+
+    def find_duplicate(self, description, threshold=0.95):
+        self.searches.append((description, threshold))
+        return "read_excel", 0.97
+
+    def get_tool_code(self, tool_name):
+        return STORED_CODE
+
+
+class StubLLM:
+    """
+    An LLM answering every prompt with the call of the stored tool.
+    """
+
+    def __init__(self):
+        self.messages = []
+
+    def chat(self, messages, prefix=""):
+        self.messages.append(messages)
+        return "The stored tool fits.\n<invoke>read_excel()('sales.xlsx')</invoke>"
+
+
+class StubEnvironment:
+    working_dir = "/home/user/work"
+
+    def live_kernel_id(self):
+        return 1
+
+    def checkpoint(self):
+        return False
+
+
+class StubPlanner:
+    """
+    A planner with one Python subtask, recording the results it is given.
+    """
+
+    def __init__(self):
+        node = argparse.Namespace(description="Read the sales workbook.", node_type="Python", next_action={})
+        self.tool_node = {"read_sheet": node}
+        self.updates = []
+
+    def get_pre_tasks_info(self, current_task, live_kernel=None):
+        return "{}"
+
+    def update_tool(self, tool_name, result, relevant_code, status, node_type, return_value=None):
+        self.updates.append(tool_name)
+
+
+class TestToolReuse:
+    """
+    A test class for verifying that a stored tool matching a subtask is imported and called instead of being generated again.
+    """
+
+    def setup_method(self, method):
+        """
+        Setup method executed before each test method in this class.
+
+        Args:
+            method: The test method that will be run after this setup method.
+        """
+        self.configure(reuse_threshold=0.9)
+        self.tool_manager = StubToolManager("/tmp/generated_tools")
+        self.executor = FridayExecutor.__new__(FridayExecutor)
+        self.executor.prompt = prompt["execute_prompt"]
+        self.executor.tool_manager = self.tool_manager
+        self.executor.llm = StubLLM()
+        self.executor.environment = StubEnvironment()
+        self.executor.system_version = "Linux"
+
+    def teardown_method(self, method):
+        Config._instance = None
+
+    def configure(self, **parameters):
+        Config._instance = None
+        Config.initialize(argparse.Namespace(**parameters))
+
+    def make_agent(self):
+        agent = FridayAgent.__new__(FridayAgent)
+        agent.executor = self.executor
+        agent.planner = StubPlanner()
+        agent.retriever = None
+        agent.score = 5
+        agent.inner_monologue = InnerMonologue()
+        agent.reused_tools = {}
+        return agent
+
+    def test_threshold_zero_disables_reuse(self):
+        """
+        Test that a reuse threshold of 0 never looks for a stored tool.
+        """
+        self.configure(reuse_threshold=0)
+        assert self.executor.find_reusable_tool("Read the sales workbook.") is None
+        assert self.tool_manager.searches == []
+
+    def test_match_imports_and_invokes_tool(self):
+        """
+        Test that a matching tool is imported from the tool package and only its call is asked of the LLM.
+        """
+        assert self.executor.find_reusable_tool("Read the sales workbook.") == "read_excel"
+        assert self.tool_manager.searches == [("Read the sales workbook.", 0.9)]
+        import_code, invoke, code = self.executor.reuse_tool("read_excel", "Read the sales workbook.", "{}")
+        assert import_code == tool_import_code("/tmp/generated_tools") + "\nread_excel = tool_code.load('read_excel')"
+        assert invoke == "read_excel()('sales.xlsx')"
+        assert code == STORED_CODE
+        assert STORED_CODE in self.executor.llm.messages[0][1]["content"]
+
+    def test_executing_runs_reused_tool(self, monkeypatch):
+        """
+        Test that executing a matching subtask runs the import code with the generated call, without generating code.
+        """
+        agent = self.make_agent()
+        runs = []
+        monkeypatch.setattr(self.executor, "generate_tool", lambda *args: pytest.fail("the tool was generated"))
+        monkeypatch.setattr(self.executor, "execute_tool",
+                            lambda code, invoke, node_type, handle: runs.append((code, invoke)) or EnvState(result="ok"))
+        execution_state = agent.executing("read_sheet", "Summarize the sales.")
+        assert runs == [(tool_import_code("/tmp/generated_tools") + "\nread_excel = tool_code.load('read_excel')",
+                         "read_excel()('sales.xlsx')")]
+        assert execution_state.code == STORED_CODE
+        assert agent.reused_tools == {"read_sheet": "read_excel"}
+
+    def test_unchanged_reused_tool_is_not_stored(self, monkeypatch):
+        """
+        Test that a reused tool is stored again only if it was changed, while a generated tool is stored.
+        """
+        agent = self.make_agent()
+        agent.reused_tools = {"read_sheet": "read_excel"}
+        stored = []
+        monkeypatch.setattr(agent, "judging", lambda *args: JudgementResult("Complete", "", 8))
+        monkeypatch.setattr(self.executor, "store_tool", lambda tool, code, score=None: stored.append(tool))
+
+        def refine(tool_name, code):
+            state = ExecutionState(EnvState(result="ok"), "Python", "Read the sales workbook.", code, "ok", {})
+            return agent.self_refining(tool_name, state)
+
+        assert refine("read_sheet", STORED_CODE) == (True, False)
+        assert stored == []
+        refine("read_sheet", STORED_CODE + "\n# amended\n")
+        assert stored == ["read_sheet"]
+        agent.planner.tool_node["plot_sales"] = agent.planner.tool_node["read_sheet"]
+        refine("plot_sales", "class plot_sales(BaseAction):\n    pass\n")
+        assert stored == ["read_sheet", "plot_sales"]
+
+
+if __name__ == '__main__':
+    pytest.main()
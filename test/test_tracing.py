@@ -0,0 +1,143 @@
+import os
+import sys
+import json
+import argparse
+import tempfile
+import pytest
+from oscopilot.utils.config import Config
+from oscopilot.utils.tracing import Tracer
+from oscopilot.utils import trace_report
+
+
+# A trace of one task with a planning phase and an LLM call inside a failing subtask, in seconds.
+FIXTURE_SPANS = [
+    ("a1", None, "task", 0.0, 10.0, {"task": "Summarize the sales report"}, False),
+    ("b1", "a1", "planning", 0.0, 2.0, {}, False),
+    ("c1", "a1", "sub_task", 2.0, 10.0, {"sub_task": "read_sheet"}, True),
+    ("d1", "c1", "llm.chat", 3.0, 9.0, {"prefix": "executor", "prompt_tokens": 120, "completion_tokens": 30}, False),
+]
+
+
+def write_fixture_trace(path):
+    """
+    Writes `FIXTURE_SPANS` as an OTLP/JSON trace file.
+    """
+    spans = []
+    for span_id, parent_id, name, start, end, attributes, error in FIXTURE_SPANS:
+        span = {
+            "traceId": "f" * 32,
+            "spanId": span_id,
+            "name": name,
+            "startTimeUnixNano": str(int(start * 1e9)),
+            "endTimeUnixNano": str(int(end * 1e9)),
+            "attributes": [{"key": k, "value": {"intValue": str(v)} if isinstance(v, int) else {"stringValue": v}}
+                           for k, v in attributes.items()],
+            "status": {"code": 2, "message": "failed"} if error else {"code": 1},
+        }
+        if parent_id:
+            span["parentSpanId"] = parent_id
+        spans.append(span)
+    with open(path, 'w') as f:
+        json.dump({"resourceSpans": [{"scopeSpans": [{"spans": spans}]}]}, f)
+
+
+class TestTracing:
+    """
+    A test class for verifying that spans nest into traces, are exported as OTLP/JSON and are rendered by the report.
+    """
+
+    def setup_method(self, method):
+        """
+        Setup method executed before each test method in this class.
+
+        Args:
+            method: The test method that will be run after this setup method.
+        """
+        self.trace_dir = tempfile.mkdtemp()
+        Config._instance = None
+        Config.initialize(argparse.Namespace(trace=True, trace_dir=self.trace_dir))
+        self.tracer = Tracer()
+
+    def teardown_method(self, method):
+        Config._instance = None
+
+    def load_trace(self):
+        names = os.listdir(self.trace_dir)
+        assert len(names) == 1
+        with open(os.path.join(self.trace_dir, names[0])) as f:
+            document = json.load(f)
+        return names[0], document["resourceSpans"][0]["scopeSpans"][0]["spans"]
+
+    def test_nesting(self):
+        """
+        Test that spans opened inside another span are its children and share its trace id.
+        """
+        with self.tracer.span("task", task="report") as root:
+            with self.tracer.span("sub_task") as child:
+                with self.tracer.span("llm.chat") as grandchild:
+                    assert self.tracer.current_span() is grandchild
+            assert self.tracer.current_span() is root
+        assert self.tracer.current_span() is None
+        assert child.parent_id == root.span_id
+        assert grandchild.parent_id == child.span_id
+        assert root.parent_id is None
+        assert root.trace_id == child.trace_id == grandchild.trace_id
+
+    def test_root_span_exports_one_file(self):
+        """
+        Test that ending a root span writes all spans of its trace to one OTLP/JSON file.
+        """
+        with self.tracer.span("task", task="report") as root:
+            with self.tracer.span("planning") as child:
+                child.set_attribute("prompt_tokens", 12)
+            assert os.listdir(self.trace_dir) == []
+        name, spans = self.load_trace()
+        assert name == f"{root.trace_id}.json"
+        assert [span["name"] for span in spans] == ["task", "planning"]
+        assert spans[1]["parentSpanId"] == root.span_id
+        assert {"key": "prompt_tokens", "value": {"intValue": "12"}} in spans[1]["attributes"]
+        assert spans[0]["status"] == {"code": 1}
+
+    def test_error_status(self):
+        """
+        Test that a span whose block raises gets the error status and message, and the error propagates.
+        """
+        with pytest.raises(ValueError):
+            with self.tracer.span("task"):
+                raise ValueError("bad sheet")
+        _, spans = self.load_trace()
+        assert spans[0]["status"] == {"code": 2, "message": "ValueError: bad sheet"}
+
+    def test_disabled(self):
+        """
+        Test that nothing is recorded while tracing is disabled.
+        """
+        Config._instance = None
+        Config.initialize(argparse.Namespace(trace=False, trace_dir=self.trace_dir))
+        with self.tracer.span("task") as span:
+            span.set_attribute("ignored", 1)
+        assert os.listdir(self.trace_dir) == []
+
+    def test_report_cli(self, monkeypatch, capsys):
+        """
+        Test that the report command renders the timeline and the self time of each span of a trace.
+        """
+        write_fixture_trace(os.path.join(self.trace_dir, "trace.json"))
+        monkeypatch.setattr(sys, 'argv', ['trace_report', self.trace_dir, '--width', '10'])
+        trace_report.main()
+        output = capsys.readouterr().out
+        assert "Task: Summarize the sales report" in output
+        assert "Wall time: 10.00 s" in output
+        lines = output.splitlines()
+        assert any(line.startswith("    llm.chat [executor]") and line.endswith("|   ###### |") for line in lines)
+        assert any(line.startswith("  sub_task [read_sheet]") and line.endswith("| !") for line in lines)
+        summary = {line.split()[0]: line.split() for line in lines if line.split() and line.split()[0] in
+                   ("task", "planning", "sub_task", "llm.chat") and "%" in line}
+        assert summary["llm.chat"][1:4] == ["1", "6.00", "6.00"]
+        assert summary["llm.chat"][5:] == ["120", "30"]
+        assert summary["sub_task"][3] == "2.00"
+        assert summary["task"][3] == "0.00"
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+from oscopilot.tool_repository.api_tools.upload_utils import ResultCache
+
+
+class TestResultCache:
+    """
+    A test class for verifying that the upload result cache coalesces concurrent computations.
+    """
+
+    def setup_method(self, method):
+        """
+        Setup method executed before each test method in this class.
+
+        Args:
+            method: The test method that will be run after this setup method.
+        """
+        self.cache = ResultCache(maxsize=2)
+        self.calls = 0
+
+    async def slow_compute(self):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return "transcript"
+
+    def test_concurrent_requests_are_coalesced(self):
+        """
+        Test that concurrent requests for the same key compute the result once and all get it.
+        """
+        async def main():
+            return await asyncio.gather(*[self.cache.get_or_compute("digest", self.slow_compute) for _ in range(5)])
+
+        assert asyncio.run(main()) == ["transcript"] * 5
+        assert self.calls == 1
+        assert self.cache.get("digest") == "transcript"
+
+    def test_failure_is_shared_and_not_cached(self):
+        """
+        Test that a failed computation raises for every waiter and is not cached.
+        """
+        async def failing():
+            await asyncio.sleep(0.05)
+            raise RuntimeError("API error")
+
+        async def main():
+            return await asyncio.gather(*[self.cache.get_or_compute("digest", failing) for _ in range(3)],
+                                        return_exceptions=True)
+
+        results = asyncio.run(main())
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert self.cache.get("digest") is None
+
+    def test_cancelled_computation_releases_waiters(self):
+        """
+        Test that cancelling the computing request does not leave the coalesced waiters hanging.
+        """
+        async def main():
+            first = asyncio.ensure_future(self.cache.get_or_compute("digest", self.slow_compute))
+            await asyncio.sleep(0.01)
+            waiter = asyncio.ensure_future(self.cache.get_or_compute("digest", self.slow_compute))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await asyncio.wait_for(waiter, timeout=1)
+            # The key is free again for a new computation.
+            return await self.cache.get_or_compute("digest", self.slow_compute)
+
+        assert asyncio.run(main()) == "transcript"
+
+
+if __name__ == '__main__':
+    pytest.main()
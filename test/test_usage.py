@@ -0,0 +1,105 @@
+import json
+import argparse
+import tempfile
+import pytest
+from oscopilot.utils.config import Config
+from oscopilot.utils import usage
+from oscopilot.utils.usage import UsageLedger, BudgetExceededError, usage_tag
+
+
+class TestUsageLedger:
+    """
+    A test class for verifying that LLM usage is tagged, aggregated and held to the token budget.
+    """
+
+    def setup_method(self, method):
+        """
+        Setup method executed before each test method in this class.
+
+        Args:
+            method: The test method that will be run after this setup method.
+        """
+        self.ledger = UsageLedger()
+        # The tests write their reports themselves, not at exit.
+        self.ledger._report_registered = True
+        self.configure()
+
+    def teardown_method(self, method):
+        Config._instance = None
+
+    def configure(self, **parameters):
+        Config._instance = None
+        Config.initialize(argparse.Namespace(**parameters))
+
+    def test_tag_scoping(self, monkeypatch):
+        """
+        Test that nested tags override the enclosing ones only inside their block, and `usage_tag` sets the module.
+        """
+        monkeypatch.setattr(usage, 'usage_ledger', self.ledger)
+
+        @usage_tag('executor.generate')
+        def generate():
+            self.ledger.record('gpt-4', 10, 5, 0.5)
+
+        with self.ledger.tags(task='report', subtask=''):
+            with self.ledger.tags(subtask='read_sheet'):
+                generate()
+            self.ledger.record('gpt-4', 1, 1, 0.1)
+        self.ledger.record('gpt-4', 2, 2, 0.1)
+        tags = [(r['task'], r['subtask'], r['module']) for r in self.ledger.records]
+        assert tags == [('report', 'read_sheet', 'executor.generate'), ('report', '', 'other'), ('', '', 'other')]
+
+    def test_summary(self):
+        """
+        Test that the records are totalled per module and per task.
+        """
+        with self.ledger.tags(task='report', module='planner'):
+            self.ledger.record('gpt-4', 100, 20, 1.0)
+            with self.ledger.tags(module='executor'):
+                self.ledger.record('gpt-4', 50, 10, 0.5)
+                self.ledger.record('gpt-4', 30, 0, 0.25)
+        summary = self.ledger.summary()
+        assert summary['total']['calls'] == 3
+        assert self.ledger.total_tokens == 210
+        assert summary['by_module']['executor'] == {"calls": 2, "prompt_tokens": 80, "completion_tokens": 10,
+                                                    "latency": 0.75, "cost": 0.0}
+        assert summary['by_task']['report']['prompt_tokens'] == 180
+        assert summary['by_subtask']['-']['calls'] == 3
+
+    def test_check_budget_aborts(self):
+        """
+        Test that the budget check raises once the budget is used up and the action is 'abort'.
+        """
+        self.configure(token_budget=100, budget_action='abort')
+        self.ledger.record('gpt-4', 60, 30, 0.1)
+        self.ledger.check_budget()
+        self.ledger.record('gpt-4', 10, 0, 0.1)
+        with pytest.raises(BudgetExceededError, match="100"):
+            self.ledger.check_budget()
+
+    def test_select_model_downgrades(self):
+        """
+        Test that the downgrade model is selected once the budget is used up and the action is 'downgrade'.
+        """
+        self.configure(token_budget=100, budget_action='downgrade', downgrade_model='gpt-3.5-turbo')
+        assert self.ledger.select_model('gpt-4') == 'gpt-4'
+        self.ledger.record('gpt-4', 100, 0, 0.1)
+        assert self.ledger.select_model('gpt-4') == 'gpt-3.5-turbo'
+        self.configure(token_budget=0, budget_action='abort')
+        assert self.ledger.select_model('gpt-4') == 'gpt-4'
+
+    def test_write_report(self):
+        """
+        Test that the report holds the summary and every record.
+        """
+        assert self.ledger.write_report() is None
+        self.ledger.record('gpt-4', 10, 5, 0.5)
+        path = self.ledger.write_report(tempfile.mkdtemp() + '/usage.json')
+        with open(path) as f:
+            report = json.load(f)
+        assert report['summary']['total']['prompt_tokens'] == 10
+        assert len(report['records']) == 1
+
+
+if __name__ == '__main__':
+    pytest.main()
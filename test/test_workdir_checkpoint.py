@@ -0,0 +1,102 @@
+import os
+import tempfile
+import pytest
+from oscopilot.environments.workdir_checkpoint import WorkdirCheckpoint
+
+
+class TestWorkdirCheckpoint:
+    """
+    A test class for verifying that a working directory can be rolled back to a snapshot.
+    """
+
+    def setup_method(self, method):
+        """
+        Setup method executed before each test method in this class.
+
+        Args:
+            method: The test method that will be run after this setup method.
+        """
+        self.working_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.working_dir, "data"))
+        self._write("data/sales.csv", "region,amount\nnorth,10\n")
+        self._write("notes.txt", "keep me")
+        self.checkpoint = WorkdirCheckpoint(self.working_dir, tempfile.mkdtemp())
+
+    def teardown_method(self, method):
+        self.checkpoint.close()
+
+    def _write(self, rel, content):
+        with open(os.path.join(self.working_dir, rel), "w") as f:
+            f.write(content)
+
+    def _read(self, rel):
+        with open(os.path.join(self.working_dir, rel)) as f:
+            return f.read()
+
+    def test_diff_and_rollback(self):
+        """
+        Test that changes made after the snapshot are reported and then undone by a rollback.
+        """
+        self.checkpoint.take()
+        self._write("data/sales.csv", "broken")
+        os.remove(os.path.join(self.working_dir, "notes.txt"))
+        os.makedirs(os.path.join(self.working_dir, "out"))
+        self._write("out/report.xlsx", "partial")
+
+        assert self.checkpoint.diff() == {
+            "added": [os.path.join("out", "report.xlsx")],
+            "removed": ["notes.txt"],
+            "modified": [os.path.join("data", "sales.csv")],
+        }
+        assert self.checkpoint.rollback() == []
+        assert self._read("data/sales.csv") == "region,amount\nnorth,10\n"
+        assert self._read("notes.txt") == "keep me"
+        assert not os.path.exists(os.path.join(self.working_dir, "out"))
+        assert self.checkpoint.format_diff() == "No files were changed."
+
+    def test_retake_copies_only_changed_files(self):
+        """
+        Test that a new snapshot keeps the copies of unchanged files.
+        """
+        self.checkpoint.take()
+        copies = dict(self.checkpoint._files)
+        self._write("notes.txt", "edited")
+        self.checkpoint.take()
+        assert self.checkpoint._files[os.path.join("data", "sales.csv")] == copies[os.path.join("data", "sales.csv")]
+        assert self.checkpoint._files["notes.txt"][2] != copies["notes.txt"][2]
+        assert not os.path.exists(copies["notes.txt"][2])
+
+    def test_shared_checkpoint_dir(self):
+        """
+        Test that checkpoints sharing a directory keep separate copies, and closing one leaves the directory and its other files alone.
+        """
+        parent = tempfile.mkdtemp()
+        with open(os.path.join(parent, "keep.txt"), "w") as f:
+            f.write("not a snapshot")
+        first = WorkdirCheckpoint(self.working_dir, parent)
+        second = WorkdirCheckpoint(self.working_dir, parent)
+        first.take()
+        self._write("notes.txt", "edited")
+        second.take()
+        self._write("notes.txt", "edited again")
+        assert first.rollback() == []
+        assert self._read("notes.txt") == "keep me"
+        first.close()
+        assert os.path.exists(os.path.join(parent, "keep.txt"))
+        assert second.rollback() == []
+        assert self._read("notes.txt") == "edited"
+        second.close()
+        assert os.listdir(parent) == ["keep.txt"]
+
+    def test_store_inside_working_dir_is_rejected(self):
+        """
+        Test that a checkpoint directory inside the working directory is refused.
+        """
+        with pytest.raises(ValueError, match="outside the working directory"):
+            WorkdirCheckpoint(self.working_dir, os.path.join(self.working_dir, "checkpoints"))
+        with pytest.raises(ValueError):
+            WorkdirCheckpoint(self.working_dir, self.working_dir)
+
+
+if __name__ == '__main__':
+    pytest.main()